@@ -0,0 +1,99 @@
+from itertools import chain
+import numpy as np
+
+# Cell codes of the students x events matrix; STATUSES[code] names each one
+NOT_REGISTERED, NO_SHOW, ATTENDED, WALK_IN = 0, 1, 2, 3
+STATUSES = ["notRegistered", "noShow", "attended", "walkIn"]
+
+
+def locate(ids, values):
+    """
+    Positions of `values` in the unsorted `ids` array via one argsort and a
+    searchsorted, plus a mask of the values that were found at all
+    """
+    if not len(ids):
+        return np.zeros(len(values), dtype=np.intp), np.zeros(len(values), dtype=bool)
+    order = np.argsort(ids, kind="stable")
+    slots = np.searchsorted(ids, values, sorter=order).clip(0, len(ids) - 1)
+    positions = order[slots]
+    return positions, ids[positions] == values
+
+
+def as_pairs(pairs):
+    """(n, 2) int64 array of (studentID, eventID) rows; fromiter skips the per-tuple parse np.array does"""
+    flat = np.fromiter(chain.from_iterable(pairs), dtype=np.int64, count=2 * len(pairs))
+    return flat.reshape(-1, 2)
+
+
+def build_matrix(student_ids, event_ids, registrations, attendance, walk_ins):
+    """
+    Pivots (studentID, eventID) pairs into an int8 students x events
+    matrix in the given row and column order. Later sources win: a walk-in
+    overrides a registration (the student registered after finalize), and
+    an Attendance row overrides both. Pairs outside the rows or columns
+    are ignored
+    """
+    students = np.asarray(student_ids, dtype=np.int64)
+    events = np.asarray(event_ids, dtype=np.int64)
+    matrix = np.full((len(students), len(events)), NOT_REGISTERED, dtype=np.int8)
+    for code, pairs in ((NO_SHOW, registrations), (WALK_IN, walk_ins), (ATTENDED, attendance)):
+        pairs = as_pairs(pairs)
+        rows, row_found = locate(students, pairs[:, 0])
+        cols, col_found = locate(events, pairs[:, 1])
+        found = row_found & col_found
+        matrix[rows[found], cols[found]] = code
+    return matrix
+
+
+def rate(numerator, denominator):
+    """Element-wise ratio rounded to 3 places, None where the denominator is 0"""
+    ratios = np.round(np.divide(
+        numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0), 3)
+    return [r if d else None for r, d in zip(ratios.tolist(), denominator.tolist())]
+
+
+def matrix_rates(matrix, axis):
+    """
+    Per-row (axis=1, students) or per-column (axis=0, events) counts and
+    rates. attendanceRate is attended plus walk-ins over every cell in the
+    row or column; showRate is attended over registered
+    """
+    attended = np.count_nonzero(matrix == ATTENDED, axis=axis)
+    no_shows = np.count_nonzero(matrix == NO_SHOW, axis=axis)
+    walk_ins = np.count_nonzero(matrix == WALK_IN, axis=axis)
+    registered = attended + no_shows
+    total = np.full(len(attended), matrix.shape[axis])
+    counts = {
+        "registered": registered.tolist(),
+        "attended": attended.tolist(),
+        "walkIns": walk_ins.tolist(),
+        "noShows": no_shows.tolist(),
+        "attendanceRate": rate(attended + walk_ins, total),
+        "showRate": rate(attended, registered)}
+    return [dict(zip(counts, values)) for values in zip(*counts.values())]
+
+
+def matrix_report(students, events, matrix):
+    """
+    Report body: `students` and `events` (row and column order) get their
+    counts and rates merged in, and `matrix` holds the cell codes
+    """
+    student_rates = matrix_rates(matrix, axis=1)
+    event_rates = matrix_rates(matrix, axis=0)
+    attended = int(np.count_nonzero(matrix == ATTENDED))
+    walk_ins = int(np.count_nonzero(matrix == WALK_IN))
+    registered = attended + int(np.count_nonzero(matrix == NO_SHOW))
+    return {
+        "statuses": STATUSES,
+        "students": [{**s, **r} for s, r in zip(students, student_rates)],
+        "events": [{**e, **r} for e, r in zip(events, event_rates)],
+        "matrix": matrix.tolist(),
+        "totals": {
+            "students": matrix.shape[0],
+            "events": matrix.shape[1],
+            "registered": registered,
+            "attended": attended,
+            "walkIns": walk_ins,
+            "noShows": registered - attended,
+            "attendanceRate": round((attended + walk_ins) / matrix.size, 3) if matrix.size else None,
+            "showRate": round(attended / registered, 3) if registered else None}}
@@ -0,0 +1,103 @@
+"""
+Group attendance matrix pivot at 1k students x 200 events: the vectorized
+build_matrix + matrix_report against the per-student dictionary pivot it
+replaces. Data is synthetic (about 40% of cells registered, 80% of those
+attended, 3% walk-ins), so only the pivot and rate math is measured; the
+database side is five bulk queries either way.
+
+Run from the project root:
+    python3 benchmarks/attendance_matrix_pivot.py
+"""
+import os
+import sys
+import json
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from attendance_matrix import build_matrix, matrix_report
+
+STUDENTS = 1000
+EVENTS = 200
+ITERATIONS = 20
+
+
+def synthetic():
+    rng = np.random.default_rng(7)
+    student_ids = rng.permutation(np.arange(1, STUDENTS + 1) * 3).tolist()
+    event_ids = (np.arange(1, EVENTS + 1) * 5).tolist()
+    cells = [(s, e) for s in student_ids for e in event_ids]
+    draw = rng.random(len(cells))
+    registrations = [c for c, d in zip(cells, draw) if d < 0.4]
+    attendance = [c for c, d in zip(cells, draw) if d < 0.32]
+    walk_ins = [c for c, d in zip(cells, draw) if 0.4 <= d < 0.43]
+    students = [{"studentID": s, "firstName": "S", "lastName": str(s)} for s in student_ids]
+    events = [{"eventID": e, "name": f"Event {e}", "date": "2026-01-01", "time": "18:00:00"} for e in event_ids]
+    return students, events, registrations, attendance, walk_ins
+
+
+def python_pivot(students, events, registrations, attendance, walk_ins):
+    status = {}
+    for pair in registrations:
+        status[pair] = "noShow"
+    for pair in walk_ins:
+        status[pair] = "walkIn"
+    for pair in attendance:
+        status[pair] = "attended"
+    rows, student_stats = [], []
+    event_counts = {e["eventID"]: {"attended": 0, "walkIns": 0, "registered": 0} for e in events}
+    for s in students:
+        row, counts = [], {"attended": 0, "walkIns": 0, "registered": 0}
+        for e in events:
+            cell = status.get((s["studentID"], e["eventID"]), "notRegistered")
+            row.append(cell)
+            for target in (counts, event_counts[e["eventID"]]):
+                target["attended"] += cell == "attended"
+                target["walkIns"] += cell == "walkIn"
+                target["registered"] += cell in ("attended", "noShow")
+        rows.append(row)
+        student_stats.append({
+            **s, **counts,
+            "attendanceRate": round((counts["attended"] + counts["walkIns"]) / len(events), 3),
+            "showRate": round(counts["attended"] / counts["registered"], 3) if counts["registered"] else None})
+    event_stats = [
+        {**e, **event_counts[e["eventID"]],
+         "attendanceRate": round((event_counts[e["eventID"]]["attended"] + event_counts[e["eventID"]]["walkIns"]) / len(students), 3)}
+        for e in events]
+    return {"students": student_stats, "events": event_stats, "matrix": rows}
+
+
+def vectorized(students, events, registrations, attendance, walk_ins):
+    matrix = build_matrix(
+        [s["studentID"] for s in students], [e["eventID"] for e in events],
+        registrations, attendance, walk_ins)
+    return matrix_report(students, events, matrix)
+
+
+def bench(label, run, data):
+    run(*data)
+    samples = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        report = run(*data)
+        samples.append(time.perf_counter() - start)
+    print(f"{label:<36} median {statistics.median(samples) * 1e3:8.1f} ms"
+          f"   max {max(samples) * 1e3:8.1f} ms")
+    return report
+
+
+if __name__ == "__main__":
+    data = synthetic()
+    print(f"{STUDENTS} students x {EVENTS} events, {len(data[2])} registrations, "
+          f"{len(data[3])} attendance rows, {len(data[4])} walk-ins")
+    before = bench("before: per-student dict pivot", python_pivot, data)
+    after = bench("after: vectorized pivot + rates", vectorized, data)
+    for b, a in zip(before["students"], after["students"]):
+        assert (b["attended"], b["walkIns"], b["registered"], b["attendanceRate"]) == \
+            (a["attended"], a["walkIns"], a["registered"], a["attendanceRate"]), (b, a)
+    start = time.perf_counter()
+    body = json.dumps(after)
+    print(f"{'JSON encoding (after)':<36} {(time.perf_counter() - start) * 1e3:8.1f} ms"
+          f"   {len(body) / 1e6:.1f} MB")
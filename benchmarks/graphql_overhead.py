@@ -0,0 +1,74 @@
+"""
+Resolver-free GraphQL overhead, before and after the document caches and
+persisted queries. The dashboard-sized document is parsed and validated
+in full, but only its `Ping { __typename }` operation is executed, so no
+resolver (and no database) is involved.
+
+Run from the project root (main.py needs secrets/ to import):
+    python3 benchmarks/graphql_overhead.py
+"""
+import os
+import sys
+import json
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import strawberry
+from graphql_schema import Query, Mutation, schema as cached_schema
+from persisted_queries import query_hash
+
+DOCUMENT = """
+query Ping { __typename }
+
+query Dashboard($eventId: Int!) {
+  students { studentID firstName lastName age email phoneNumber groupID guardians }
+  groups { groupID name members { studentID firstName lastName age groupID guardians } }
+  events(from: "2026-01-01", to: "2026-12-31") {
+    eventID name location date time customFields
+  }
+  liveAttendance(eventId: $eventId) {
+    eventID count checkedIn checkedInStudents { studentID name }
+  }
+  finalizedAttendance(eventId: $eventId) {
+    eventID status message totalRegistered totalWalkIns totalAttendees hasFinalizedData
+    registered { studentID firstName lastName isWalkIn }
+    walkIns { studentID firstName lastName isWalkIn }
+  }
+}
+"""
+ITERATIONS = 2000
+
+
+def bench(label, run):
+    for _ in range(50):
+        run()
+    samples = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        result = run()
+        samples.append(time.perf_counter() - start)
+    assert not result.errors, result.errors
+    print(f"{label:<36} median {statistics.median(samples) * 1e6:8.1f} us"
+          f"   p95 {sorted(samples)[int(len(samples) * 0.95)] * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    plain_schema = strawberry.Schema(query=Query, mutation=Mutation)
+    sha = query_hash(DOCUMENT)
+    persisted = {"persistedQuery": {"version": 1, "sha256Hash": sha}}
+    # Register the document once, as the first full-text request would
+    cached_schema.execute_sync(DOCUMENT, operation_name="Ping", operation_extensions=persisted)
+
+    bench("before: parse + validate every time",
+          lambda: plain_schema.execute_sync(DOCUMENT, operation_name="Ping"))
+    bench("after: cached parse/validation",
+          lambda: cached_schema.execute_sync(DOCUMENT, operation_name="Ping"))
+    bench("after: persisted query (hash only)",
+          lambda: cached_schema.execute_sync(
+              None, operation_name="Ping", operation_extensions=persisted))
+
+    full_body = json.dumps({"query": DOCUMENT, "operationName": "Ping"})
+    hash_body = json.dumps({"operationName": "Ping", "extensions": persisted})
+    print(f"request body: {len(full_body)} bytes full text vs {len(hash_body)} bytes hash only")
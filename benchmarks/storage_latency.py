@@ -0,0 +1,64 @@
+"""
+Per-endpoint latency of the configured storage backend, for comparing the
+embedded single-node mode with the three-store (MySQL, MongoDB Atlas,
+Redis Cloud) mode. Requests go through the full app in-process, so the
+numbers are server time without the client's network hop. The benchmark
+creates one event, checks students in and out of it, and deletes it again.
+
+Run from the project root once per backend:
+    python3 embedded.py --seed
+    STORAGE_BACKEND=embedded python3 benchmarks/storage_latency.py
+    python3 benchmarks/storage_latency.py
+"""
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("HOUSEKEEPING_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+import main
+
+ITERATIONS = 50
+
+
+def bench(client, *steps):
+    """
+    Runs the (label, method, url) steps in order ITERATIONS times, so state
+    changing pairs like check-in then check-out stay valid, and prints each
+    step's median and p95
+    """
+    samples = {label: [] for label, _, _ in steps}
+    for _ in range(ITERATIONS):
+        for label, method, url in steps:
+            start = time.perf_counter()
+            response = client.request(method, url)
+            samples[label].append(time.perf_counter() - start)
+            assert response.status_code < 400, (url, response.status_code, response.text)
+    for label, times in samples.items():
+        print(f"{label:<28} median {statistics.median(times) * 1e3:7.2f} ms"
+              f"   p95 {sorted(times)[int(len(times) * 0.95)] * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    with TestClient(main.app) as client:
+        print(f"storage backend: {main.STORAGE_BACKEND}, {ITERATIONS} requests each")
+        event = client.post("/events", json={
+            "name": "Latency Benchmark", "location": "Nowhere", "date": "2099-01-01",
+            "time": "12:00:00", "customFields": {"benchmark": True}}).json()
+        event_id = event["eventID"]
+        try:
+            bench(client, ("GET /students", "GET", "/students"))
+            bench(client, ("GET /events", "GET", "/events?include=customFields"))
+            bench(client, ("GET /events/{id}", "GET", f"/events/{event_id}"))
+            bench(client, ("GET /attendance/{student}", "GET", "/attendance/1"))
+            bench(client,
+                  ("POST checkin", "POST", f"/events/{event_id}/checkin/1"),
+                  ("GET /events/{id}/live", "GET", f"/events/{event_id}/live"),
+                  ("GET /live", "GET", "/live"),
+                  ("POST checkout", "POST", f"/events/{event_id}/checkout/1"))
+            bench(client, ("GET /groups/{id}/matrix", "GET", "/groups/1/attendance-matrix?from=2026-01-01"))
+        finally:
+            client.delete(f"/events/{event_id}")
@@ -0,0 +1,876 @@
+import os
+import re
+import sys
+import json
+import time
+import fnmatch
+import sqlite3
+import argparse
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+import mysql.connector
+import pymongo.errors
+from pymongo import DeleteMany, InsertOne, UpdateOne
+from redis.exceptions import ResponseError, WatchError
+from housekeeping import WALK_INS_UNIQUE_INDEX
+
+SQL_FILE = "youth_group.sqlite3"
+DOCUMENTS_FILE = "documents.sqlite3"
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+
+
+def convert(parse):
+    def converter(raw):
+        try:
+            return parse(raw.decode())
+        except ValueError:
+            return raw.decode()
+    return converter
+
+
+# DATE and DATETIME columns come back as date/datetime, as mysql.connector returns them
+sqlite3.register_converter("DATE", convert(date.fromisoformat))
+sqlite3.register_converter("DATETIME", convert(datetime.fromisoformat))
+
+# --------------------------
+# RELATIONAL (SQLite)
+# --------------------------
+_NESTED = r"((?:[^(),]|\([^()]*\))+)"
+_TIMESTAMPDIFF = re.compile(rf"TIMESTAMPDIFF\(SECOND,\s*{_NESTED},\s*{_NESTED}\)")
+LOCAL_NOW = "datetime('now', 'localtime')"
+
+
+@lru_cache(maxsize=1024)
+def translate(sql: str) -> str:
+    """Rewrites the MySQL dialect this app uses into SQLite"""
+    stripped = sql.strip()
+    if stripped.upper().startswith("SHOW TABLES"):
+        return "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    if stripped.upper().startswith("EXPLAIN "):
+        stripped = "EXPLAIN QUERY PLAN " + stripped[len("EXPLAIN "):]
+    stripped = _TIMESTAMPDIFF.sub(r"CAST((julianday(\2) - julianday(\1)) * 86400 AS INTEGER)", stripped)
+    return (stripped
+            .replace("%s", "?")
+            .replace("NOW()", LOCAL_NOW)
+            .replace("INSERT IGNORE", "INSERT OR IGNORE"))
+
+
+def split_statements(script):
+    """Splits a SQL script on semicolons outside quotes, dropping -- comment lines"""
+    lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+    statements, current, quote = [], [], None
+    for ch in "\n".join(lines):
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "'\"`":
+            quote = ch
+        elif ch == ";":
+            statements.append("".join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    statements.append("".join(current).strip())
+    return [s for s in statements if s]
+
+
+def split_columns(body):
+    items, depth, current = [], 0, []
+    for ch in body:
+        depth += (ch == "(") - (ch == ")")
+        if ch == "," and depth == 0:
+            items.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    items.append("".join(current).strip())
+    return [item for item in items if item]
+
+
+def sqlite_table(statement):
+    name, body = re.match(r"CREATE TABLE\s+(\w+)\s*\((.*)\)\s*$", statement, re.S).groups()
+    items = split_columns(body)
+    auto = {m.group(1) for m in (re.match(r"(\w+)\s+(?:BIG)?INT\s+AUTO_INCREMENT", i) for i in items) if m}
+    columns = []
+    for item in items:
+        key = re.fullmatch(r"PRIMARY KEY\s*\((\w+)\)", item)
+        if key and key.group(1) in auto:
+            continue
+        item = re.sub(r"^(\w+)\s+(?:BIG)?INT\s+AUTO_INCREMENT", r"\1 INTEGER PRIMARY KEY AUTOINCREMENT", item)
+        item = re.sub(r"\bJSON\b", "TEXT", item)
+        item = item.replace("DEFAULT CURRENT_TIMESTAMP", f"DEFAULT ({LOCAL_NOW})")
+        columns.append(item)
+    return f"CREATE TABLE {name} (\n    " + ",\n    ".join(columns) + "\n)"
+
+
+def sqlite_script(script):
+    """
+    Translates schema.sql/data.sql into SQLite statements. AUTO_INCREMENT
+    keys become INTEGER PRIMARY KEY AUTOINCREMENT, triggers get a
+    BEGIN/END body, and SET @var values are substituted where used.
+    ALTER TABLE is skipped: SQLite can't add constraints afterwards
+    """
+    variables = {}
+    statements = []
+    for statement in split_statements(script):
+        upper = statement.upper()
+        if upper.startswith(("DROP DATABASE", "CREATE DATABASE", "USE ", "ALTER TABLE")):
+            continue
+        assignment = re.fullmatch(r"SET\s+@(\w+)\s*=\s*(.+)", statement, re.S)
+        if assignment:
+            variables[assignment.group(1)] = assignment.group(2).strip()
+            continue
+        if upper.startswith("CREATE TABLE"):
+            statement = sqlite_table(statement)
+        elif upper.startswith("CREATE TRIGGER"):
+            statement = re.sub(r"FOR EACH ROW\s+(.*)$", r"FOR EACH ROW BEGIN \1; END", statement, flags=re.S)
+        statement = re.sub(r"@(\w+)", lambda m: variables.get(m.group(1), m.group(0)), statement)
+        statements.append(statement)
+    return statements
+
+
+def mysql_error(error):
+    """The mysql.connector error a MySQL server would have raised for a sqlite3 error"""
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        return mysql.connector.errors.IntegrityError(msg=message)
+    if isinstance(error, sqlite3.OperationalError):
+        if "locked" in message or "busy" in message:
+            return mysql.connector.errors.OperationalError(msg=message)
+        return mysql.connector.errors.ProgrammingError(msg=message)
+    return mysql.connector.errors.DatabaseError(msg=message)
+
+
+class NamedLocks:
+    """GET_LOCK/RELEASE_LOCK across the SQLite connections of one process"""
+
+    def __init__(self):
+        self.owners = {}
+        self.changed = threading.Condition()
+
+    def acquire(self, owner, name, timeout):
+        deadline = None if timeout is not None and timeout < 0 else time.monotonic() + (timeout or 0)
+        with self.changed:
+            while self.owners.get(name, owner) != owner:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return 0
+                self.changed.wait(remaining)
+            self.owners[name] = owner
+            return 1
+
+    def release(self, owner, name):
+        with self.changed:
+            if name not in self.owners:
+                return None
+            if self.owners[name] != owner:
+                return 0
+            del self.owners[name]
+            self.changed.notify_all()
+            return 1
+
+    def release_all(self, owner):
+        with self.changed:
+            for name in [n for n, o in self.owners.items() if o == owner]:
+                del self.owners[name]
+            self.changed.notify_all()
+
+
+class SQLiteCursor:
+    """mysql.connector-style cursor; dictionary=True returns rows as dicts"""
+
+    def __init__(self, cursor, dictionary):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        try:
+            self._cursor.execute(translate(sql), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise mysql_error(e) from e
+
+    def executemany(self, sql, seq_params):
+        try:
+            self._cursor.executemany(translate(sql), [tuple(p) for p in seq_params])
+        except sqlite3.Error as e:
+            raise mysql_error(e) from e
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """mysql.connector-style connection to the embedded database"""
+
+    def __init__(self, database):
+        self._locks = database.locks
+        self._conn = sqlite3.connect(
+            database.path, timeout=database.busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.create_function("CONCAT", -1, lambda *parts: "".join(str(p) for p in parts))
+        self._conn.create_function("GET_LOCK", 2, lambda name, timeout: self._locks.acquire(id(self), name, timeout))
+        self._conn.create_function("RELEASE_LOCK", 1, lambda name: self._locks.release(id(self), name))
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._locks.release_all(id(self))
+        self._conn.close()
+
+
+class SQLiteDatabase:
+    """
+    The relational tables in one SQLite file (WAL mode, so reads don't
+    wait for a writer). Connections speak the MySQL dialect this app
+    uses and raise mysql.connector errors, so callers need no changes
+    """
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.locks = NamedLocks()
+
+    def initialize(self, schema_path):
+        """Creates the tables from schema.sql when the file is new; returns whether it was"""
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            if conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'").fetchone()[0]:
+                return False
+            with open(schema_path) as f:
+                for statement in sqlite_script(f.read()):
+                    conn.execute(statement)
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def run_script(self, path):
+        conn = sqlite3.connect(self.path)
+        try:
+            with open(path) as f:
+                for statement in sqlite_script(f.read()):
+                    conn.execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self):
+        return SQLiteConnection(self)
+
+    def usage(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+            return {
+                "fileBytes": file_size(self.path) + file_size(self.path + "-wal"),
+                "tables": [
+                    {"name": t, "rows": conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0]}
+                    for t in tables]}
+        finally:
+            conn.close()
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+# --------------------------
+# DOCUMENTS
+# --------------------------
+MISSING = object()
+
+
+def encode(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode(obj):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def resolve(doc, path):
+    """Values a dotted path matches: the value itself, plus its elements when it is an array"""
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return []
+        value = value[part]
+    return [value] + value if isinstance(value, list) else [value]
+
+
+def same(a, b):
+    # Mongo doesn't treat true as 1
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    return a == b
+
+
+def compare(values, arg, op):
+    for value in values:
+        if isinstance(value, bool) != isinstance(arg, bool):
+            continue
+        try:
+            if op(value, arg):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+OPERATORS = {
+    "$eq": lambda values, arg: any(same(v, arg) for v in values),
+    "$ne": lambda values, arg: not any(same(v, arg) for v in values),
+    "$in": lambda values, arg: any(same(v, a) for v in values for a in arg) or (not values and None in arg),
+    "$nin": lambda values, arg: not (any(same(v, a) for v in values for a in arg) or (not values and None in arg)),
+    "$gt": lambda values, arg: compare(values, arg, lambda v, a: v > a),
+    "$gte": lambda values, arg: compare(values, arg, lambda v, a: v >= a),
+    "$lt": lambda values, arg: compare(values, arg, lambda v, a: v < a),
+    "$lte": lambda values, arg: compare(values, arg, lambda v, a: v <= a),
+    "$exists": lambda values, arg: bool(values) == bool(arg),
+}
+
+
+def matches(doc, query):
+    """Whether a document matches a filter of {path: value | {operator: value}}"""
+    for path, condition in (query or {}).items():
+        values = resolve(doc, path)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            for op, arg in condition.items():
+                if op not in OPERATORS:
+                    raise pymongo.errors.OperationFailure(f"unknown operator: {op}")
+                if not OPERATORS[op](values, arg):
+                    return False
+        elif not OPERATORS["$eq"](values, condition):
+            return False
+    return True
+
+
+def project(doc, projection):
+    if not projection:
+        return doc
+    included = [k for k, v in projection.items() if v and k != "_id"]
+    if included:
+        result = {k: doc[k] for k in included if k in doc}
+        if projection.get("_id", 1):
+            result["_id"] = doc["_id"]
+        return result
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+def sort_key(value):
+    # None (and missing) sorts first, like Mongo's null
+    return (0, 0) if value is None or value is MISSING else (1, value)
+
+
+def set_path(doc, path, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+class DocumentCollection:
+    """
+    One collection of the DocumentStore. eventID lives in an indexed
+    column, so eventID equality and $in filters are answered by SQLite;
+    the rest of a filter is matched in Python
+    """
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def candidates(self, query):
+        sql = "SELECT id, body FROM documents WHERE collection=?"
+        params = [self.name]
+        event_filter = (query or {}).get("eventID", MISSING)
+        if isinstance(event_filter, int) and not isinstance(event_filter, bool):
+            sql += " AND eventID=?"
+            params.append(event_filter)
+        elif isinstance(event_filter, dict) and set(event_filter) == {"$in"}:
+            ids = [i for i in event_filter["$in"] if isinstance(i, int)]
+            if not ids:
+                return []
+            sql += f" AND eventID IN ({','.join(['?'] * len(ids))})"
+            params.extend(ids)
+        docs = []
+        for doc_id, body in self.store.conn.execute(sql + " ORDER BY id", params):
+            doc = json.loads(body, object_hook=decode)
+            doc["_id"] = doc_id
+            if matches(doc, query):
+                docs.append(doc)
+        return docs
+
+    def find(self, filter=None, projection=None, sort=None):
+        with self.store.lock:
+            docs = self.candidates(filter)
+        for key, direction in reversed(sort or []):
+            docs.sort(key=lambda d: sort_key(next(iter(resolve(d, key)), None)), reverse=direction < 0)
+        return [project(doc, projection) for doc in docs]
+
+    def store_doc(self, doc, doc_id=None):
+        doc = {k: v for k, v in doc.items() if k != "_id"}
+        self.check_unique(doc, doc_id)
+        body = json.dumps(doc, default=encode)
+        event_id = doc.get("eventID") if isinstance(doc.get("eventID"), int) else None
+        if doc_id is None:
+            return self.store.conn.execute(
+                "INSERT INTO documents (collection, eventID, body) VALUES (?, ?, ?)",
+                (self.name, event_id, body)).lastrowid
+        self.store.conn.execute(
+            "UPDATE documents SET eventID=?, body=? WHERE id=?", (event_id, body, doc_id))
+        return doc_id
+
+    def check_unique(self, doc, doc_id):
+        for index in self.store.indexes(self.name).values():
+            if not index["unique"]:
+                continue
+            key = {field: next(iter(resolve(doc, field)), None) for field, _ in index["key"]}
+            if any(existing["_id"] != doc_id for existing in self.candidates(key)):
+                raise pymongo.errors.DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: {index['name']} dup key: {key}")
+
+    def insert_many(self, docs):
+        with self.store.lock, self.store.conn:
+            for doc in docs:
+                doc["_id"] = self.store_doc(doc)
+
+    def delete_many(self, filter):
+        with self.store.lock, self.store.conn:
+            self.delete(filter)
+
+    def delete(self, filter):
+        ids = [doc["_id"] for doc in self.candidates(filter)]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            self.store.conn.execute(f"DELETE FROM documents WHERE id IN ({','.join(['?'] * len(chunk))})", chunk)
+
+    def update_one(self, filter, update, upsert=False):
+        unknown = set(update) - {"$set"}
+        if unknown:
+            raise pymongo.errors.OperationFailure(f"unsupported update operator(s): {sorted(unknown)}")
+        existing = self.candidates(filter)
+        if existing:
+            doc = existing[0]
+        elif upsert:
+            doc = {k: v for k, v in filter.items() if not isinstance(v, dict)}
+        else:
+            return
+        for path, value in update.get("$set", {}).items():
+            set_path(doc, path, value)
+        self.store_doc(doc, doc.get("_id"))
+
+    def bulk_write(self, requests, ordered=True):
+        """Applies UpdateOne/DeleteMany/InsertOne requests in one SQLite transaction"""
+        with self.store.lock, self.store.conn:
+            for request in requests:
+                # pymongo's write models keep their arguments in these attributes
+                if isinstance(request, InsertOne):
+                    self.store_doc(request._doc)
+                elif isinstance(request, UpdateOne):
+                    self.update_one(request._filter, request._doc, upsert=bool(request._upsert))
+                elif isinstance(request, DeleteMany):
+                    self.delete(request._filter)
+                else:
+                    raise TypeError(f"Unsupported bulk write request {type(request).__name__}")
+
+    def create_index(self, keys, unique=False, name=None):
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        with self.store.lock, self.store.conn:
+            self.store.conn.execute(
+                "INSERT OR REPLACE INTO indexes (collection, name, spec, isUnique) VALUES (?, ?, ?, ?)",
+                (self.name, name, json.dumps(keys), int(unique)))
+        return name
+
+    def index_information(self):
+        with self.store.lock:
+            return {name: {"key": index["key"], "unique": index["unique"]}
+                    for name, index in self.store.indexes(self.name).items()}
+
+
+class DocumentStore:
+    """
+    Single-node stand-in for the MongoDB database: JSON documents in a
+    SQLite file, supporting the find, projection, sort and bulk_write
+    subset this app uses. Indexes are recorded (unique ones are enforced)
+    but only eventID is indexed for lookups, which is plenty at one
+    site's scale
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    collection TEXT NOT NULL,
+                    eventID INTEGER,
+                    body TEXT NOT NULL)
+            """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_documents_event ON documents (collection, eventID)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS indexes (
+                    collection TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    spec TEXT NOT NULL,
+                    isUnique INTEGER NOT NULL,
+                    PRIMARY KEY (collection, name))
+            """)
+
+    def __getitem__(self, name):
+        return DocumentCollection(self, name)
+
+    def indexes(self, collection):
+        rows = self.conn.execute(
+            "SELECT name, spec, isUnique FROM indexes WHERE collection=?", (collection,))
+        return {name: {"name": name, "key": [tuple(k) for k in json.loads(spec)], "unique": bool(unique)}
+                for name, spec, unique in rows}
+
+    def usage(self):
+        with self.lock:
+            counts = dict(self.conn.execute(
+                "SELECT collection, COUNT(*) FROM documents GROUP BY collection").fetchall())
+        return {"fileBytes": file_size(self.path) + file_size(self.path + "-wal"), "documents": counts}
+
+    def close(self):
+        self.conn.close()
+
+# --------------------------
+# LIVE SETS (in-process)
+# --------------------------
+class LocalPipeline:
+    """
+    Queues commands and runs them under the store lock, so a pipeline is
+    atomic like MULTI/EXEC. After watch() commands run right away until
+    multi(), and execute() raises WatchError if a watched key was written
+    in between, as with redis-py
+    """
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+        self._watched = None
+        self._immediate = False
+
+    def watch(self, *keys):
+        with self._redis.lock:
+            self._watched = {key: self._redis.version(key) for key in keys}
+        self._immediate = True
+        return True
+
+    def multi(self):
+        self._immediate = False
+
+    def reset(self):
+        self._commands, self._watched, self._immediate = [], None, False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.reset()
+
+    def __getattr__(self, name):
+        method = getattr(self._redis, name)
+        if self._immediate:
+            return method
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        commands, watched = self._commands, self._watched
+        self.reset()
+        with self._redis.lock:
+            if watched and any(self._redis.version(key) != version for key, version in watched.items()):
+                raise WatchError("Watched variable changed.")
+            return [method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+# Python equivalents of the Lua scripts the app EVALs, keyed by script source
+LOCAL_SCRIPTS = {}
+
+
+def local_script(source):
+    """Registers the decorated fn(redis, keys, args) as LocalRedis's stand-in for a Lua script"""
+    def register(fn):
+        LOCAL_SCRIPTS[source] = fn
+        return fn
+    return register
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the Redis commands the live attendance code
+    and event read model use: strings, sets, hashes, key expiry, SCAN and
+    pipelines with WATCH and EVAL of scripts registered with local_script,
+    with redis-py's return values (decode_responses=True). State is in
+    memory only, so live check-ins don't survive a restart
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        # Bumped on every write to a key, for WATCH
+        self.versions = {}
+        self.lock = threading.RLock()
+
+    def _get(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+            self._touch(key)
+        return self.data.get(key)
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _set_members(self, key, members):
+        self._touch(key)
+        if members:
+            self.data[key] = members
+        else:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+    def version(self, key):
+        with self.lock:
+            self._get(key)
+            return self.versions.get(key, 0)
+
+    def pipeline(self, transaction=True):
+        return LocalPipeline(self)
+
+    def eval(self, script, numkeys, *keys_and_args):
+        """Runs a script's registered Python equivalent under the lock, so it is atomic like EVAL"""
+        fn = LOCAL_SCRIPTS.get(script)
+        if fn is None:
+            raise ResponseError("NOSCRIPT No local equivalent registered for this script")
+        with self.lock:
+            return fn(self, list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:]))
+
+    def ping(self):
+        return True
+
+    def exists(self, *keys):
+        with self.lock:
+            return sum(self._get(key) is not None for key in keys)
+
+    def delete(self, *keys):
+        with self.lock:
+            deleted = 0
+            for key in keys:
+                if self._get(key) is not None:
+                    deleted += 1
+                    self._set_members(key, None)
+            return deleted
+
+    def expire(self, key, seconds):
+        with self.lock:
+            if self._get(key) is None:
+                return False
+            self.expires[key] = time.monotonic() + seconds
+            self._touch(key)
+            return True
+
+    def ttl(self, key):
+        with self.lock:
+            if self._get(key) is None:
+                return -2
+            expires = self.expires.get(key)
+            return -1 if expires is None else max(0, round(expires - time.monotonic()))
+
+    def pexpire(self, key, milliseconds):
+        return self.expire(key, milliseconds / 1000)
+
+    def pttl(self, key):
+        with self.lock:
+            if self._get(key) is None:
+                return -2
+            expires = self.expires.get(key)
+            return -1 if expires is None else max(0, round((expires - time.monotonic()) * 1000))
+
+    def persist(self, key):
+        with self.lock:
+            if self._get(key) is None or self.expires.pop(key, None) is None:
+                return False
+            self._touch(key)
+            return True
+
+    def type(self, key):
+        with self.lock:
+            value = self._get(key)
+            if value is None:
+                return "none"
+            return {set: "set", dict: "hash"}.get(type(value), "string")
+
+    def sadd(self, key, *members):
+        with self.lock:
+            current = self._get(key) or set()
+            added = {str(m) for m in members} - current
+            self._set_members(key, current | added)
+            return len(added)
+
+    def srem(self, key, *members):
+        with self.lock:
+            current = self._get(key) or set()
+            removed = current & {str(m) for m in members}
+            self._set_members(key, current - removed)
+            return len(removed)
+
+    def smembers(self, key):
+        with self.lock:
+            return set(self._get(key) or ())
+
+    def scard(self, key):
+        with self.lock:
+            return len(self._get(key) or ())
+
+    def sismember(self, key, member):
+        with self.lock:
+            return str(member) in (self._get(key) or ())
+
+    def get(self, key):
+        with self.lock:
+            return self._get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        with self.lock:
+            if nx and self._get(key) is not None:
+                return None
+            self.expires.pop(key, None)
+            self.data[key] = str(value)
+            self._touch(key)
+            if ex is not None:
+                self.expires[key] = time.monotonic() + ex
+            return True
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        with self.lock:
+            current = dict(self._get(key) or {})
+            updates = dict(mapping or {})
+            if field is not None:
+                updates[field] = value
+            added = len(set(updates) - set(current))
+            current.update({str(f): str(v) for f, v in updates.items()})
+            self._set_members(key, current)
+            return added
+
+    def hgetall(self, key):
+        with self.lock:
+            return dict(self._get(key) or {})
+
+    def sunionstore(self, dest, keys, *args):
+        with self.lock:
+            union = set()
+            for key in ([keys] if isinstance(keys, str) else list(keys)) + list(args):
+                union |= self._get(key) or set()
+            self.expires.pop(dest, None)
+            self._set_members(dest, union)
+            return len(union)
+
+    def scan(self, cursor=0, match=None, count=None):
+        """Pages through a sorted snapshot of the keys; the cursor is an offset into it"""
+        with self.lock:
+            keys = sorted(k for k in list(self.data) if self._get(k) is not None)
+        if match:
+            keys = [k for k in keys if fnmatch.fnmatchcase(k, match)]
+        cursor, count = int(cursor), count or 10
+        page = keys[cursor:cursor + count]
+        return (cursor + count if cursor + count < len(keys) else 0), page
+
+    def dbsize(self):
+        with self.lock:
+            return sum(self._get(k) is not None for k in list(self.data))
+
+    def info(self, section=None):
+        with self.lock:
+            used = sum(
+                sys.getsizeof(k) + (sys.getsizeof(v) if isinstance(v, str) else
+                                    sum(sys.getsizeof(m) for m in (v.items() if isinstance(v, dict) else v)))
+                for k, v in self.data.items())
+        return {"used_memory": used, "used_memory_peak": None, "maxmemory": 0}
+
+    def close(self):
+        pass
+
+
+def open_stores(data_dir, schema_path="schema.sql"):
+    """Returns (SQLiteDatabase, DocumentStore, LocalRedis) for `data_dir`, creating the tables on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    database = SQLiteDatabase(os.path.join(data_dir, SQL_FILE))
+    database.initialize(schema_path)
+    documents = DocumentStore(os.path.join(data_dir, DOCUMENTS_FILE))
+    # Unique from the start, so compact_walk_ins never has duplicates to remove
+    documents["walk_ins"].create_index(
+        [("eventID", 1), ("studentID", 1)], unique=True, name=WALK_INS_UNIQUE_INDEX)
+    return database, documents, LocalRedis()
+
+
+if __name__ == "__main__":
+    from setup_mongo import SAMPLE_EVENT_DATA, ensure_indexes
+
+    parser = argparse.ArgumentParser(description="Create (and optionally seed) the embedded single-node stores")
+    parser.add_argument("--data-dir", default=os.getenv("EMBEDDED_DATA_DIR", "data"))
+    parser.add_argument("--seed", action="store_true", help="load data.sql and the sample customFields")
+    args = parser.parse_args()
+    database, documents, _ = open_stores(args.data_dir)
+    ensure_indexes(documents)
+    if args.seed:
+        database.run_script("data.sql")
+        documents["event_data"].delete_many({})
+        documents["event_data"].insert_many([dict(doc) for doc in SAMPLE_EVENT_DATA])
+    print(f"Embedded stores ready in {args.data_dir}: {database.usage()['tables']}")
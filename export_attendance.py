@@ -0,0 +1,165 @@
+import io
+import csv
+import argparse
+from pymongo import MongoClient
+
+COLUMNS = [
+    "eventID", "eventName", "eventDate", "eventTime",
+    "studentID", "firstName", "lastName",
+    "attendanceType", "checkInTime", "checkOutTime"]
+
+
+def iter_attendance_rows(connect, mongo, event_batch_size=100):
+    """
+    Yields every attendance record (registered from MySQL Attendance,
+    walk-ins from MongoDB walk_ins) in event order. Events are streamed
+    from an unbuffered cursor and their attendance is fetched a batch of
+    events at a time, so memory stays flat no matter how long the history is
+    """
+    events_db = connect()
+    rows_db = connect()
+    events_cur = events_db.cursor(dictionary=True)
+    rows_cur = rows_db.cursor(dictionary=True)
+    try:
+        events_cur.execute("""
+            SELECT eventID, name, date, CAST(time AS CHAR) AS time
+            FROM Event ORDER BY date, time, eventID
+        """)
+        while True:
+            events = events_cur.fetchmany(event_batch_size)
+            if not events:
+                break
+            event_ids = [e["eventID"] for e in events]
+            placeholders = ','.join(['%s'] * len(event_ids))
+            rows_cur.execute(f"""
+                SELECT a.eventID, a.studentID, s.firstName, s.lastName,
+                       a.checkInTime, a.checkOutTime
+                FROM Attendance a
+                JOIN Student s ON a.studentID = s.studentID
+                WHERE a.eventID IN ({placeholders})
+                ORDER BY a.eventID, a.checkInTime, a.studentID
+            """, tuple(event_ids))
+            registered = {}
+            for row in rows_cur.fetchall():
+                registered.setdefault(row["eventID"], []).append(row)
+
+            # Keep the earliest walk-in per student, as the finalized view does
+            walk_ins = {}
+            for w in mongo["walk_ins"].find(
+                    {"eventID": {"$in": event_ids}},
+                    {"_id": 0, "eventID": 1, "studentID": 1, "checkInTime": 1},
+                    sort=[("eventID", 1), ("checkInTime", 1)]):
+                walk_ins.setdefault(w["eventID"], {}).setdefault(w["studentID"], w)
+            names = {}
+            walk_in_ids = sorted({sid for per_event in walk_ins.values() for sid in per_event})
+            if walk_in_ids:
+                placeholders = ','.join(['%s'] * len(walk_in_ids))
+                rows_cur.execute(
+                    f"SELECT studentID, firstName, lastName FROM Student WHERE studentID IN ({placeholders})",
+                    tuple(walk_in_ids))
+                names = {s["studentID"]: s for s in rows_cur.fetchall()}
+
+            for e in events:
+                base = {
+                    "eventID": e["eventID"],
+                    "eventName": e["name"],
+                    "eventDate": str(e["date"]),
+                    "eventTime": e["time"]}
+                for row in registered.get(e["eventID"], []):
+                    yield {
+                        **base,
+                        "studentID": row["studentID"],
+                        "firstName": row["firstName"],
+                        "lastName": row["lastName"],
+                        "attendanceType": "registered",
+                        "checkInTime": str(row["checkInTime"]) if row["checkInTime"] else None,
+                        "checkOutTime": str(row["checkOutTime"]) if row["checkOutTime"] else None}
+                for sid, w in walk_ins.get(e["eventID"], {}).items():
+                    student = names.get(sid, {})
+                    yield {
+                        **base,
+                        "studentID": sid,
+                        "firstName": student.get("firstName", "Unknown"),
+                        "lastName": student.get("lastName", ""),
+                        "attendanceType": "walk_in",
+                        "checkInTime": str(w["checkInTime"]) if w.get("checkInTime") else None,
+                        "checkOutTime": None}
+    finally:
+        events_cur.close()
+        rows_cur.close()
+        events_db.close()
+        rows_db.close()
+
+
+def iter_batches(rows, batch_size):
+    """Groups a row iterator into lists of at most batch_size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv_chunks(rows, batch_size=1000):
+    """Yields CSV text (header first) a batch of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    for batch in iter_batches(rows, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+def write_parquet(rows, sink, batch_size=10000):
+    """
+    Writes rows to a Parquet file (path or binary file object), one row
+    group per batch. Requires the optional pyarrow package
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("eventID", pa.int64()),
+        ("eventName", pa.string()),
+        ("eventDate", pa.string()),
+        ("eventTime", pa.string()),
+        ("studentID", pa.int64()),
+        ("firstName", pa.string()),
+        ("lastName", pa.string()),
+        ("attendanceType", pa.string()),
+        ("checkInTime", pa.string()),
+        ("checkOutTime", pa.string())])
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in iter_batches(rows, batch_size):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+if __name__ == "__main__":
+    from main import mysql_connect, load_secret
+
+    parser = argparse.ArgumentParser(description="Export attendance across all events")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", required=True, help="destination file path")
+    parser.add_argument("--event-batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    mongo_client = MongoClient(
+        load_secret("mongo_url"),
+        tls=True,
+        tlsAllowInvalidCertificates=True)
+    rows = iter_attendance_rows(mysql_connect, mongo_client["youth_group"], args.event_batch_size)
+    print(f"Exporting attendance to {args.output}...")
+    if args.format == "csv":
+        with open(args.output, "w", newline="") as f:
+            for chunk in iter_csv_chunks(rows):
+                f.write(chunk)
+    else:
+        write_parquet(rows, args.output)
+    mongo_client.close()
+    print("Export complete.")
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    OperationType,
+    get_operation_ast,
+    parse,
+    print_ast,
+    value_from_ast_untyped,
+)
+from strawberry.extensions import SchemaExtension
+
+
+def cache_hint(max_age: int, *tags: str) -> dict:
+    """
+    Field metadata making a Query field cacheable for max_age seconds.
+    Tags name the entity types the field reads; "{argName}" in a tag is
+    filled from the field's arguments (e.g. "LiveAttendance:{eventId}")
+    """
+    return {"cache_max_age": max_age, "cache_tags": tags}
+
+
+def invalidates(*tags: str) -> dict:
+    """Field metadata listing the cache tags a Mutation field evicts"""
+    return {"cache_invalidates": tags}
+
+
+class ResponseCacheStore:
+    """Bounded LRU of GraphQL response data with expiry and a tag index"""
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.tag_index = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, data, max_age, tags):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.monotonic() + max_age, data, tags)
+            for tag in tags:
+                self.tag_index.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self._drop(next(iter(self.entries)))
+
+    def invalidate(self, tags):
+        with self.lock:
+            keys = set()
+            for tag in tags:
+                keys |= self.tag_index.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            self.evictions += len(keys)
+            return len(keys)
+
+    def _drop(self, key):
+        _, _, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "maxSize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidated": self.evictions}
+
+
+response_cache = ResponseCacheStore(int(os.getenv("GRAPHQL_RESPONSE_CACHE_SIZE", "1000")))
+
+
+def invalidate_tags(*tags):
+    """Evicts cached responses tagged with any of the given tags"""
+    return response_cache.invalidate(tags)
+
+
+@lru_cache(maxsize=256)
+def normalized_document(query: str) -> str:
+    # Whitespace, comments and formatting do not change the cache key
+    return print_ast(parse(query))
+
+
+def root_fields(operation, document):
+    """Yields the top-level FieldNodes of an operation, expanding fragments"""
+    fragments = {
+        d.name.value: d for d in document.definitions
+        if d.kind == "fragment_definition"}
+    pending = list(operation.selection_set.selections)
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, FieldNode):
+            yield node
+        elif isinstance(node, InlineFragmentNode):
+            pending.extend(node.selection_set.selections)
+        elif isinstance(node, FragmentSpreadNode) and node.name.value in fragments:
+            pending.extend(fragments[node.name.value].selection_set.selections)
+
+
+def resolve_tags(templates, node, variables):
+    arguments = {
+        arg.name.value: value_from_ast_untyped(arg.value, variables)
+        for arg in node.arguments or ()}
+    tags = set()
+    for template in templates:
+        try:
+            tags.add(template.format(**arguments))
+        except (KeyError, IndexError):
+            tags.add(template.split(":")[0])
+    return tags
+
+
+_field_metadata = {}
+
+
+class ResponseCache(SchemaExtension):
+    """
+    Caches query results keyed by the normalized operation and its
+    variables. A query is only cached when every top-level field carries a
+    cache_hint; the shortest max_age wins and the entry is tagged with the
+    entity types its fields read. Mutations evict entries whose tags
+    overlap their `invalidates` metadata
+    """
+
+    def field_metadata(self, type_name):
+        schema = self.execution_context.schema
+        if (id(schema), type_name) not in _field_metadata:
+            definition = schema.get_type_by_name(type_name)
+            get_name = schema.config.name_converter.get_graphql_name
+            _field_metadata[(id(schema), type_name)] = {
+                get_name(f): f.metadata or {} for f in definition.fields}
+        return _field_metadata[(id(schema), type_name)]
+
+    def on_execute(self):
+        execution_context = self.execution_context
+        document = execution_context.graphql_document
+        operation = get_operation_ast(document, execution_context.operation_name) if document else None
+        if operation is None or operation.operation not in (OperationType.QUERY, OperationType.MUTATION):
+            yield
+            return
+        variables = execution_context.variables or {}
+        fields = list(root_fields(operation, document))
+
+        if operation.operation == OperationType.MUTATION:
+            yield
+            # Evict even when some fields errored: earlier writes may have landed
+            metadata = self.field_metadata("Mutation")
+            tags = set()
+            for node in fields:
+                templates = metadata.get(node.name.value, {}).get("cache_invalidates", ())
+                tags |= resolve_tags(templates, node, variables)
+            if tags:
+                response_cache.invalidate(tags)
+            return
+
+        metadata = self.field_metadata("Query")
+        max_age, tags = None, set()
+        for node in fields:
+            if node.name.value == "__typename":
+                continue
+            hint = metadata.get(node.name.value, {})
+            if not hint.get("cache_max_age"):
+                max_age = None
+                break
+            max_age = hint["cache_max_age"] if max_age is None else min(max_age, hint["cache_max_age"])
+            tags |= resolve_tags(hint["cache_tags"], node, variables)
+        if not max_age:
+            yield
+            return
+
+        key = hashlib.sha256(json.dumps(
+            [normalized_document(execution_context.query), execution_context.operation_name, variables],
+            sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        cached = response_cache.get(key)
+        if cached is not None:
+            execution_context.result = ExecutionResult(data=cached, errors=None)
+            yield
+            return
+        yield
+        result = execution_context.result
+        if result is not None and not result.errors and result.data is not None:
+            response_cache.put(key, result.data, max_age, tags)
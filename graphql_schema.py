@@ -1,7 +1,11 @@
+import os
 import strawberry
 import datetime
-from typing import Optional, List
+from typing import Optional, List, Annotated
 from strawberry.scalars import JSON
+from strawberry.types import Info
+from strawberry.extensions import ParserCache, ValidationCache
+from graphql import GraphQLError
 from fastapi import HTTPException
 
 from main import (
@@ -15,9 +19,16 @@ from main import (
     check_in,
     check_out,
     live_attendance,
-    finalize_event,
+    live_overview,
+    submit_finalize,
+    get_job,
     get_finalized_attendance_view,
+    bulk_register,
+    cross_registrations,
 )
+from persisted_queries import PersistedQueries
+from graphql_cache import ResponseCache, cache_hint, invalidates
+from profiling import Profiling
 
 def dict_to_student(s: dict) -> "Student":
     """Helper to convert dict to Student"""
@@ -43,6 +54,28 @@ def dict_to_event(e: dict) -> "Event":
         customFields=e.get("customFields")
     )
 
+def dict_to_finalize_job(job: dict) -> "FinalizeJob":
+    result = job.get("result")
+    return FinalizeJob(
+        jobID=job["jobID"],
+        eventID=job["eventID"],
+        status=job["status"],
+        attempts=job["attempts"],
+        progress=job["progress"],
+        result=FinalizeEventResponse(**result) if result else None,
+        error=job.get("error"))
+
+
+def selects_field(info: Info, name: str) -> bool:
+    """Helper to check whether a field is requested under the current field"""
+    pending = list(info.selected_fields)
+    while pending:
+        selection = pending.pop()
+        if getattr(selection, "name", None) == name:
+            return True
+        pending.extend(getattr(selection, "selections", []))
+    return False
+
 @strawberry.type
 class Guardian:
     guardianID: int
@@ -125,6 +158,12 @@ class LiveAttendanceResponse:
     checkedInStudents: List[LiveAttendanceStudent]
 
 
+@strawberry.type
+class LiveOverview:
+    events: List[LiveAttendanceResponse]
+    totalCheckedIn: int
+
+
 @strawberry.type
 class FinalizeEventResponse:
     message: str
@@ -136,6 +175,17 @@ class FinalizeEventResponse:
     totalAttendees: int
 
 
+@strawberry.type
+class FinalizeJob:
+    jobID: str
+    eventID: int
+    status: str
+    attempts: int
+    progress: JSON
+    result: Optional[FinalizeEventResponse]
+    error: Optional[str]
+
+
 @strawberry.type
 class FinalizedAttendanceStudent:
     studentID: int
@@ -157,6 +207,24 @@ class FinalizedAttendanceView:
     hasFinalizedData: bool
 
 
+@strawberry.type
+class BulkRegistrationRow:
+    row: int
+    studentID: Optional[int]
+    eventID: Optional[int]
+    status: str
+
+
+@strawberry.type
+class BulkRegistrationResponse:
+    message: str
+    totalRows: int
+    registered: int
+    alreadyRegistered: int
+    failed: int
+    results: List[BulkRegistrationRow]
+
+
 # Query Resolvers
 
 
@@ -170,11 +238,11 @@ class Query:
             tables=list_tables()
         )
 
-    @strawberry.field
+    @strawberry.field(metadata=cache_hint(60, "Student"))
     def students(self) -> List[Student]:
         return [dict_to_student(s) for s in get_all_students()]
 
-    @strawberry.field
+    @strawberry.field(metadata=cache_hint(60, "Student"))
     def student(self, student_id: int) -> Optional[Student]:
         try:
             get_student_by_id(student_id)
@@ -184,7 +252,7 @@ class Query:
         formatted = next((s for s in all_students if s["studentID"] == student_id), None)
         return dict_to_student(formatted) if formatted else None
 
-    @strawberry.field
+    @strawberry.field(metadata=cache_hint(60, "Group", "Student"))
     def groups(self) -> List[SmallGroup]:
         groups_data = get_groups()
         students_dict = {s["studentID"]: s for s in get_all_students()}
@@ -197,18 +265,30 @@ class Query:
             for g in groups_data
         ]
 
-    @strawberry.field
-    def events(self) -> List[Event]:
-        return [dict_to_event(e) for e in get_all_events()]
-
-    @strawberry.field
+    @strawberry.field(metadata=cache_hint(30, "Event"))
+    def events(
+        self,
+        info: Info,
+        from_date: Annotated[Optional[datetime.date], strawberry.argument(name="from")] = None,
+        to_date: Annotated[Optional[datetime.date], strawberry.argument(name="to")] = None,
+        limit: Optional[int] = None,
+        filter: Optional[JSON] = None,
+    ) -> List[Event]:
+        # Mirrors the REST endpoint's Query(ge=1)
+        if limit is not None and limit < 1:
+            raise GraphQLError("limit must be at least 1")
+        # Only pay for the MongoDB lookup when the client selected customFields
+        include = "customFields" if selects_field(info, "customFields") else None
+        return [dict_to_event(e) for e in get_all_events(from_date, to_date, limit, include, filter)]
+
+    @strawberry.field(metadata=cache_hint(30, "Event"))
     def event(self, event_id: int) -> Optional[Event]:
         try:
             return dict_to_event(get_event_data(event_id))
         except HTTPException:
             return None
 
-    @strawberry.field
+    @strawberry.field(metadata=cache_hint(5, "LiveAttendance", "LiveAttendance:{eventId}"))
     def liveAttendance(self, event_id: int) -> LiveAttendanceResponse:
         data = live_attendance(event_id)
         # Convert to LiveAttendanceResponse object
@@ -226,7 +306,24 @@ class Query:
             checkedInStudents=checked_in_students
         )
 
-    @strawberry.field
+    @strawberry.field(metadata=cache_hint(5, "LiveOverview"))
+    def liveOverview(self, info: Info) -> LiveOverview:
+        """Live counts of every active event; names are only looked up when selected"""
+        data = live_overview(selects_field(info, "checkedIn") or selects_field(info, "checkedInStudents"))
+        return LiveOverview(
+            events=[
+                LiveAttendanceResponse(
+                    eventID=e["eventID"],
+                    checkedIn=e["checkedIn"],
+                    count=e["count"],
+                    checkedInStudents=[
+                        LiveAttendanceStudent(studentID=s["studentID"], name=s["name"])
+                        for s in e.get("checkedInStudents", [])])
+                for e in data["events"]],
+            totalCheckedIn=data["totalCheckedIn"])
+
+    @strawberry.field(metadata=cache_hint(
+        60, "Attendance", "Attendance:{eventId}", "LiveAttendance", "LiveAttendance:{eventId}"))
     def finalizedAttendance(self, event_id: int) -> FinalizedAttendanceView:
         """Get finalized attendance data for an event"""
         data = get_finalized_attendance_view(event_id)
@@ -261,6 +358,14 @@ class Query:
             hasFinalizedData=data.get("hasFinalizedData", False)
         )
 
+    @strawberry.field
+    def finalizeJob(self, job_id: str) -> Optional[FinalizeJob]:
+        """Status, progress and result of a finalize job"""
+        try:
+            return dict_to_finalize_job(get_job(job_id))
+        except HTTPException:
+            return None
+
 
 # Mutation Resolvers
 
@@ -268,11 +373,11 @@ class Query:
 @strawberry.type
 class Mutation:
 
-    @strawberry.mutation
+    @strawberry.mutation(metadata=invalidates("Event"))
     def createEvent(self, name: str, location: str, date: str, time: str, customFields: Optional[JSON] = None) -> Event:
         return dict_to_event(create_event({"name": name, "location": location, "date": date, "time": time, "customFields": customFields or {}}))
 
-    @strawberry.mutation
+    @strawberry.mutation(metadata=invalidates("LiveAttendance:{eventId}", "LiveOverview"))
     def checkIn(self, event_id: int, student_id: int) -> CheckInResponse:
         data = check_in(event_id, student_id)
         return CheckInResponse(
@@ -281,7 +386,7 @@ class Mutation:
             studentID=data["studentID"]
         )
 
-    @strawberry.mutation
+    @strawberry.mutation(metadata=invalidates("LiveAttendance:{eventId}", "LiveOverview"))
     def checkOut(self, event_id: int, student_id: int) -> CheckOutResponse:
         data = check_out(event_id, student_id)
         return CheckOutResponse(
@@ -291,19 +396,45 @@ class Mutation:
         )
 
     @strawberry.mutation
-    def finalizeEvent(self, event_id: int) -> FinalizeEventResponse:
-        data = finalize_event(event_id)
-        return FinalizeEventResponse(
+    def finalizeEvent(self, event_id: int) -> FinalizeJob:
+        """Queue finalization of an event; poll finalizeJob(jobId) for the result"""
+        return dict_to_finalize_job(submit_finalize(event_id))
+
+    @strawberry.mutation(metadata=invalidates("Registration"))
+    def bulkRegister(self, student_ids: List[int], event_ids: List[int]) -> BulkRegistrationResponse:
+        """Register every given student for every given event in one transaction"""
+        data = bulk_register(cross_registrations(student_ids, event_ids))
+        return BulkRegistrationResponse(
             message=data["message"],
-            eventID=data["eventID"],
-            registeredSaved=data.get("registeredSaved", []),
-            walkInsLogged=data.get("walkInsLogged", []),
-            totalRegistered=data.get("totalRegistered", 0),
-            totalWalkIns=data.get("totalWalkIns", 0),
-            totalAttendees=data.get("totalAttendees", 0)
+            totalRows=data["totalRows"],
+            registered=data["registered"],
+            alreadyRegistered=data["alreadyRegistered"],
+            failed=data["failed"],
+            results=[
+                BulkRegistrationRow(
+                    row=r["row"],
+                    studentID=r["studentID"],
+                    eventID=r["eventID"],
+                    status=r["status"]
+                )
+                for r in data["results"]
+            ]
         )
 
 
 # Build Schema
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+# Parsed and validated documents are kept in bounded LRUs keyed by query
+# text, so repeated dashboard queries skip both steps
+DOCUMENT_CACHE_SIZE = int(os.getenv("GRAPHQL_DOCUMENT_CACHE_SIZE", "256"))
+
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[
+        Profiling,
+        PersistedQueries,
+        ResponseCache,
+        lambda: ParserCache(maxsize=DOCUMENT_CACHE_SIZE),
+        lambda: ValidationCache(maxsize=DOCUMENT_CACHE_SIZE),
+    ])
\ No newline at end of file
@@ -0,0 +1,273 @@
+import time
+import threading
+from redis.exceptions import WatchError
+
+WALK_INS_UNIQUE_INDEX = "eventID_1_studentID_1"
+
+
+class Scheduler:
+    """
+    Runs registered maintenance jobs on fixed intervals from one background
+    thread. Every job runs once at startup; a failing job is logged and
+    tried again at its next slot
+    """
+
+    def __init__(self):
+        self.jobs = []
+        self.stopping = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def every(self, seconds, name, fn):
+        self.jobs.append({
+            "name": name, "interval": seconds, "fn": fn, "nextRun": 0.0,
+            "runs": 0, "failures": 0, "lastRunAt": None, "lastDuration": None,
+            "lastResult": None, "lastError": None})
+
+    def run_now(self, name):
+        """Runs job `name` in the calling thread, recording it like a scheduled run"""
+        job = next(job for job in self.jobs if job["name"] == name)
+        self.run_job(job)
+        return self.snapshot()[name]
+
+    def start(self):
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="housekeeping", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def run(self):
+        while not self.stopping.is_set() and self.jobs:
+            for job in self.jobs:
+                if job["nextRun"] <= time.monotonic() and not self.stopping.is_set():
+                    self.run_job(job)
+            next_run = min(job["nextRun"] for job in self.jobs)
+            self.stopping.wait(max(0.0, next_run - time.monotonic()))
+
+    def run_job(self, job):
+        started = time.monotonic()
+        try:
+            result, error = job["fn"](), None
+        except Exception as e:
+            result, error = None, str(e)
+            print(f"Warning: housekeeping job {job['name']} failed: {e}")
+        with self.lock:
+            job["runs"] += 1
+            job["failures"] += error is not None
+            job["lastRunAt"] = time.time()
+            job["lastDuration"] = round(time.monotonic() - started, 3)
+            job["lastResult"] = result
+            job["lastError"] = error
+            job["nextRun"] = time.monotonic() + job["interval"]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                job["name"]: {
+                    "intervalSeconds": job["interval"],
+                    "runs": job["runs"],
+                    "failures": job["failures"],
+                    "lastRunSecondsAgo": round(time.time() - job["lastRunAt"], 1) if job["lastRunAt"] else None,
+                    "lastDurationSeconds": job["lastDuration"],
+                    "lastResult": job["lastResult"],
+                    "lastError": job["lastError"]}
+                for job in self.jobs}
+
+
+def event_key_id(key):
+    """eventID of an "event:{id}:..." key, or None for any other key"""
+    parts = key.split(":")
+    if len(parts) < 3 or not parts[1].isdigit():
+        return None
+    return int(parts[1])
+
+
+def sweep_live_keys(redis, event_ids, ttl, index_key=None, started_key=None, batch_size=500):
+    """
+    SCANs the event:{id}:* keys, deleting those of events that no longer
+    exist and giving any key without an expiry the live-key TTL. IDs above
+    the highest known event are left alone: they belong to events created
+    after `event_ids` was read. With `index_key`, the set of live eventIDs
+    is reconciled with the events whose `started_key(id)` exists
+    """
+    newest = max(event_ids, default=0)
+    scanned = deleted = expired = 0
+    started = set()
+    cursor = 0
+    while True:
+        cursor, keys = redis.scan(cursor, match="event:*", count=batch_size)
+        orphans, live = [], []
+        for key in keys:
+            event_id = event_key_id(key)
+            if event_id is None:
+                continue
+            scanned += 1
+            if event_id in event_ids or event_id > newest:
+                live.append(key)
+                if started_key and key == started_key(event_id):
+                    started.add(event_id)
+            else:
+                orphans.append(key)
+        if orphans:
+            deleted += redis.delete(*orphans)
+        if live:
+            pipe = redis.pipeline()
+            for key in live:
+                pipe.ttl(key)
+            no_expiry = [key for key, key_ttl in zip(live, pipe.execute()) if key_ttl == -1]
+            if no_expiry:
+                pipe = redis.pipeline()
+                for key in no_expiry:
+                    pipe.expire(key, ttl)
+                pipe.execute()
+                expired += len(no_expiry)
+        if int(cursor) == 0:
+            break
+    result = {"scanned": scanned, "orphansDeleted": deleted, "ttlsSet": expired}
+    if index_key is not None:
+        result.update(reconcile_live_index(redis, index_key, started, started_key))
+    return result
+
+
+def reconcile_live_index(redis, index_key, started, started_key):
+    indexed = {int(x) for x in redis.smembers(index_key) if str(x).isdigit()}
+    missing = sorted(started - indexed)
+    if missing:
+        redis.sadd(index_key, *[str(event_id) for event_id in missing])
+    # Re-checked atomically: an event may have gone live after its keys were scanned
+    stale = unindex_ended(redis, index_key, started_key, sorted(indexed - started))
+    return {"indexAdded": len(missing), "indexRemoved": len(stale)}
+
+
+def unindex_ended(redis, index_key, started_key, event_ids):
+    """
+    Removes from `index_key` the events whose `started_key(id)` is gone, in
+    a transaction WATCHing those keys: a check-in landing between the
+    check and the SREM aborts it and the check is redone, so a live event
+    is never dropped from the index. Returns the eventIDs removed
+    """
+    while event_ids:
+        pipe = redis.pipeline()
+        try:
+            pipe.watch(*[started_key(event_id) for event_id in event_ids])
+            ended = [event_id for event_id in event_ids if not pipe.exists(started_key(event_id))]
+            if not ended:
+                return []
+            pipe.multi()
+            pipe.srem(index_key, *[str(event_id) for event_id in ended])
+            pipe.execute()
+            return ended
+        except WatchError:
+            continue
+        finally:
+            pipe.reset()
+    return []
+
+
+def compact_walk_ins(mongo, batch_size=1000):
+    """
+    Deletes duplicate walk_ins (keeping the earliest check-in per event and
+    student), then adds a unique index so duplicates cannot come back. A
+    no-op once the index exists
+    """
+    collection = mongo["walk_ins"]
+    if WALK_INS_UNIQUE_INDEX in collection.index_information():
+        return {"duplicatesDeleted": 0, "uniqueIndex": True}
+    duplicates = collection.aggregate([
+        {"$sort": {"checkInTime": 1}},
+        {"$group": {
+            "_id": {"eventID": "$eventID", "studentID": "$studentID"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}], allowDiskUse=True)
+    extra = [doc_id for group in duplicates for doc_id in group["ids"][1:]]
+    for start in range(0, len(extra), batch_size):
+        collection.delete_many({"_id": {"$in": extra[start:start + batch_size]}})
+    collection.create_index(
+        [("eventID", 1), ("studentID", 1)], unique=True, name=WALK_INS_UNIQUE_INDEX)
+    return {"duplicatesDeleted": len(extra), "uniqueIndex": True}
+
+
+def prune_change_log(connect, retention_seconds, batch_size=5000):
+    """
+    Deletes ChangeLog entries older than `retention_seconds`, reading and
+    deleting from the oldest end `batch_size` at a time so no transaction
+    holds locks for long. Kiosks whose version falls before what is left
+    get a /sync snapshot instead
+    """
+    db = connect()
+    cursor = db.cursor()
+    deleted = 0
+    try:
+        while True:
+            cursor.execute("""
+                SELECT changeID, TIMESTAMPDIFF(SECOND, changedAt, NOW()) > %s
+                FROM ChangeLog ORDER BY changeID LIMIT %s
+            """, (retention_seconds, batch_size))
+            rows = cursor.fetchall()
+            expired = 0
+            while expired < len(rows) and rows[expired][1]:
+                expired += 1
+            if expired:
+                cursor.execute("DELETE FROM ChangeLog WHERE changeID <= %s", (rows[expired - 1][0],))
+                deleted += cursor.rowcount
+                db.commit()
+            if expired < batch_size:
+                break
+    finally:
+        cursor.close()
+        db.close()
+    return {"deleted": deleted}
+
+
+def redis_usage(redis, batch_size=1000):
+    memory = redis.info("memory")
+    live_keys = 0
+    cursor = 0
+    while True:
+        cursor, keys = redis.scan(cursor, match="event:*", count=batch_size)
+        live_keys += sum(1 for key in keys if event_key_id(key) is not None)
+        if int(cursor) == 0:
+            break
+    return {
+        "usedMemoryBytes": memory.get("used_memory"),
+        "usedMemoryPeakBytes": memory.get("used_memory_peak"),
+        "maxMemoryBytes": memory.get("maxmemory"),
+        "keys": redis.dbsize(),
+        "liveEventKeys": live_keys}
+
+
+def mongo_usage(mongo, collections=("event_data", "walk_ins")):
+    stats = mongo.command("dbStats")
+    report = {
+        "dataSizeBytes": stats.get("dataSize"),
+        "storageSizeBytes": stats.get("storageSize"),
+        "indexSizeBytes": stats.get("indexSize"),
+        "collections": {}}
+    for name in collections:
+        storage = next(iter(mongo[name].aggregate([{"$collStats": {"storageStats": {}}}])), {})
+        storage = storage.get("storageStats", {})
+        report["collections"][name] = {
+            "documents": storage.get("count"),
+            "sizeBytes": storage.get("size"),
+            "storageSizeBytes": storage.get("storageSize"),
+            "indexSizeBytes": storage.get("totalIndexSize")}
+    return report
+
+
+def mysql_usage(cursor, database):
+    cursor.execute("""
+        SELECT TABLE_NAME AS name, TABLE_ROWS AS approxRows,
+               DATA_LENGTH AS dataBytes, INDEX_LENGTH AS indexBytes
+        FROM information_schema.TABLES WHERE TABLE_SCHEMA=%s
+        ORDER BY DATA_LENGTH + INDEX_LENGTH DESC
+    """, (database,))
+    tables = cursor.fetchall()
+    return {
+        "dataBytes": sum(int(t["dataBytes"] or 0) for t in tables),
+        "indexBytes": sum(int(t["indexBytes"] or 0) for t in tables),
+        "tables": tables}
@@ -0,0 +1,140 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+ACTIVE_STATES = ("queued", "running", "retrying")
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when `max_pending` jobs are already queued or running"""
+
+
+class RetryLater(Exception):
+    """Raised by a job to be retried after a backoff, e.g. when its lock is held elsewhere"""
+
+
+class JobQueue:
+    """
+    Background jobs on a fixed-size thread pool, so at most `workers` run
+    at once. Jobs are keyed: submitting a key whose job is still queued or
+    running returns that job instead of starting a second one. RetryLater
+    and `retry_on` errors are retried with exponential backoff up to
+    `max_attempts`, so jobs must be safe to run again. The last `history`
+    finished jobs are kept for status polling
+    """
+
+    def __init__(self, name, workers=2, max_pending=100, max_attempts=5,
+                 backoff=1.0, max_backoff=30.0, retry_on=(), history=500):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = (RetryLater,) + tuple(retry_on)
+        self.history = history
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self.jobs = OrderedDict()
+        self.active = {}
+        self.counts = {"submitted": 0, "deduplicated": 0, "rejected": 0,
+                       "succeeded": 0, "failed": 0, "retries": 0}
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+
+    def submit(self, kind, key, fn, **fields):
+        """
+        Queues fn(progress) under `key`; returns (job, created). `fields`
+        are shown on the job, and `progress` takes keyword fields to show
+        in the job's progress while it runs
+        """
+        with self.lock:
+            job_id = self.active.get(key)
+            if job_id is not None:
+                self.counts["deduplicated"] += 1
+                return self.view(self.jobs[job_id]), False
+            if len(self.active) >= self.max_pending:
+                self.counts["rejected"] += 1
+                raise QueueFull(f"{len(self.active)} {kind} jobs are already pending")
+            job = {
+                "jobID": uuid.uuid4().hex[:16], "kind": kind, "key": key, "status": "queued",
+                "attempts": 0, "progress": {}, "result": None, "error": None,
+                "createdAt": time.time(), "startedAt": None, "finishedAt": None, **fields}
+            self.jobs[job["jobID"]] = job
+            self.active[key] = job["jobID"]
+            self.counts["submitted"] += 1
+            self.trim()
+        self.executor.submit(self.run, job, fn)
+        return self.view(job), True
+
+    def run(self, job, fn):
+        def progress(**fields):
+            with self.lock:
+                job["progress"].update(fields)
+
+        while True:
+            with self.lock:
+                job["status"] = "running"
+                job["attempts"] += 1
+                job["startedAt"] = job["startedAt"] or time.time()
+            try:
+                result = fn(progress)
+            except self.retry_on as e:
+                if job["attempts"] >= self.max_attempts or self.stopping.is_set():
+                    self.finish(job, "failed", error=str(e))
+                    return
+                with self.lock:
+                    job["status"] = "retrying"
+                    job["error"] = str(e)
+                    self.counts["retries"] += 1
+                print(f"Warning: {job['kind']} job {job['jobID']} failed (attempt {job['attempts']}), retrying: {e}")
+                self.stopping.wait(min(self.max_backoff, self.backoff * 2 ** (job["attempts"] - 1)))
+            except Exception as e:
+                print(f"Warning: {job['kind']} job {job['jobID']} failed: {e}")
+                self.finish(job, "failed", error=str(e))
+                return
+            else:
+                self.finish(job, "succeeded", result=result)
+                return
+
+    def finish(self, job, status, result=None, error=None):
+        with self.lock:
+            job.update(status=status, result=result, error=error, finishedAt=time.time())
+            self.counts[status] += 1
+            if self.active.get(job["key"]) == job["jobID"]:
+                del self.active[job["key"]]
+
+    def trim(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] not in ACTIVE_STATES]
+        for job_id in finished[:max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return self.view(job) if job else None
+
+    def view(self, job):
+        view = {k: v for k, v in job.items() if k != "key"}
+        view["progress"] = dict(job["progress"])
+        end = job["finishedAt"] or time.time()
+        view["queuedSeconds"] = round((job["startedAt"] or end) - job["createdAt"], 3)
+        view["runSeconds"] = round(end - job["startedAt"], 3) if job["startedAt"] else None
+        return view
+
+    def stop(self):
+        """Cancels queued jobs and cuts retry backoffs short; running jobs finish their attempt"""
+        self.stopping.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self):
+        with self.lock:
+            states = {}
+            for job in self.jobs.values():
+                states[job["status"]] = states.get(job["status"], 0) + 1
+            return {
+                "workers": self.workers,
+                "maxPending": self.max_pending,
+                "pending": len(self.active),
+                "states": states,
+                **self.counts}
@@ -1,15 +1,40 @@
 import sys
 import os
+import time
+import io
+import tempfile
+import csv
+import json
 import mysql.connector
+from mysql.connector.constants import ClientFlag
 import redis
-from datetime import datetime
+import pymongo.errors
+from datetime import datetime, date
 from contextlib import asynccontextmanager
 from pymongo import MongoClient
-from fastapi import FastAPI, HTTPException, Body
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
-from typing import Optional, Dict, Any
+from setup_mongo import ensure_indexes
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Header, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse
+from typing import Optional, Dict, Any, Annotated
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
+from resilience import CircuitBreaker, CircuitOpenError, Guarded, StaleCache
+from export_attendance import iter_attendance_rows, iter_csv_chunks, write_parquet
+from persisted_queries import persisted_query_store
+from graphql_cache import invalidate_tags, response_cache
+from mysql_routing import ReplicaRouter, parse_replicas, request_routing, reads_pinned, mark_write, primary_reads
+from outbox import OutboxRelay, record_outbox
+from housekeeping import (
+    Scheduler, sweep_live_keys, unindex_ended, compact_walk_ins, prune_change_log,
+    redis_usage, mongo_usage, mysql_usage)
+from profiling import ProfiledRoute, ProfileStore, current_profile, start_profile, token_matches
+from query_log import QueryLog, InstrumentedConnection
+from attendance_matrix import build_matrix, matrix_report
+from jobs import JobQueue, QueueFull, RetryLater
+from embedded import open_stores, local_script
+from static_assets import PrecompressedStaticFiles, frontend_dir
+from redis_shards import ShardedRedis, parse_nodes, rebalance
 
 # Guard to prevent circular import when GraphQL schema imports from main
 GRAPHQL_IMPORT = "graphql_schema" in sys.modules
@@ -21,71 +46,283 @@ def load_secret(name):
             return f.read().strip()
     raise Exception(f"Secret file {path} not found")
 
+def load_optional_secret(name):
+    try:
+        return load_secret(name)
+    except Exception:
+        return None
+
+# "cloud" (MySQL, MongoDB Atlas and Redis Cloud) or "embedded" (SQLite, a
+# local document store and in-process live sets, for single-laptop sites)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloud")
+EMBEDDED = STORAGE_BACKEND == "embedded"
+EMBEDDED_DATA_DIR = os.getenv("EMBEDDED_DATA_DIR", "data")
+
 DB_USER = "root"
-DB_PASS = load_secret("mysql_password")
+DB_PASS = None if EMBEDDED else load_secret("mysql_password")
+# Guards /admin endpoints and header-triggered profiling; both are off without it
+ADMIN_TOKEN = load_optional_secret("admin_token")
 DB_HOST = "mysql-cs125"
 DB_NAME = "youth_group"
 
-def mysql_connect():
+# Read/write splitting: read_only connections go to a replica in
+# MYSQL_REPLICAS ("host[:port],...") unless it lags more than
+# MYSQL_REPLICA_MAX_LAG_SECONDS or the client wrote within the last
+# READ_YOUR_WRITES_SECONDS; everything else goes to the primary
+MYSQL_REPLICAS = [] if EMBEDDED else parse_replicas(os.getenv("MYSQL_REPLICAS", ""))
+MYSQL_REPLICA_MAX_LAG_SECONDS = float(os.getenv("MYSQL_REPLICA_MAX_LAG_SECONDS", "5"))
+MYSQL_REPLICA_CHECK_SECONDS = float(os.getenv("MYSQL_REPLICA_CHECK_SECONDS", "5"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+READ_YOUR_WRITES_COOKIE = "ryw_until"
+
+def mysql_connect_to(host, port=3306):
     return mysql.connector.connect(
         user=DB_USER,
         password=DB_PASS,
-        host=DB_HOST,
-        database=DB_NAME)
+        host=host,
+        port=port,
+        database=DB_NAME,
+        # UPDATE rowcount counts matched rows, so 0 means the row is missing
+        client_flags=[ClientFlag.FOUND_ROWS])
+
+embedded_sql = None
+
+def primary_connect():
+    """Helper to open an unrouted connection to the primary (the SQLite file when embedded)"""
+    if EMBEDDED:
+        return embedded_sql.connect()
+    return mysql_connect_to(DB_HOST)
+
+replica_router = ReplicaRouter(
+    mysql_connect_to, MYSQL_REPLICAS, MYSQL_REPLICA_MAX_LAG_SECONDS, MYSQL_REPLICA_CHECK_SECONDS)
+
+# Slow-query log: every statement is timed under its normalized fingerprint;
+# ones slower than SLOW_QUERY_MS get their EXPLAIN plan captured
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "true").lower() in ("1", "true", "yes")
+query_log = QueryLog(
+    primary_connect,
+    slow_ms=float(os.getenv("SLOW_QUERY_MS", "100")),
+    maxsize=int(os.getenv("QUERY_LOG_MAX_FINGERPRINTS", "500")),
+    explain_interval=float(os.getenv("EXPLAIN_INTERVAL_SECONDS", "300")))
+
+def mysql_connect(read_only=False):
+    """
+    Primary connection for writes (and reads that must see them).
+    read_only=True may be served by a replica
+    """
+    conn = None
+    if read_only and not reads_pinned():
+        conn = replica_router.connect_read()
+    elif not read_only:
+        mark_write()
+    if conn is None:
+        conn = primary_connect()
+    return InstrumentedConnection(conn, query_log) if QUERY_LOG_ENABLED else conn
 
 mongo_client = None
 mongo_db = None
-redis_client = None
+redis_shards = None
+
+# Live attendance is sharded by event across REDIS_NODES ("redis://[:password@]host:port,...");
+# without it everything goes to the one Redis Cloud endpoint
+REDIS_NODES = [] if EMBEDDED else parse_nodes(os.getenv("REDIS_NODES", ""))
+REDIS_CLOUD_HOST = "redis-13814.c258.us-east-1-4.ec2.cloud.redislabs.com"
+REDIS_CLOUD_PORT = 13814
+
+# Latency guards: per-backend timeouts plus circuit breakers, so a slow
+# Atlas or Redis Cloud fails fast instead of jamming the worker pool
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "2000"))
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_SECONDS", "1.0"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+MONGO_FAILURES = (pymongo.errors.ConnectionFailure, pymongo.errors.ExecutionTimeout)
+REDIS_FAILURES = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+
+mongo_breaker = CircuitBreaker(
+    "mongo", MONGO_FAILURES, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+make_redis_breaker = lambda node: CircuitBreaker(
+    f"redis {node}", REDIS_FAILURES, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+
+# Last-known customFields per event, served while MongoDB is degraded
+custom_fields_cache = StaleCache(int(os.getenv("CUSTOM_FIELDS_CACHE_SIZE", "1024")))
 
 def get_mongo_db():
-    """Get MongoDB database instance"""
+    """Get MongoDB database instance (guarded by the mongo circuit breaker)"""
     global mongo_db
     if mongo_db is None:
         raise RuntimeError("MongoDB not initialized. Call get_mongo_client() first.")
-    return mongo_db
+    return Guarded(mongo_db, mongo_breaker, materialize={"find", "aggregate"})
 
-def get_redis_conn():
-    """Get Redis connection"""
-    global redis_client
-    if redis_client is None:
+def get_redis_conn(event_id):
+    """Get the Redis connection holding an event's live keys (guarded by that node's circuit breaker)"""
+    if redis_shards is None:
         raise RuntimeError("Redis not initialized. Call get_redis_client() first.")
-    return redis_client
+    return redis_shards.for_event(event_id)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Manage application startup and shutdown"""
-    global mongo_client, mongo_db, redis_client
-    print("Application startup: Initializing database connections...")
-    
+def redis_nodes():
+    """Get [(name, connection)] of every Redis node, for work that spans all events"""
+    if redis_shards is None:
+        raise RuntimeError("Redis not initialized. Call get_redis_client() first.")
+    return redis_shards.nodes()
+
+def fetch_custom_fields(event_ids, fallback=True):
+    """
+    Returns {eventID: customFields} from MongoDB, falling back to the
+    last-known values when MongoDB is timing out or its circuit is open
+    (with fallback=False those errors are raised instead)
+    """
+    event_ids = list(event_ids)
+    try:
+        docs = get_mongo_db()["event_data"].find(
+            {"eventID": {"$in": event_ids}},
+            {"_id": 0, "eventID": 1, "customFields": 1})
+    except (CircuitOpenError,) + MONGO_FAILURES as mongo_err:
+        if not fallback:
+            raise
+        print(f"MongoDB degraded, serving last-known customFields: {mongo_err}")
+        return custom_fields_cache.get_many(event_ids)
+    custom = {d["eventID"]: d.get("customFields", {}) for d in docs}
+    for event_id in event_ids:
+        custom_fields_cache.put(event_id, custom.get(event_id, {}))
+    return custom
+
+def record_changes(cursor, entity, keys, operation="upsert"):
+    """
+    Appends entries to the ChangeLog served by /sync. Call it on the same
+    cursor (and transaction) as the write it describes
+    """
+    keys = [str(k) for k in keys]
+    if not keys:
+        return
+    cursor.execute(f"""
+        INSERT INTO ChangeLog (entity, entityKey, operation)
+        VALUES {','.join(['(%s, %s, %s)'] * len(keys))}
+    """, tuple(v for key in keys for v in (entity, key, operation)))
+
+# Existence probes for missing_rows, one EXISTS subquery each
+ROW_PROBES = {
+    "Student": "SELECT 1 FROM Student WHERE studentID=%s",
+    "Event": "SELECT 1 FROM Event WHERE eventID=%s"}
+
+def missing_rows(cursor, *probes):
+    """
+    Helper checking several rows in one round trip. Each probe is a
+    (table, params) pair; returns the tables whose row doesn't exist, in
+    probe order. Writes should rely on constraints and rowcount first and
+    call this only to explain a write that matched nothing
+    """
+    columns = ", ".join(f"EXISTS({ROW_PROBES[table]}) AS p{i}" for i, (table, _) in enumerate(probes))
+    cursor.execute(f"SELECT {columns}", tuple(v for _, params in probes for v in params))
+    row = cursor.fetchone()
+    found = [row[f"p{i}"] for i in range(len(probes))] if isinstance(row, dict) else row
+    return [table for (table, _), exists in zip(probes, found) if not exists]
+
+def outbox_applied(cursor, rows):
+    """
+    Runs in the outbox relay's transaction once a batch has reached MongoDB:
+    logs customFields changes for /sync and refreshes the read caches
+    """
+    for row in rows:
+        event_id = row["eventID"]
+        if row["operation"] == "set_custom_fields":
+            custom_fields = row["payload"].get("customFields") or {}
+            record_changes(cursor, "EventCustomFields", [event_id], "upsert" if custom_fields else "delete")
+            custom_fields_cache.put(event_id, custom_fields)
+            invalidate_tags("Event")
+        elif row["operation"] == "delete_event":
+            custom_fields_cache.discard(event_id)
+            invalidate_tags("Event", f"Attendance:{event_id}")
+        elif row["operation"] == "replace_walk_ins":
+            invalidate_tags(f"Attendance:{event_id}")
+
+# Event metadata and walk-in writes reach MongoDB through the Outbox table
+outbox_relay = OutboxRelay(
+    mysql_connect, get_mongo_db, outbox_applied,
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "200")),
+    poll_interval=float(os.getenv("OUTBOX_POLL_SECONDS", "1.0")),
+    max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5")),
+    transient_errors=(CircuitOpenError,) + MONGO_FAILURES)
+
+def connect_cloud_stores():
+    """Helper to connect to MongoDB Atlas and the Redis nodes"""
+    global mongo_client, mongo_db, redis_shards
     mongo_client = MongoClient(
         load_secret("mongo_url"),
         tls=True,
-        tlsAllowInvalidCertificates=True)
+        tlsAllowInvalidCertificates=True,
+        serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_TIMEOUT_MS)
     mongo_db = mongo_client["youth_group"]
+    try:
+        ensure_indexes(mongo_db)
+    except Exception as mongo_err:
+        print(f"Warning: Failed to ensure MongoDB indexes: {mongo_err}")
+
+    if REDIS_NODES:
+        clients = {
+            name: redis.Redis.from_url(
+                url,
+                decode_responses=True,
+                socket_timeout=REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=REDIS_TIMEOUT_SECONDS)
+            for name, url in REDIS_NODES}
+    else:
+        clients = {f"{REDIS_CLOUD_HOST}:{REDIS_CLOUD_PORT}": redis.Redis(
+            host=REDIS_CLOUD_HOST,
+            port=REDIS_CLOUD_PORT,
+            password=load_secret("redis_password"),
+            decode_responses=True,
+            socket_timeout=REDIS_TIMEOUT_SECONDS,
+            socket_connect_timeout=REDIS_TIMEOUT_SECONDS)}
+    redis_shards = ShardedRedis(clients, make_redis_breaker)
 
-    redis_client = redis.Redis(
-        host="redis-13814.c258.us-east-1-4.ec2.cloud.redislabs.com",
-        port=13814,
-        password=load_secret("redis_password"),
-        decode_responses=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage application startup and shutdown"""
+    global mongo_db, redis_shards, embedded_sql
+    print("Application startup: Initializing database connections...")
+    if EMBEDDED:
+        embedded_sql, mongo_db, local_redis = open_stores(EMBEDDED_DATA_DIR)
+        redis_shards = ShardedRedis({"local": local_redis}, make_redis_breaker)
+        ensure_indexes(mongo_db)
+    else:
+        connect_cloud_stores()
     print("Database connections initialized successfully.")
+    # Events route by the current REDIS_NODES ring as soon as requests are
+    # served, so move their live keys there first: otherwise a moved event
+    # reads as empty, check-outs miss and finalize sees half the check-ins
+    migration = housekeeping.run_now("rebalanceLiveKeys")
+    if migration["lastError"] is None:
+        print(f"Live keys rebalanced: {migration['lastResult']}")
+    outbox_relay.start()
+    if HOUSEKEEPING_ENABLED:
+        housekeeping.start()
     yield
     print("Application shutdown: Closing database connections...")
+    outbox_relay.stop()
+    housekeeping.stop()
+    finalize_jobs.stop()
     if mongo_client:
         mongo_client.close()
-    if redis_client:
-        redis_client.close()
+    if EMBEDDED and mongo_db is not None:
+        mongo_db.close()
+    if redis_shards:
+        redis_shards.close()
     print("Database connections closed.")
 
 app = FastAPI(
     title="Youth Group API",
     description="Youth group system using MySQL + MongoDB + Redis.",
     lifespan=lifespan)
+# Lets an active request profile attach to the thread running each endpoint
+app.router.route_class = ProfiledRoute
 
-app.mount(
-    "/frontend",
-    StaticFiles(directory="youth_group_frontend"),
-    name="frontend")
+# The hashed, precompressed build from `python3 static_assets.py` when
+# there is an up-to-date one, else the sources, revalidated on every load
+frontend_files = PrecompressedStaticFiles(directory=frontend_dir())
+app.mount("/frontend", frontend_files, name="frontend")
 
 app.add_middleware(
     CORSMiddleware,
@@ -94,8 +331,60 @@ app.add_middleware(
     allow_methods=["*"],
     allow_credentials=True,)
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """
+    Pins a client's reads to the primary for READ_YOUR_WRITES_SECONDS after
+    it wrote, so replica lag never hides its own changes
+    """
+    try:
+        pinned_until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        pinned_until = 0
+    state = {"pinned": pinned_until > time.time(), "wrote": False}
+    token = request_routing.set(state)
+    try:
+        response = await call_next(request)
+    finally:
+        request_routing.reset(token)
+    if state["wrote"] and replica_router.replicas:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, str(time.time() + READ_YOUR_WRITES_SECONDS),
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1, httponly=True, samesite="lax")
+    return response
+
+# On-demand profiling: "X-Profile: sample|trace" with "X-Admin-Token", or a
+# random PROFILE_SAMPLE_RATE share of requests (sampling mode)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+profile_store = ProfileStore(int(os.getenv("PROFILE_BUFFER_SIZE", "50")))
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """
+    Records a profile of the request when asked to; the ID of the stored
+    profile comes back in the X-Profile-ID header
+    """
+    session = start_profile(
+        request.headers.get("X-Profile"), request.headers.get("X-Admin-Token"), ADMIN_TOKEN,
+        PROFILE_SAMPLE_RATE, request.method, request.url.path, PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    if session is None:
+        return await call_next(request)
+    token = current_profile.set(session)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_profile.reset(token)
+        session.duration = time.perf_counter() - started
+    session.status = response.status_code
+    if session.attached_count:
+        profile_store.add(session)
+        response.headers["X-Profile-ID"] = session.id
+    return response
+
 def list_tables():
-    db = mysql_connect()
+    db = mysql_connect(read_only=True)
     cur = db.cursor()
     cur.execute("SHOW TABLES;")
     tables = [t[0] for t in cur.fetchall()]
@@ -104,56 +393,69 @@ def list_tables():
     return tables
 
 @app.get("/", response_class=FileResponse)
-async def root():
+async def root(request: Request):
     """
     Serves the main dashboard page.
     """
-    index_path = os.path.join(os.path.dirname(__file__), "youth_group_frontend", "index.html")
-    if os.path.exists(index_path):
-        return index_path
+    if os.path.exists(os.path.join(frontend_files.directory, "index.html")):
+        return await frontend_files.get_response("index.html", request.scope)
     return {"message": "Welcome to the Youth Group API!", "tables": list_tables()}
 
 # --------------------------
 # STUDENTS
 # --------------------------
+def fetch_students(student_ids=None):
+    """
+    Helper to load students with their guardian names, optionally limited
+    to the given IDs
+    """
+    where, params = "", ()
+    if student_ids is not None:
+        if not student_ids:
+            return []
+        where = f"WHERE s.studentID IN ({','.join(['%s'] * len(student_ids))})"
+        params = tuple(student_ids)
+    db = mysql_connect(read_only=True)
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT 
+            s.studentID, s.firstName, s.lastName, s.age,
+            s.phoneNumber, s.email, s.groupID,
+            g1.firstName AS g1_first, g1.lastName AS g1_last,
+            g2.firstName AS g2_first, g2.lastName AS g2_last
+        FROM Student s
+        LEFT JOIN Guardian g1 ON s.guardian1ID = g1.guardianID
+        LEFT JOIN Guardian g2 ON s.guardian2ID = g2.guardianID
+        {where};
+    """, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    db.close()
+    students = []
+    for r in rows:
+        guardians = []
+        if r["g1_first"]:
+            guardians.append(f"{r['g1_first']} {r['g1_last']}")
+        if r["g2_first"]:
+            guardians.append(f"{r['g2_first']} {r['g2_last']}")
+        students.append({
+            "studentID": r["studentID"],
+            "firstName": r["firstName"],
+            "lastName": r["lastName"],
+            "age": r["age"],
+            "phoneNumber": r["phoneNumber"],
+            "email": r["email"],
+            "groupID": r["groupID"],
+            "guardians": guardians,})
+    return students
+
 @app.get("/students")
 def get_all_students():
     """
     MySQL Endpoint to retrieve all students and their information
     """
     try:
-        db = mysql_connect()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT 
-                s.studentID, s.firstName, s.lastName, s.age,
-                s.phoneNumber, s.email, s.groupID,
-                g1.firstName AS g1_first, g1.lastName AS g1_last,
-                g2.firstName AS g2_first, g2.lastName AS g2_last
-            FROM Student s
-            LEFT JOIN Guardian g1 ON s.guardian1ID = g1.guardianID
-            LEFT JOIN Guardian g2 ON s.guardian2ID = g2.guardianID;
-        """)
-        rows = cursor.fetchall()
-        cursor.close()
-        db.close()
-        students = []
-        for r in rows:
-            guardians = []
-            if r["g1_first"]:
-                guardians.append(f"{r['g1_first']} {r['g1_last']}")
-            if r["g2_first"]:
-                guardians.append(f"{r['g2_first']} {r['g2_last']}")
-            students.append({
-                "studentID": r["studentID"],
-                "firstName": r["firstName"],
-                "lastName": r["lastName"],
-                "age": r["age"],
-                "phoneNumber": r["phoneNumber"],
-                "email": r["email"],
-                "groupID": r["groupID"],
-                "guardians": guardians,})
-        return students
+        return fetch_students()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -163,7 +465,7 @@ def get_student_by_id(student_id: int):
     MySQL endpoint to retrieve information of a specific student
     """
     try:
-        db = mysql_connect()
+        db = mysql_connect(read_only=True)
         cur = db.cursor(dictionary=True)
         cur.execute("SELECT * FROM Student WHERE studentID=%s;", (student_id,))
         row = cur.fetchone()
@@ -184,7 +486,7 @@ def get_groups():
     MySQL endpoint to retrieve all small groups and their information
     """
     try:
-        db = mysql_connect()
+        db = mysql_connect(read_only=True)
         cursor = db.cursor(dictionary=True)
         cursor.execute("SELECT groupID, name FROM SmallGroup;")
         groups = {
@@ -206,6 +508,100 @@ def get_groups():
 # --------------------------
 # EVENTS
 # --------------------------
+# Read model: each event's core columns and customFields as one JSON
+# document on the event's Redis node, so a detail view is a single GET.
+# Writes store it after their commit; reads repair it on a miss. Event.version
+# orders them, so an older view never replaces a newer one, and a delete
+# leaves a tombstone no view replaces
+EVENT_VIEW_KEY = lambda eid: f"event:{eid}:view"
+# Bounds how long a view missed by a failed Redis write can be stale
+EVENT_VIEW_TTL_SECONDS = int(os.getenv("EVENT_VIEW_TTL_SECONDS", "3600"))
+# Repairs read customFields from MongoDB, which lags the outbox, so they expire sooner
+EVENT_VIEW_REPAIR_TTL_SECONDS = int(os.getenv("EVENT_VIEW_REPAIR_TTL_SECONDS", "60"))
+
+EVENT_SQL = """
+    SELECT eventID, name, location, date, CAST(time AS CHAR) AS time, version
+    FROM Event WHERE eventID=%s
+"""
+
+# SET of a view, unless the key holds a tombstone or the same or a newer
+# version: KEYS[1] view key, ARGV view JSON, version, TTL seconds
+STORE_EVENT_VIEW_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local ok, stored = pcall(cjson.decode, current)
+    if ok and type(stored) == 'table'
+            and (stored.deleted or (tonumber(stored.version) or -1) >= tonumber(ARGV[2])) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+EVENT_VIEW_TOMBSTONE = json.dumps({"deleted": True})
+
+@local_script(STORE_EVENT_VIEW_SCRIPT)
+def store_event_view_locally(redis, keys, args):
+    try:
+        stored = json.loads(redis.get(keys[0]) or "null")
+    except ValueError:
+        stored = None
+    if isinstance(stored, dict) and (stored.get("deleted") or stored.get("version", -1) >= int(args[1])):
+        return 0
+    redis.set(keys[0], args[0], ex=int(args[2]))
+    return 1
+
+def load_event_view(event_id):
+    """Helper to read an event's read model, None when it is missing or Redis is degraded"""
+    try:
+        cached = get_redis_conn(event_id).get(EVENT_VIEW_KEY(event_id))
+    except (CircuitOpenError,) + REDIS_FAILURES as redis_err:
+        print(f"Warning: Failed to read event view: {redis_err}")
+        return None
+    if cached is None:
+        return None
+    event = json.loads(cached)
+    if event.get("deleted"):
+        return None
+    event.pop("version", None)
+    event["date"] = date.fromisoformat(event["date"]) if event.get("date") else None
+    return event
+
+def store_event_view(event, version, ttl=EVENT_VIEW_TTL_SECONDS):
+    """
+    Helper to write an event's read model at `version` in one round trip,
+    unless Redis already holds that version, a newer one or a delete's
+    tombstone. The check and SET run in one script, so writes committed out
+    of order, or a repair racing an update or delete, can't leave an older
+    view behind
+    """
+    try:
+        get_redis_conn(event["eventID"]).eval(
+            STORE_EVENT_VIEW_SCRIPT, 1, EVENT_VIEW_KEY(event["eventID"]),
+            json.dumps({**event, "version": version}, default=str), version, ttl)
+    except (CircuitOpenError,) + REDIS_FAILURES as redis_err:
+        print(f"Warning: Failed to store event view: {redis_err}")
+
+def drop_event_view(event_id):
+    """Helper to remove an event's read model, so the next read rebuilds it"""
+    try:
+        get_redis_conn(event_id).delete(EVENT_VIEW_KEY(event_id))
+    except (CircuitOpenError,) + REDIS_FAILURES as redis_err:
+        print(f"Warning: Failed to drop event view: {redis_err}")
+
+def written_event(cursor, event_id, custom_fields):
+    """
+    Helper answering a create/update with (event, version) as written, read
+    back on the writing cursor; the caller stores the view after its commit.
+    customFields come from the request because the outbox relay applies
+    them to MongoDB after the response
+    """
+    cursor.execute(EVENT_SQL, (event_id,))
+    event = cursor.fetchone()
+    version = event.pop("version")
+    event["customFields"] = custom_fields or {}
+    return event, version
+
 @app.post("/events")
 def create_event(event_data: dict = Body(...)):
     """
@@ -215,6 +611,7 @@ def create_event(event_data: dict = Body(...)):
         del event_data["eventID"]
     db = mysql_connect()
     cursor = db.cursor(dictionary=True)
+    event_id = None
     try:
         cursor.execute("""
             INSERT INTO Event (name, location, date, time)
@@ -226,49 +623,111 @@ def create_event(event_data: dict = Body(...)):
             event_data.get("time")))
         
         event_id = cursor.lastrowid
-        db.commit()
+        record_changes(cursor, "Event", [event_id])
         custom_fields = event_data.get("customFields", {})
         if custom_fields:
-            try:
-                mongo = get_mongo_db()
-                mongo["event_data"].insert_one({
-                    "eventID": event_id,
-                    "customFields": custom_fields})
-            except Exception as mongo_err:
-                print(f"Warning: Failed to store customFields in MongoDB: {mongo_err}")
+            record_outbox(cursor, event_id, "set_custom_fields", {"customFields": custom_fields})
+        event, version = written_event(cursor, event_id, custom_fields)
+        db.commit()
+        store_event_view(event, version)
+        outbox_relay.notify()
+        invalidate_tags("Event")
         cursor.close()
         db.close()
-        return get_event_data(event_id)
+        return event
     except Exception as e:
         db.rollback()
         cursor.close()
         db.close()
         raise HTTPException(status_code=500, detail=f"Failed to create event: {str(e)}")
 
+CUSTOM_FIELD_OPERATORS = {"$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin", "$exists"}
+
+def build_custom_fields_query(custom_filter: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Translates a {field: value | {operator: value}} filter into a MongoDB
+    query on event_data.customFields (backed by the customFields.$** index)
+    """
+    if not isinstance(custom_filter, dict) or not custom_filter:
+        raise HTTPException(status_code=400, detail="filter must be a non-empty JSON object")
+    query = {}
+    for field, condition in custom_filter.items():
+        if not isinstance(field, str) or not field or field.startswith("$") or ".." in field:
+            raise HTTPException(status_code=400, detail=f"Invalid customFields key: {field!r}")
+        if isinstance(condition, dict):
+            unknown = set(condition) - CUSTOM_FIELD_OPERATORS
+            if unknown or not condition:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsupported filter operator(s) for {field}: {sorted(unknown) or 'none'}")
+        query[f"customFields.{field}"] = condition
+    return query
+
 @app.get("/events")
-def get_all_events():
+def get_all_events(
+        start: Annotated[Optional[date], Query(alias="from")] = None,
+        end: Annotated[Optional[date], Query(alias="to")] = None,
+        limit: Annotated[Optional[int], Query(ge=1)] = None,
+        include: Optional[str] = None,
+        custom_filter: Annotated[Optional[str], Query(alias="filter")] = None):
     """
-    MySQL endpoint to retrieve all events and their information
+    MySQL endpoint to retrieve events and their information, optionally
+    bounded by a from/to date window and a limit. customFields are only
+    attached from MongoDB when requested with include=customFields, and
+    filter (a JSON object such as {"serviceHours": {"$gte": 4}}) restricts
+    the events to those whose customFields match
     """
     try:
-        db = mysql_connect()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("""
+        includes = {i.strip() for i in include.split(",")} if include else set()
+        clauses, params = [], []
+        custom = None
+        if custom_filter:
+            try:
+                spec = json.loads(custom_filter) if isinstance(custom_filter, str) else custom_filter
+            except ValueError:
+                raise HTTPException(status_code=400, detail="filter must be valid JSON")
+            mongo = get_mongo_db()
+            projection = {"_id": 0, "eventID": 1}
+            if "customFields" in includes:
+                projection["customFields"] = 1
+            docs = mongo["event_data"].find(build_custom_fields_query(spec), projection)
+            custom = {d["eventID"]: d.get("customFields", {}) for d in docs}
+            if not custom:
+                return []
+            clauses.append(f"eventID IN ({','.join(['%s'] * len(custom))})")
+            params.extend(custom.keys())
+        if start:
+            clauses.append("date >= %s")
+            params.append(start)
+        if end:
+            clauses.append("date <= %s")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"""
             SELECT eventID, name, location, date, CAST(time AS CHAR) AS time
-            FROM Event ORDER BY date, time;
-        """)
+            FROM Event {where} ORDER BY date, time
+        """
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        db = mysql_connect(read_only=True)
+        cursor = db.cursor(dictionary=True)
+        cursor.execute(query, tuple(params))
         events = cursor.fetchall()
         cursor.close()
         db.close()
-        db = get_mongo_db()
-        for e in events:
-            try:
-                doc = db["event_data"].find_one({"eventID": e["eventID"]}, {"_id": 0})
-                e["customFields"] = doc["customFields"] if doc else {}
-            except Exception as mongo_err:
-                print(f"MongoDB error for event {e['eventID']}: {mongo_err}")
-                e["customFields"] = {}
+        if "customFields" in includes and events:
+            if custom is None:
+                try:
+                    custom = fetch_custom_fields(e["eventID"] for e in events)
+                except Exception as mongo_err:
+                    print(f"MongoDB error fetching customFields: {mongo_err}")
+                    custom = {}
+            for e in events:
+                e["customFields"] = custom.get(e["eventID"], {})
         return events
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_all_events: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch events: {str(e)}")
@@ -276,22 +735,32 @@ def get_all_events():
 @app.get("/events/{event_id}")
 def get_event_data(event_id: int):
     """
-    MongoDB endpoint to retrieve information of a specific event
+    Redis endpoint to retrieve information of a specific event from its
+    read model, rebuilt from MySQL and MongoDB when it is missing
     """
-    db = mysql_connect()
+    event = load_event_view(event_id)
+    if event is not None:
+        return event
+    # From the primary: a lagging replica's row would be stored as the view
+    # of an event whose update has already committed
+    with primary_reads():
+        db = mysql_connect(read_only=True)
     cursor = db.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT eventID, name, location, date, CAST(time AS CHAR) AS time
-        FROM Event WHERE eventID=%s;
-    """, (event_id,))
+    cursor.execute(EVENT_SQL, (event_id,))
     event = cursor.fetchone()
     cursor.close()
     db.close()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    db = get_mongo_db()
-    doc = db["event_data"].find_one({"eventID": event_id}, {"_id": 0})
-    event["customFields"] = doc["customFields"] if doc else {}
+    version = event.pop("version")
+    try:
+        event["customFields"] = fetch_custom_fields([event_id], fallback=False).get(event_id, {})
+    except (CircuitOpenError,) + MONGO_FAILURES as mongo_err:
+        # Last-known values are served but not stored in the read model
+        print(f"MongoDB degraded, serving last-known customFields: {mongo_err}")
+        event["customFields"] = custom_fields_cache.get_many([event_id]).get(event_id, {})
+        return event
+    store_event_view(event, version, EVENT_VIEW_REPAIR_TTL_SECONDS)
     return event
 
 @app.api_route("/events/{event_id}", methods=["PUT"])
@@ -302,12 +771,9 @@ def update_event(event_id: int, event_data: Dict[str, Any] = Body(...)):
     db = mysql_connect()
     cursor = db.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Event not found")
         cursor.execute("""
             UPDATE Event 
-            SET name=%s, location=%s, date=%s, time=%s
+            SET name=%s, location=%s, date=%s, time=%s, version=version+1
             WHERE eventID=%s
         """, (
             event_data.get("name"),
@@ -315,25 +781,21 @@ def update_event(event_id: int, event_data: Dict[str, Any] = Body(...)):
             event_data.get("date"),
             event_data.get("time"),
             event_id))
-        db.commit()
+        if not cursor.rowcount:
+            cursor.close()
+            db.close()
+            raise HTTPException(status_code=404, detail="Event not found")
+        record_changes(cursor, "Event", [event_id])
         custom_fields = event_data.get("customFields", {})
-        mongo = get_mongo_db()
-        existing_doc = mongo["event_data"].find_one({"eventID": event_id})
-        if custom_fields:
-            if existing_doc:
-                mongo["event_data"].update_one(
-                    {"eventID": event_id},
-                    {"$set": {"customFields": custom_fields}})
-            else:
-                mongo["event_data"].insert_one({
-                    "eventID": event_id,
-                    "customFields": custom_fields})
-        else:
-            if existing_doc:
-                mongo["event_data"].delete_one({"eventID": event_id})
+        record_outbox(cursor, event_id, "set_custom_fields", {"customFields": custom_fields})
+        event, version = written_event(cursor, event_id, custom_fields)
+        db.commit()
+        store_event_view(event, version)
+        outbox_relay.notify()
+        invalidate_tags("Event")
         cursor.close()
         db.close()
-        return get_event_data(event_id)
+        return event
     except HTTPException:
         raise
     except Exception as e:
@@ -350,14 +812,36 @@ def delete_event(event_id: int):
     db = mysql_connect()
     cursor = db.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Event not found")
+        # Registrations go with the event (ON DELETE CASCADE), so log them too
+        cursor.execute("""
+            INSERT INTO ChangeLog (entity, entityKey, operation)
+            SELECT 'Registration', CONCAT(studentID, ':', eventID), 'delete'
+            FROM Registration WHERE eventID=%s
+        """, (event_id,))
+        record_changes(cursor, "Event", [event_id], "delete")
+        record_changes(cursor, "EventCustomFields", [event_id], "delete")
+        record_outbox(cursor, event_id, "delete_event")
         cursor.execute("DELETE FROM Event WHERE eventID=%s;", (event_id,))
+        if not cursor.rowcount:
+            # Nothing was deleted, so drop the log and outbox rows written above
+            db.rollback()
+            cursor.close()
+            db.close()
+            raise HTTPException(status_code=404, detail="Event not found")
         db.commit()
-        mongo = get_mongo_db()
-        mongo["event_data"].delete_many({"eventID": event_id})
-        mongo["walk_ins"].delete_many({"eventID": event_id})
+        outbox_relay.notify()
+        try:
+            pipe = get_redis_conn(event_id).pipeline()
+            pipe.delete(CHECKED_IN_KEY(event_id), ATTENDEES_KEY(event_id), NAMES_KEY(event_id))
+            # A tombstone, not a DEL: a repair that read the row before the
+            # delete committed must not bring the view back
+            pipe.set(EVENT_VIEW_KEY(event_id), EVENT_VIEW_TOMBSTONE, ex=EVENT_VIEW_TTL_SECONDS)
+            pipe.srem(LIVE_EVENTS_KEY, str(event_id))
+            pipe.execute()
+        except (CircuitOpenError,) + REDIS_FAILURES as redis_err:
+            # The housekeeping sweep removes keys of deleted events later
+            print(f"Warning: Failed to delete event keys: {redis_err}")
+        invalidate_tags("Event", f"Attendance:{event_id}", f"LiveAttendance:{event_id}", "LiveOverview")
         cursor.close()
         db.close()
         return {"message": "Event deleted successfully", "eventID": event_id}
@@ -377,7 +861,7 @@ def get_student_attendance_history(student_id: int):
     """
     MongoDB endpoint to retrieve attendance history for a specific student
     """
-    db = mysql_connect()
+    db = mysql_connect(read_only=True)
     cursor = db.cursor(dictionary=True)
     try:
         cursor.execute("SELECT studentID FROM Student WHERE studentID=%s;", (student_id,))
@@ -467,25 +951,43 @@ def get_student_attendance_history(student_id: int):
 # -----------
 CHECKED_IN_KEY = lambda eid: f"event:{eid}:checkedIn"
 ATTENDEES_KEY = lambda eid: f"event:{eid}:attendees"
+# studentID -> "First Last" of everyone checked in, so live views need no MySQL
+NAMES_KEY = lambda eid: f"event:{eid}:names"
+# Index of events with live attendance sets, so /live needs no key scan
+LIVE_EVENTS_KEY = "events:live"
+# Live keys expire on their own if an event is never finalized
+LIVE_KEY_TTL_SECONDS = int(os.getenv("LIVE_KEY_TTL_SECONDS", str(2 * 24 * 3600)))
 
 @app.post("/events/{event_id}/checkin/{student_id}")
 def check_in(event_id: int, student_id: int):
     """
     Redis endpoint to check a specific student into a specific event
     """
-    db = mysql_connect()
+    # Only reads MySQL, so a replica will do and the kiosk's reads stay unpinned
+    db = mysql_connect(read_only=True)
     cur = db.cursor(dictionary=True)
-    cur.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
-    if not cur.fetchone():
-        raise HTTPException(status_code=404, detail="Event not found")
-    cur.execute("SELECT studentID FROM Student WHERE studentID=%s;", (student_id,))
-    if not cur.fetchone():
-        raise HTTPException(status_code=404, detail="Student not found")
+    # Validates both rows and reads the name for the live views in one query
+    cur.execute("""
+        SELECT EXISTS(SELECT 1 FROM Event WHERE eventID=%s) AS eventExists,
+               (SELECT CONCAT(firstName, ' ', lastName) FROM Student WHERE studentID=%s) AS name
+    """, (event_id, student_id))
+    row = cur.fetchone()
     cur.close()
     db.close()
-    r = get_redis_conn()
-    r.sadd(CHECKED_IN_KEY(event_id), str(student_id))
-    r.sadd(ATTENDEES_KEY(event_id), str(student_id))
+    if not row["eventExists"]:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if row["name"] is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    pipe = get_redis_conn(event_id).pipeline()
+    pipe.sadd(CHECKED_IN_KEY(event_id), str(student_id))
+    pipe.sadd(ATTENDEES_KEY(event_id), str(student_id))
+    pipe.hset(NAMES_KEY(event_id), str(student_id), row["name"])
+    pipe.expire(CHECKED_IN_KEY(event_id), LIVE_KEY_TTL_SECONDS)
+    pipe.expire(ATTENDEES_KEY(event_id), LIVE_KEY_TTL_SECONDS)
+    pipe.expire(NAMES_KEY(event_id), LIVE_KEY_TTL_SECONDS)
+    pipe.sadd(LIVE_EVENTS_KEY, str(event_id))
+    pipe.execute()
+    invalidate_tags(f"LiveAttendance:{event_id}", "LiveOverview")
     return {"message": "checked in", "eventID": event_id, "studentID": student_id}
 
 @app.post("/events/{event_id}/checkout/{student_id}")
@@ -493,10 +995,9 @@ def check_out(event_id: int, student_id: int):
     """
     Redis endpoint to check a specific student out of a specific event
     """
-    r = get_redis_conn()
-    if not r.sismember(CHECKED_IN_KEY(event_id), str(student_id)):
+    if not get_redis_conn(event_id).srem(CHECKED_IN_KEY(event_id), str(student_id)):
         raise HTTPException(status_code=400, detail="Student is not checked in")
-    r.srem(CHECKED_IN_KEY(event_id), str(student_id))
+    invalidate_tags(f"LiveAttendance:{event_id}", "LiveOverview")
     return {"message": "checked out", "eventID": event_id, "studentID": student_id}
 
 @app.get("/events/{event_id}/live")
@@ -504,79 +1005,190 @@ def live_attendance(event_id: int):
     """
     Redis endpoint to retrieve the live attendance of a specific event
     """
-    r = get_redis_conn()
-    raw = r.smembers(CHECKED_IN_KEY(event_id))
+    pipe = get_redis_conn(event_id).pipeline()
+    pipe.smembers(CHECKED_IN_KEY(event_id))
+    pipe.hgetall(NAMES_KEY(event_id))
+    raw, names = pipe.execute()
     ids = sorted(int(x) for x in raw)
-    checked_in_students = []
-    if ids:
-        db = mysql_connect()
-        cursor = db.cursor(dictionary=True)
-        placeholders = ','.join(['%s'] * len(ids))
-        cursor.execute(f"SELECT studentID, firstName, lastName FROM Student WHERE studentID IN ({placeholders})",ids)
-        students = cursor.fetchall()
-        cursor.close()
-        db.close()
-        student_map = {s["studentID"]: f"{s['firstName']} {s['lastName']}" for s in students}
-        checked_in_students = [{
-                "studentID": sid,
-                "name": student_map.get(sid, f"Student {sid}")
-            }for sid in ids]
+    student_map = live_names({event_id: (ids, names)})[event_id]
+    checked_in_students = [{
+            "studentID": sid,
+            "name": student_map[sid]
+        }for sid in ids]
     return {
         "eventID": event_id,
         "checkedIn": ids,
         "count": len(ids),
         "checkedInStudents": checked_in_students}
 
+def live_names(events):
+    """
+    Helper mapping {eventID: (studentIDs, names hash)} to {eventID:
+    {studentID: name}}. Check-ins write their student's name into the hash,
+    so misses only come from live sets older than it; those are read from
+    MySQL in one query and written back
+    """
+    missing = {sid for ids, names in events.values() for sid in ids if str(sid) not in names}
+    fetched = fetch_student_names(sorted(missing)) if missing else {}
+    for event_id, (ids, names) in events.items():
+        backfill = {str(sid): fetched[sid] for sid in ids if str(sid) not in names and sid in fetched}
+        if backfill:
+            pipe = get_redis_conn(event_id).pipeline()
+            pipe.hset(NAMES_KEY(event_id), mapping=backfill)
+            pipe.expire(NAMES_KEY(event_id), LIVE_KEY_TTL_SECONDS)
+            pipe.execute()
+            names.update(backfill)
+    return {
+        event_id: {sid: names.get(str(sid), f"Student {sid}") for sid in ids}
+        for event_id, (ids, names) in events.items()}
+
+def fetch_student_names(student_ids):
+    """Helper to map studentIDs to "First Last" with one query"""
+    if not student_ids:
+        return {}
+    db = mysql_connect(read_only=True)
+    cursor = db.cursor(dictionary=True)
+    placeholders = ','.join(['%s'] * len(student_ids))
+    cursor.execute(
+        f"SELECT studentID, firstName, lastName FROM Student WHERE studentID IN ({placeholders})",
+        tuple(student_ids))
+    students = cursor.fetchall()
+    cursor.close()
+    db.close()
+    return {s["studentID"]: f"{s['firstName']} {s['lastName']}" for s in students}
+
+@app.get("/live")
+def live_overview(names: bool = False):
+    """
+    Redis endpoint to retrieve live attendance counts (and optionally
+    names) of every active event in one round trip per Redis node
+    """
+    live, hashes = [], {}
+    for node, r in redis_nodes():
+        # Keys a node holds for events it no longer owns wait for the rebalance job
+        event_ids = sorted(e for e in (int(x) for x in r.smembers(LIVE_EVENTS_KEY)) if redis_shards.owns(node, e))
+        pipe = r.pipeline()
+        for event_id in event_ids:
+            if names:
+                pipe.smembers(CHECKED_IN_KEY(event_id))
+                pipe.hgetall(NAMES_KEY(event_id))
+            else:
+                pipe.scard(CHECKED_IN_KEY(event_id))
+            pipe.exists(ATTENDEES_KEY(event_id))
+        results = pipe.execute() if event_ids else []
+        per_event = 3 if names else 2
+        ended = []
+        for i, event_id in enumerate(event_ids):
+            checked_in, started = results[per_event * i], results[per_event * i + per_event - 1]
+            if not started:
+                # Live sets expired or were cleared without updating the index
+                ended.append(event_id)
+                continue
+            if names:
+                ids = sorted(int(x) for x in checked_in)
+                hashes[event_id] = (ids, results[per_event * i + 1])
+                live.append({"eventID": event_id, "checkedIn": ids, "count": len(ids)})
+            else:
+                live.append({"eventID": event_id, "checkedIn": [], "count": checked_in})
+        if ended:
+            unindex_ended(r, LIVE_EVENTS_KEY, ATTENDEES_KEY, ended)
+    live.sort(key=lambda e: e["eventID"])
+    if names:
+        student_maps = live_names(hashes)
+        for e in live:
+            e["checkedInStudents"] = [
+                {"studentID": sid, "name": student_maps[e["eventID"]][sid]}
+                for sid in e["checkedIn"]]
+    return {
+        "events": live,
+        "totalCheckedIn": sum(e["count"] for e in live)}
+
 # --------------------------
 # FINALIZE EVENT
 # --------------------------
-@app.post("/events/{event_id}/finalize")
-def finalize_event(event_id: int):
+FINALIZE_WORKERS = int(os.getenv("FINALIZE_WORKERS", "2"))
+FINALIZE_MAX_PENDING = int(os.getenv("FINALIZE_MAX_PENDING", "50"))
+FINALIZE_MAX_ATTEMPTS = int(os.getenv("FINALIZE_MAX_ATTEMPTS", "5"))
+FINALIZE_STEPS = ("locking", "snapshot", "writing", "cleanup")
+
+# Attendee set being finalized, moved aside so new check-ins can't be lost
+FINALIZING_KEY = lambda eid: f"event:{eid}:finalizing"
+FINALIZE_LOCK_NAME = lambda eid: f"youth_group_finalize_{eid}"
+
+# Finalizations run as background jobs, at most FINALIZE_WORKERS at once
+finalize_jobs = JobQueue(
+    "finalize",
+    workers=FINALIZE_WORKERS,
+    max_pending=FINALIZE_MAX_PENDING,
+    max_attempts=FINALIZE_MAX_ATTEMPTS,
+    retry_on=(mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError,
+              redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, CircuitOpenError))
+
+def run_finalize(event_id, progress):
     """
-    Trifecta endpoint to finalize attendance of a specific event
+    Helper to finalize an event's live attendance (the body of a finalize
+    job). A MySQL named lock keeps one finalization per event across
+    worker processes. The live attendee set is first merged into a
+    finalizing snapshot, so a retry after a failure picks up the same
+    attendees and an event with nothing live is left as it is
     """
+    def step(name, **fields):
+        progress(step=name, stepsDone=FINALIZE_STEPS.index(name), steps=len(FINALIZE_STEPS), **fields)
+
+    step("locking")
     db = mysql_connect()
     cur = db.cursor(dictionary=True)
-    cur.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
-    if not cur.fetchone():
-        raise HTTPException(status_code=404, detail="Event not found")
-    r = get_redis_conn()
-    redis_raw = r.smembers(ATTENDEES_KEY(event_id))
-    attendees = sorted(int(x) for x in redis_raw)
-    cur.execute("DELETE FROM Attendance WHERE eventID=%s;", (event_id,))
-    mongo = get_mongo_db()
-    mongo["walk_ins"].delete_many({"eventID": event_id})
-    registered = []
-    walk_ins = []
-    unique_attendees = sorted(set(attendees))
-    for sid in unique_attendees:
-        cur.execute("SELECT 1 FROM Attendance WHERE studentID=%s AND eventID=%s;", (sid, event_id))
-        already_registered = cur.fetchone()
-        cur.execute("SELECT 1 FROM Registration WHERE studentID=%s AND eventID=%s;",
-                    (sid, event_id))
-        is_registered = cur.fetchone()
-        if is_registered:
-            if not already_registered:
+    try:
+        cur.execute("SELECT GET_LOCK(%s, 0) AS locked", (FINALIZE_LOCK_NAME(event_id),))
+        if not cur.fetchone()["locked"]:
+            raise RetryLater(f"Event {event_id} is being finalized by another worker")
+        try:
+            cur.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
+            if not cur.fetchone():
+                raise ValueError(f"Event {event_id} not found")
+            step("snapshot")
+            r = get_redis_conn(event_id)
+            pipe = r.pipeline()
+            pipe.sunionstore(FINALIZING_KEY(event_id), [FINALIZING_KEY(event_id), ATTENDEES_KEY(event_id)])
+            pipe.delete(ATTENDEES_KEY(event_id), CHECKED_IN_KEY(event_id), NAMES_KEY(event_id))
+            pipe.expire(FINALIZING_KEY(event_id), LIVE_KEY_TTL_SECONDS)
+            pipe.smembers(FINALIZING_KEY(event_id))
+            attendees = sorted(int(x) for x in pipe.execute()[-1])
+            registered, walk_ins = [], []
+            if attendees:
+                step("writing", attendees=len(attendees))
+                placeholders = ','.join(['%s'] * len(attendees))
                 cur.execute(
-                    "INSERT INTO Attendance (studentID, eventID, checkInTime) VALUES (%s, %s, NOW())",
-                    (sid, event_id))
-            registered.append(sid)
-        else:
-            existing_walkin = mongo["walk_ins"].find_one({"eventID": event_id, "studentID": sid})
-            if not existing_walkin:
-                mongo["walk_ins"].insert_one({
-                    "eventID": event_id,
-                    "studentID": sid,
-                    "checkInTime": datetime.now()})
-            walk_ins.append(sid)
-    db.commit()
-    cur.close()
-    db.close()
-    r = get_redis_conn()
-    r.delete(CHECKED_IN_KEY(event_id))
-    r.delete(ATTENDEES_KEY(event_id))
+                    f"SELECT studentID FROM Registration WHERE eventID=%s AND studentID IN ({placeholders})",
+                    (event_id, *attendees))
+                registered_ids = {row["studentID"] for row in cur.fetchall()}
+                registered = [sid for sid in attendees if sid in registered_ids]
+                walk_ins = [sid for sid in attendees if sid not in registered_ids]
+                cur.execute("DELETE FROM Attendance WHERE eventID=%s;", (event_id,))
+                if registered:
+                    cur.executemany(
+                        "INSERT INTO Attendance (studentID, eventID, checkInTime) VALUES (%s, %s, NOW())",
+                        [(sid, event_id) for sid in registered])
+                checked_in_at = datetime.now().isoformat()
+                record_outbox(cur, event_id, "replace_walk_ins", {
+                    "walkIns": [{"studentID": sid, "checkInTime": checked_in_at} for sid in walk_ins]})
+                db.commit()
+                outbox_relay.notify()
+            step("cleanup", attendees=len(attendees))
+            r.delete(FINALIZING_KEY(event_id))
+            unindex_ended(r, LIVE_EVENTS_KEY, ATTENDEES_KEY, [event_id])
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (FINALIZE_LOCK_NAME(event_id),))
+            cur.fetchall()
+    finally:
+        cur.close()
+        db.close()
+    invalidate_tags(f"Attendance:{event_id}", f"LiveAttendance:{event_id}", "LiveOverview")
     return {
-        "message": "Event finalized successfully",
+        "message": "Event finalized successfully" if attendees else "No live attendance to finalize",
         "eventID": event_id,
         "registeredSaved": registered,
         "walkInsLogged": walk_ins,
@@ -584,6 +1196,50 @@ def finalize_event(event_id: int):
         "totalWalkIns": len(walk_ins),
         "totalAttendees": len(registered) + len(walk_ins)}
 
+def submit_finalize(event_id):
+    """
+    Helper to queue a finalize job for an event, or return the one already
+    queued or running for it
+    """
+    db = mysql_connect(read_only=True)
+    cur = db.cursor()
+    cur.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
+    found = cur.fetchone()
+    cur.close()
+    db.close()
+    if not found:
+        raise HTTPException(status_code=404, detail="Event not found")
+    try:
+        job, _ = finalize_jobs.submit(
+            "finalize", event_id, lambda progress: run_finalize(event_id, progress), eventID=event_id)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return job
+
+@app.post("/events/{event_id}/finalize", status_code=202)
+def finalize_event(event_id: int, response: Response):
+    """
+    Trifecta endpoint to finalize attendance of a specific event. The work
+    is queued as a background job; poll the returned statusURL for its
+    progress and result. Finalizing an event that already has a job
+    queued or running returns that job
+    """
+    job = submit_finalize(event_id)
+    job["statusURL"] = f"/jobs/{job['jobID']}"
+    response.headers["Location"] = job["statusURL"]
+    return job
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Endpoint to report a background job's status (queued, running,
+    retrying, succeeded or failed), progress, and result or error
+    """
+    job = finalize_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 # --------------------------
 # VIEW FINALIZED ATTENDANCE
 # --------------------------
@@ -593,7 +1249,7 @@ def get_finalized_attendance_view(event_id: int):
     """
     Trifecta endpoint to retrieve finalize attendance of a specific event
     """
-    db = mysql_connect()
+    db = mysql_connect(read_only=True)
     cur = db.cursor(dictionary=True)
     cur.execute("SELECT eventID, name, date, time FROM Event WHERE eventID=%s;", (event_id,))
     event = cur.fetchone()
@@ -610,17 +1266,10 @@ def get_finalized_attendance_view(event_id: int):
     """, (event_id,))
     registered = cur.fetchall()
     mongo = get_mongo_db()
-    walkins_raw = list(mongo["walk_ins"].find({"eventID": event_id}, {"_id": 0}))
-    walkins_dict = {}
-    for w in walkins_raw:
-        student_id = w["studentID"]
-        if student_id not in walkins_dict:
-            walkins_dict[student_id] = w
-        else:
-            existing_time = walkins_dict[student_id].get("checkInTime")
-            new_time = w.get("checkInTime")
-            if new_time and (not existing_time or new_time < existing_time):
-                walkins_dict[student_id] = w
+    # walk_ins is unique per (eventID, studentID); see compact_walk_ins
+    walkins_dict = {
+        w["studentID"]: w
+        for w in mongo["walk_ins"].find({"eventID": event_id}, {"_id": 0}, sort=[("studentID", 1)])}
     walkin_ids = list(walkins_dict.keys())
     walkin_students = {}
     if walkin_ids:
@@ -642,7 +1291,7 @@ def get_finalized_attendance_view(event_id: int):
             "isWalkIn": True})
     cur.close()
     db.close()
-    r = get_redis_conn()
+    r = get_redis_conn(event_id)
     has_redis_data = r.exists(CHECKED_IN_KEY(event_id)) or r.exists(ATTENDEES_KEY(event_id))
     has_finalized_data = len(registered) > 0 or len(walkins_list) > 0
     if not has_redis_data and not has_finalized_data:
@@ -689,7 +1338,7 @@ def get_student_registrations(student_id: int):
     """
     MySQL endpoint to retrieve registration statuses for a specific student
     """
-    db = mysql_connect()
+    db = mysql_connect(read_only=True)
     cursor = db.cursor(dictionary=True)
     try:
         cursor.execute("SELECT studentID FROM Student WHERE studentID=%s;", (student_id,))
@@ -720,25 +1369,28 @@ def register_student(student_id: int, event_id: int):
     db = mysql_connect()
     cursor = db.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT studentID FROM Student WHERE studentID=%s;", (student_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Student not found")
-        cursor.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Event not found")
-        cursor.execute("""
-            SELECT 1 FROM Registration 
-            WHERE studentID=%s AND eventID=%s
-        """, (student_id, event_id))
-        if cursor.fetchone():
+        try:
+            cursor.execute("""
+                INSERT IGNORE INTO Registration (studentID, eventID)
+                VALUES (%s, %s)
+            """, (student_id, event_id))
+            inserted = cursor.rowcount
+        except mysql.connector.errors.IntegrityError:
+            # MySQL's IGNORE turns a missing student or event (error 1452)
+            # into a warning and a zero rowcount, but SQLite's OR IGNORE
+            # doesn't cover foreign keys, so the embedded backend raises
+            inserted = 0
+        if not inserted:
+            missing = missing_rows(cursor, ("Student", (student_id,)), ("Event", (event_id,)))
+            db.rollback()
             cursor.close()
             db.close()
+            if missing:
+                raise HTTPException(status_code=404, detail=f"{missing[0]} not found")
             return {"message": "Student already registered for this event", "studentID": student_id, "eventID": event_id}
-        cursor.execute("""
-            INSERT INTO Registration (studentID, eventID)
-            VALUES (%s, %s)
-        """, (student_id, event_id))
+        record_changes(cursor, "Registration", [f"{student_id}:{event_id}"])
         db.commit()
+        invalidate_tags("Registration")
         cursor.close()
         db.close()
         return {"message": "Student registered successfully", "studentID": student_id, "eventID": event_id}
@@ -758,25 +1410,21 @@ def unregister_student(student_id: int, event_id: int):
     db = mysql_connect()
     cursor = db.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT studentID FROM Student WHERE studentID=%s;", (student_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Student not found")
-        cursor.execute("SELECT eventID FROM Event WHERE eventID=%s;", (event_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Event not found")
         cursor.execute("""
-            SELECT 1 FROM Registration 
+            DELETE FROM Registration 
             WHERE studentID=%s AND eventID=%s
         """, (student_id, event_id))
-        if not cursor.fetchone():
+        if not cursor.rowcount:
+            missing = missing_rows(cursor, ("Student", (student_id,)), ("Event", (event_id,)))
+            db.rollback()
             cursor.close()
             db.close()
+            if missing:
+                raise HTTPException(status_code=404, detail=f"{missing[0]} not found")
             return {"message": "Student not registered for this event", "studentID": student_id, "eventID": event_id}
-        cursor.execute("""
-            DELETE FROM Registration 
-            WHERE studentID=%s AND eventID=%s
-        """, (student_id, event_id))
+        record_changes(cursor, "Registration", [f"{student_id}:{event_id}"], "delete")
         db.commit()
+        invalidate_tags("Registration")
         cursor.close()
         db.close()
         return {"message": "Student unregistered successfully", "studentID": student_id, "eventID": event_id}
@@ -788,6 +1436,590 @@ def unregister_student(student_id: int, event_id: int):
         db.close()
         raise HTTPException(status_code=500, detail=f"Failed to unregister student: {str(e)}")
 
+# --------------------------
+# BULK REGISTRATIONS
+# --------------------------
+MAX_BULK_REGISTRATIONS = int(os.getenv("MAX_BULK_REGISTRATIONS", "5000"))
+
+def check_bulk_size(count):
+    """Helper rejecting a bulk registration of more than MAX_BULK_REGISTRATIONS rows with a 413"""
+    if count > MAX_BULK_REGISTRATIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BULK_REGISTRATIONS} registrations per request")
+
+def cross_registrations(student_ids, event_ids):
+    """
+    Helper pairing every student with every event, sized before the cross
+    product is built, so an oversized request never allocates it
+    """
+    check_bulk_size(len(student_ids) * len(event_ids))
+    return [(sid, eid) for eid in event_ids for sid in student_ids]
+
+def bulk_register(pairs):
+    """
+    Registers many (studentID, eventID) pairs in one transaction: a single
+    query validates both foreign keys and finds existing registrations,
+    then one multi-row INSERT IGNORE writes the rest. Returns per-row results
+    """
+    check_bulk_size(len(pairs))
+    results = [
+        {"row": i, "studentID": sid, "eventID": eid, "status": "invalid"}
+        for i, (sid, eid) in enumerate(pairs, start=1)]
+    valid = [r for r in results if type(r["studentID"]) is int and type(r["eventID"]) is int]
+    if valid:
+        student_ids = sorted({r["studentID"] for r in valid})
+        event_ids = sorted({r["eventID"] for r in valid})
+        s_ph = ','.join(['%s'] * len(student_ids))
+        e_ph = ','.join(['%s'] * len(event_ids))
+        db = mysql_connect()
+        cursor = db.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT 'student', studentID, NULL FROM Student WHERE studentID IN ({s_ph})
+                UNION ALL
+                SELECT 'event', eventID, NULL FROM Event WHERE eventID IN ({e_ph})
+                UNION ALL
+                SELECT 'registration', studentID, eventID FROM Registration
+                WHERE studentID IN ({s_ph}) AND eventID IN ({e_ph})
+            """, (*student_ids, *event_ids, *student_ids, *event_ids))
+            students, events, existing = set(), set(), set()
+            for kind, first_id, second_id in cursor.fetchall():
+                if kind == "student":
+                    students.add(first_id)
+                elif kind == "event":
+                    events.add(first_id)
+                else:
+                    existing.add((first_id, second_id))
+            to_insert = []
+            for r in valid:
+                pair = (r["studentID"], r["eventID"])
+                if r["studentID"] not in students:
+                    r["status"] = "student_not_found"
+                elif r["eventID"] not in events:
+                    r["status"] = "event_not_found"
+                elif pair in existing:
+                    r["status"] = "already_registered"
+                else:
+                    r["status"] = "registered"
+                    existing.add(pair)
+                    to_insert.append(pair)
+            if to_insert:
+                cursor.execute(f"""
+                    INSERT IGNORE INTO Registration (studentID, eventID)
+                    VALUES {','.join(['(%s, %s)'] * len(to_insert))}
+                """, tuple(v for pair in to_insert for v in pair))
+                record_changes(cursor, "Registration", [f"{sid}:{eid}" for sid, eid in to_insert])
+            db.commit()
+            invalidate_tags("Registration")
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Failed to register students: {str(e)}")
+        finally:
+            cursor.close()
+            db.close()
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return {
+        "message": "Bulk registration complete",
+        "totalRows": len(results),
+        "registered": counts.get("registered", 0),
+        "alreadyRegistered": counts.get("already_registered", 0),
+        "failed": len(results) - counts.get("registered", 0) - counts.get("already_registered", 0),
+        "results": results}
+
+@app.post("/registrations/bulk")
+def bulk_register_students(payload: Dict[str, Any] = Body(...)):
+    """
+    MySQL endpoint to register many students for one or more events, given
+    either {"studentIDs": [...], "eventIDs": [...]} (every student for every
+    event) or {"registrations": [{"studentID": .., "eventID": ..}, ...]}
+    """
+    if "registrations" in payload:
+        registrations = payload["registrations"]
+        if not isinstance(registrations, list) or not all(isinstance(r, dict) for r in registrations):
+            raise HTTPException(
+                status_code=400,
+                detail='registrations must be a list of {"studentID": .., "eventID": ..} objects')
+        pairs = [(r.get("studentID"), r.get("eventID")) for r in registrations]
+    else:
+        for key in ("studentIDs", "eventIDs"):
+            if not isinstance(payload.get(key, []), list):
+                raise HTTPException(status_code=400, detail=f"{key} must be a list")
+        pairs = cross_registrations(payload.get("studentIDs", []), payload.get("eventIDs", []))
+    if not pairs:
+        raise HTTPException(status_code=400, detail="No registrations given")
+    return bulk_register(pairs)
+
+@app.post("/registrations/import")
+async def import_registrations(request: Request):
+    """
+    MySQL endpoint to register students from a CSV upload (request body)
+    with a studentID,eventID header row
+    """
+    try:
+        text = (await request.body()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    reader = csv.DictReader(io.StringIO(text))
+    pairs = []
+    try:
+        if not reader.fieldnames or not {"studentID", "eventID"} <= set(reader.fieldnames):
+            raise HTTPException(status_code=400, detail="CSV must have studentID and eventID columns")
+        for row in reader:
+            pair = []
+            for column in ("studentID", "eventID"):
+                try:
+                    pair.append(int((row.get(column) or "").strip()))
+                except ValueError:
+                    pair.append(row.get(column))
+            pairs.append(tuple(pair))
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Malformed CSV: {e}")
+    if not pairs:
+        raise HTTPException(status_code=400, detail="CSV has no rows")
+    return await run_in_threadpool(bulk_register, pairs)
+
+# --------------------------
+# ATTENDANCE EXPORT
+# --------------------------
+@app.get("/export/attendance")
+def export_attendance(
+        fmt: Annotated[str, Query(alias="format", pattern="^(csv|parquet)$")] = "csv"):
+    """
+    Trifecta endpoint to export every attendance record (registered and
+    walk-in) across all events in event order, streamed as CSV or Parquet
+    """
+    rows = iter_attendance_rows(lambda: mysql_connect(read_only=True), get_mongo_db())
+    if fmt == "csv":
+        return StreamingResponse(
+            iter_csv_chunks(rows),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="attendance.csv"'})
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Parquet export requires the pyarrow package")
+    # Parquet writes its footer last, so spool row groups to disk and stream the file
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        write_parquet(rows, path)
+    except Exception as e:
+        os.remove(path)
+        raise HTTPException(status_code=500, detail=f"Failed to export attendance: {str(e)}")
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename="attendance.parquet",
+        background=BackgroundTask(os.remove, path))
+
+# --------------------------
+# GROUP ATTENDANCE MATRIX
+# --------------------------
+@app.get("/groups/{group_id}/attendance-matrix")
+def get_group_attendance_matrix(
+        group_id: int,
+        start: Annotated[Optional[date], Query(alias="from")] = None,
+        end: Annotated[Optional[date], Query(alias="to")] = None):
+    """
+    Trifecta endpoint to build a students x events attendance matrix for a
+    small group over a date window (to defaults to today, so upcoming
+    events don't count as no-shows), with per-student and per-event rates.
+    Registrations, attendance and walk-ins are each fetched in one query
+    """
+    end = end or datetime.now().date()
+    clauses, params = ["e.date <= %s"], [end]
+    if start:
+        clauses.append("e.date >= %s")
+        params.append(start)
+    window = " AND ".join(clauses)
+    db = mysql_connect(read_only=True)
+    cursor = db.cursor(dictionary=True)
+    pairs = db.cursor()
+    try:
+        cursor.execute("SELECT groupID, name FROM SmallGroup WHERE groupID=%s;", (group_id,))
+        group = cursor.fetchone()
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found")
+        cursor.execute("""
+            SELECT studentID, firstName, lastName FROM Student
+            WHERE groupID=%s ORDER BY lastName, firstName, studentID
+        """, (group_id,))
+        students = cursor.fetchall()
+        cursor.execute(f"""
+            SELECT e.eventID, e.name, e.date, CAST(e.time AS CHAR) AS time
+            FROM Event e WHERE {window} ORDER BY e.date, e.time, e.eventID
+        """, tuple(params))
+        events = cursor.fetchall()
+        pairs.execute(f"""
+            SELECT r.studentID, r.eventID FROM Registration r
+            JOIN Student s ON r.studentID = s.studentID
+            JOIN Event e ON r.eventID = e.eventID
+            WHERE s.groupID = %s AND {window}
+        """, (group_id, *params))
+        registrations = pairs.fetchall()
+        pairs.execute(f"""
+            SELECT DISTINCT a.studentID, a.eventID FROM Attendance a
+            JOIN Student s ON a.studentID = s.studentID
+            JOIN Event e ON a.eventID = e.eventID
+            WHERE s.groupID = %s AND {window}
+        """, (group_id, *params))
+        attendance = pairs.fetchall()
+    finally:
+        pairs.close()
+        cursor.close()
+        db.close()
+    student_ids = [s["studentID"] for s in students]
+    event_ids = [e["eventID"] for e in events]
+    walk_ins = []
+    if student_ids and event_ids:
+        walk_ins = [
+            (w["studentID"], w["eventID"])
+            for w in get_mongo_db()["walk_ins"].find(
+                {"eventID": {"$in": event_ids}, "studentID": {"$in": student_ids}},
+                {"_id": 0, "studentID": 1, "eventID": 1})]
+    for e in events:
+        e["date"] = str(e["date"])
+    matrix = build_matrix(student_ids, event_ids, registrations, attendance, walk_ins)
+    report = matrix_report(students, events, matrix)
+    return {"groupID": group["groupID"], "name": group["name"], "from": start, "to": end, **report}
+
+# --------------------------
+# DELTA SYNC
+# --------------------------
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "1000"))
+SYNC_SNAPSHOT_THRESHOLD = int(os.getenv("SYNC_SNAPSHOT_THRESHOLD", "5000"))
+# changeIDs are taken at INSERT but become visible at COMMIT, so an ID
+# missing below a visible one may belong to a transaction still in flight.
+# ChangeLog writes must commit within this many seconds; an older gap is a
+# rollback and is skipped, a younger one holds the version back
+SYNC_GAP_SECONDS = int(os.getenv("SYNC_GAP_SECONDS", "30"))
+SYNC_ENTITIES = {
+    "Student": "students",
+    "Event": "events",
+    "Registration": "registrations",
+    "EventCustomFields": "customFields"}
+
+def fetch_events_by_id(event_ids=None):
+    """Helper to load event core columns, optionally limited to the given IDs"""
+    where, params = "", ()
+    if event_ids is not None:
+        if not event_ids:
+            return []
+        where = f"WHERE eventID IN ({','.join(['%s'] * len(event_ids))})"
+        params = tuple(event_ids)
+    db = mysql_connect(read_only=True)
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT eventID, name, location, date, CAST(time AS CHAR) AS time
+        FROM Event {where} ORDER BY date, time
+    """, params)
+    events = cursor.fetchall()
+    cursor.close()
+    db.close()
+    return events
+
+def sync_snapshot(version):
+    """Full copy of everything a kiosk caches, valid as of `version`"""
+    db = mysql_connect(read_only=True)
+    cursor = db.cursor()
+    cursor.execute("SELECT studentID, eventID FROM Registration;")
+    registrations = [list(r) for r in cursor.fetchall()]
+    cursor.close()
+    db.close()
+    docs = get_mongo_db()["event_data"].find({}, {"_id": 0, "eventID": 1, "customFields": 1})
+    return {
+        "mode": "snapshot",
+        "version": str(version),
+        "hasMore": False,
+        "students": fetch_students(),
+        "events": fetch_events_by_id(),
+        "registrations": registrations,
+        "customFields": {str(d["eventID"]): d.get("customFields", {}) for d in docs}}
+
+@app.get("/sync")
+def sync_changes(since: Optional[str] = None, limit: Annotated[int, Query(ge=1)] = SYNC_PAGE_SIZE):
+    """
+    Trifecta endpoint returning Student, Event, Registration and customFields
+    changes made after the `since` version token. Without a usable token
+    (first boot, pruned history, or too far behind) a full snapshot is sent
+    instead. Clients apply the page and call again with the returned
+    version while hasMore is true
+    """
+    # The version token and the rows it describes must come from the same
+    # server, so a page is never split across replicas with different lag
+    with primary_reads():
+        return sync_page(since, limit)
+
+def settled_version(cursor):
+    """
+    Helper finding the newest changeID older than SYNC_GAP_SECONDS. Every
+    ID below it was taken before it, so its transaction has committed or
+    rolled back and a snapshot as of this version misses nothing
+    """
+    cursor.execute("""
+        SELECT changeID FROM ChangeLog
+        WHERE TIMESTAMPDIFF(SECOND, changedAt, NOW()) >= %s
+        ORDER BY changeID DESC LIMIT 1
+    """, (SYNC_GAP_SECONDS,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def settled_rows(since_id, rows):
+    """
+    Helper cutting a page of (changeID, ..., age) rows at its first gap
+    younger than SYNC_GAP_SECONDS, so the version never moves past a
+    change that may still commit. The next call re-reads from there
+    """
+    expected = since_id + 1
+    for i, row in enumerate(rows):
+        if row[0] != expected and row[-1] < SYNC_GAP_SECONDS:
+            return rows[:i]
+        expected = row[0] + 1
+    return rows
+
+def sync_page(since, limit):
+    """Helper building one /sync response"""
+    db = mysql_connect(read_only=True)
+    cursor = db.cursor()
+    try:
+        since_id = int(since) if since not in (None, "") else None
+    except ValueError:
+        since_id = None
+    # MIN/MAX and the capped count are primary-key lookups and a bounded
+    # range, so this doesn't read the whole table
+    cursor.execute("""
+        SELECT MIN(changeID), MAX(changeID),
+               (SELECT COUNT(*) FROM (
+                    SELECT 1 FROM ChangeLog WHERE changeID > %s LIMIT %s) AS recent)
+        FROM ChangeLog
+    """, (since_id or 0, SYNC_SNAPSHOT_THRESHOLD + 1))
+    oldest, newest, pending = cursor.fetchone()
+    oldest, newest, pending = oldest or 0, newest or 0, int(pending or 0)
+    if (since_id is None or since_id > newest
+            or (oldest and since_id < oldest - 1)
+            or pending > SYNC_SNAPSHOT_THRESHOLD):
+        version = settled_version(cursor)
+        cursor.close()
+        db.close()
+        return sync_snapshot(version)
+
+    cursor.execute("""
+        SELECT changeID, entity, entityKey, operation,
+               TIMESTAMPDIFF(SECOND, changedAt, NOW()) AS age
+        FROM ChangeLog WHERE changeID > %s ORDER BY changeID LIMIT %s
+    """, (since_id, limit + 1))
+    rows = cursor.fetchall()
+    has_more = len(rows) > limit
+    settled = settled_rows(since_id, rows[:limit])
+    if len(settled) < len(rows[:limit]):
+        # Waiting on an in-flight change; the client picks it up next poll
+        has_more = False
+    rows = settled
+    # Only the latest operation per entity within the page matters
+    latest = {}
+    for _, entity, key, operation, _ in rows:
+        latest[(entity, key)] = operation
+    upserts = {entity: [] for entity in SYNC_ENTITIES}
+    deletes = {entity: [] for entity in SYNC_ENTITIES}
+    for (entity, key), operation in latest.items():
+        if entity in SYNC_ENTITIES:
+            (upserts if operation == "upsert" else deletes)[entity].append(key)
+
+    registrations = []
+    if upserts["Registration"]:
+        pairs = [tuple(int(v) for v in key.split(":")) for key in upserts["Registration"]]
+        cursor.execute(f"""
+            SELECT studentID, eventID FROM Registration
+            WHERE (studentID, eventID) IN ({','.join(['(%s, %s)'] * len(pairs))})
+        """, tuple(v for pair in pairs for v in pair))
+        registrations = [list(r) for r in cursor.fetchall()]
+    cursor.close()
+    db.close()
+
+    students = fetch_students([int(k) for k in upserts["Student"]]) if upserts["Student"] else []
+    events = fetch_events_by_id([int(k) for k in upserts["Event"]]) if upserts["Event"] else []
+    custom = {}
+    if upserts["EventCustomFields"]:
+        # No last-known fallback here: a missing document would read as a delete
+        docs = get_mongo_db()["event_data"].find(
+            {"eventID": {"$in": [int(k) for k in upserts["EventCustomFields"]]}},
+            {"_id": 0, "eventID": 1, "customFields": 1})
+        custom = {d["eventID"]: d.get("customFields", {}) for d in docs}
+
+    # An upsert whose row has since disappeared is reported as a delete
+    def gone(keys, present):
+        return [k for k in keys if k not in present]
+    deletes["Student"] += gone(upserts["Student"], {str(s["studentID"]) for s in students})
+    deletes["Event"] += gone(upserts["Event"], {str(e["eventID"]) for e in events})
+    deletes["Registration"] += gone(upserts["Registration"], {f"{sid}:{eid}" for sid, eid in registrations})
+    deletes["EventCustomFields"] += gone(upserts["EventCustomFields"], {str(k) for k in custom})
+    return {
+        "mode": "delta",
+        "version": str(rows[-1][0]) if rows else str(since_id),
+        "hasMore": has_more,
+        "students": {"upserts": students, "deletes": [int(k) for k in deletes["Student"]]},
+        "events": {"upserts": events, "deletes": [int(k) for k in deletes["Event"]]},
+        "registrations": {
+            "upserts": registrations,
+            "deletes": [[int(v) for v in k.split(":")] for k in deletes["Registration"]]},
+        "customFields": {
+            "upserts": {str(k): v for k, v in custom.items()},
+            "deletes": [int(k) for k in deletes["EventCustomFields"]]}}
+
+# --------------------------
+# HOUSEKEEPING
+# --------------------------
+HOUSEKEEPING_ENABLED = os.getenv("HOUSEKEEPING_ENABLED", "true").lower() in ("1", "true", "yes")
+REDIS_SWEEP_SECONDS = float(os.getenv("REDIS_SWEEP_SECONDS", "3600"))
+WALK_IN_COMPACTION_SECONDS = float(os.getenv("WALK_IN_COMPACTION_SECONDS", "86400"))
+REDIS_REBALANCE_SECONDS = float(os.getenv("REDIS_REBALANCE_SECONDS", "300"))
+CHANGELOG_PRUNE_SECONDS = float(os.getenv("CHANGELOG_PRUNE_SECONDS", "86400"))
+CHANGELOG_RETENTION_DAYS = float(os.getenv("CHANGELOG_RETENTION_DAYS", "30"))
+
+def fetch_event_ids():
+    """Helper to load every existing eventID (from the primary, so none look deleted)"""
+    db = mysql_connect()
+    cursor = db.cursor()
+    cursor.execute("SELECT eventID FROM Event;")
+    event_ids = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    db.close()
+    return event_ids
+
+def sweep_redis_nodes():
+    """Helper running the live-key sweep on every Redis node"""
+    event_ids = fetch_event_ids()
+    return {
+        node: sweep_live_keys(r, event_ids, LIVE_KEY_TTL_SECONDS, LIVE_EVENTS_KEY, ATTENDEES_KEY)
+        for node, r in redis_nodes()}
+
+housekeeping = Scheduler()
+# Registered before the sweep, so after a node is added keys move first
+housekeeping.every(
+    REDIS_REBALANCE_SECONDS, "rebalanceLiveKeys",
+    lambda: rebalance(redis_shards, LIVE_EVENTS_KEY))
+housekeeping.every(REDIS_SWEEP_SECONDS, "sweepLiveKeys", sweep_redis_nodes)
+housekeeping.every(
+    WALK_IN_COMPACTION_SECONDS, "compactWalkIns",
+    lambda: compact_walk_ins(get_mongo_db()))
+housekeeping.every(
+    CHANGELOG_PRUNE_SECONDS, "pruneChangeLog",
+    lambda: prune_change_log(mysql_connect, CHANGELOG_RETENTION_DAYS * 86400))
+
+@app.get("/usage")
+def get_usage():
+    """
+    Trifecta endpoint reporting memory and storage usage of Redis, MongoDB
+    and MySQL (or their embedded stand-ins). A backend that can't be
+    reached reports its error instead
+    """
+    if EMBEDDED:
+        return {
+            "redis": {node: redis_usage(r) for node, r in redis_nodes()},
+            "mongo": mongo_db.usage(),
+            "mysql": embedded_sql.usage()}
+    report = {"redis": {}}
+    for node, r in redis_nodes():
+        try:
+            report["redis"][node] = redis_usage(r)
+        except (CircuitOpenError, redis.exceptions.RedisError) as redis_err:
+            report["redis"][node] = {"error": str(redis_err)}
+    try:
+        report["mongo"] = mongo_usage(get_mongo_db())
+    except (CircuitOpenError, pymongo.errors.PyMongoError) as mongo_err:
+        report["mongo"] = {"error": str(mongo_err)}
+    try:
+        db = mysql_connect(read_only=True)
+        cursor = db.cursor(dictionary=True)
+        report["mysql"] = mysql_usage(cursor, DB_NAME)
+        cursor.close()
+        db.close()
+    except mysql.connector.Error as mysql_err:
+        report["mysql"] = {"error": str(mysql_err)}
+    return report
+
+# --------------------------
+# ADMIN
+# --------------------------
+def require_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (no admin_token secret)")
+    if not token_matches(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profiles")
+def list_profiles(x_admin_token: Annotated[Optional[str], Header()] = None):
+    """
+    Endpoint to list the most recent request profiles, newest first
+    """
+    require_admin(x_admin_token)
+    return profile_store.summaries()
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str, x_admin_token: Annotated[Optional[str], Header()] = None):
+    """
+    Endpoint to download one profile as folded stacks, ready for
+    flamegraph.pl or speedscope
+    """
+    require_admin(x_admin_token)
+    session = profile_store.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return session.folded()
+
+QUERY_REPORT_SORTS = ("totalMs", "maxMs", "avgMs", "count", "slowCount")
+
+@app.get("/admin/queries")
+def get_query_report(
+        top: Annotated[int, Query(ge=1)] = 20,
+        sort: str = "totalMs",
+        x_admin_token: Annotated[Optional[str], Header()] = None):
+    """
+    Endpoint to report the top MySQL statement fingerprints by total, max
+    or average duration, with EXPLAIN plans captured for slow ones
+    """
+    require_admin(x_admin_token)
+    if sort not in QUERY_REPORT_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(QUERY_REPORT_SORTS)}")
+    return {**query_log.snapshot(), "queries": query_log.top(top, sort)}
+
+@app.delete("/admin/queries")
+def reset_query_report(x_admin_token: Annotated[Optional[str], Header()] = None):
+    """
+    Endpoint to clear the slow-query log stats
+    """
+    require_admin(x_admin_token)
+    query_log.reset()
+    return {"message": "Query stats reset"}
+
+# --------------------------
+# METRICS
+# --------------------------
+@app.get("/metrics")
+def get_metrics():
+    """
+    Endpoint to report backend health and cache stats: circuit breaker
+    states, the last-known customFields cache used while MongoDB is
+    degraded, the GraphQL persisted query store and response cache, MySQL
+    replica lag, the MongoDB outbox backlog, housekeeping jobs, the
+    slow-query log and the finalize job queue
+    """
+    return {
+        "breakers": {
+            "mongo": mongo_breaker.snapshot(),
+            "redis": redis_shards.snapshot() if redis_shards else {}},
+        "customFieldsCache": custom_fields_cache.snapshot(),
+        "persistedQueries": persisted_query_store.snapshot(),
+        "graphqlResponseCache": response_cache.snapshot(),
+        "mysqlReplicas": replica_router.snapshot(),
+        "outbox": outbox_relay.snapshot(),
+        "housekeeping": housekeeping.snapshot(),
+        "queryLog": query_log.snapshot(),
+        "finalizeJobs": finalize_jobs.snapshot()}
+
 # =================================
 #  GRAPHQL ENDPOINT 
 # =================================
@@ -801,8 +2033,8 @@ def setup_graphql():
 setup_graphql()
 
 @app.get("/demo", response_class=FileResponse)
-async def read_demo():
-    return "youth_group_frontend/index.html"
+async def read_demo(request: Request):
+    return await frontend_files.get_response("index.html", request.scope)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+import mysql.connector
+
+# Per-request routing state set by the read-your-writes middleware:
+# {"pinned": reads must go to the primary, "wrote": a write happened}
+request_routing = contextvars.ContextVar("mysql_request_routing", default=None)
+
+
+def parse_replicas(spec):
+    """Parses "host[:port],host[:port]" into [(host, port)]"""
+    replicas = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(":")
+        replicas.append((host, int(port) if port else 3306))
+    return replicas
+
+
+def reads_pinned():
+    state = request_routing.get()
+    return bool(state and state["pinned"])
+
+
+def mark_write():
+    # Later reads in the same request must see the write too
+    state = request_routing.get()
+    if state is not None:
+        state["wrote"] = True
+        state["pinned"] = True
+
+
+@contextmanager
+def primary_reads():
+    """Routes every read inside the block to the primary, e.g. for reads that must agree with each other"""
+    state = request_routing.get()
+    token = request_routing.set({"pinned": True, "wrote": state["wrote"] if state else False})
+    try:
+        yield
+    finally:
+        pinned_state = request_routing.get()
+        request_routing.reset(token)
+        if pinned_state["wrote"]:
+            mark_write()
+
+
+class ReplicaRouter:
+    """
+    Hands out read connections round-robin across replicas. Each replica's
+    replication lag is re-checked at most every `check_interval` seconds on
+    the connection about to be used; replicas that are unreachable, not
+    replicating, or more than `max_lag` seconds behind are skipped until
+    the next check. With no usable replica, reads fall back to the primary
+    """
+
+    def __init__(self, connect, replicas, max_lag=5.0, check_interval=5.0):
+        self.connect = connect
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replicas = [
+            {"host": host, "port": port, "healthy": True, "lag": None,
+             "checkedAt": 0.0, "reads": 0, "skipped": 0, "error": None}
+            for host, port in replicas]
+        self.next_index = 0
+        self.primary_fallbacks = 0
+        self.lock = threading.Lock()
+
+    def connect_read(self):
+        """Returns a replica connection, or None when the primary should serve the read"""
+        if not self.replicas:
+            return None
+        with self.lock:
+            start = self.next_index
+            self.next_index = (self.next_index + 1) % len(self.replicas)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            conn = self.try_replica(replica)
+            if conn is not None:
+                with self.lock:
+                    replica["reads"] += 1
+                return conn
+        with self.lock:
+            self.primary_fallbacks += 1
+        return None
+
+    def try_replica(self, replica):
+        now = time.monotonic()
+        due = now - replica["checkedAt"] >= self.check_interval
+        if not due and not replica["healthy"]:
+            with self.lock:
+                replica["skipped"] += 1
+            return None
+        try:
+            conn = self.connect(replica["host"], replica["port"])
+        except mysql.connector.Error as e:
+            self.record_check(replica, False, None, str(e))
+            return None
+        if not due:
+            return conn
+        lag, error = self.replication_lag(conn)
+        healthy = lag is not None and lag <= self.max_lag
+        if not healthy and error is None:
+            error = f"replication lag {lag}s exceeds {self.max_lag}s"
+        self.record_check(replica, healthy, lag, error)
+        if healthy:
+            return conn
+        conn.close()
+        return None
+
+    def replication_lag(self, conn):
+        """Returns (seconds behind the primary, error); lag is None when not replicating"""
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except mysql.connector.ProgrammingError:
+                # MySQL < 8.0.22 only knows the old spelling
+                cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+        except mysql.connector.Error as e:
+            return None, str(e)
+        finally:
+            cursor.close()
+        if not status:
+            return None, "not configured as a replica"
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        if lag is None:
+            return None, "replication is stopped"
+        return float(lag), None
+
+    def record_check(self, replica, healthy, lag, error):
+        with self.lock:
+            if replica["healthy"] and not healthy:
+                print(f"Warning: skipping MySQL replica {replica['host']}:{replica['port']}: {error}")
+            replica.update(
+                healthy=healthy, lag=lag, error=error, checkedAt=time.monotonic())
+            if not healthy:
+                replica["skipped"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "maxLagSeconds": self.max_lag,
+                "primaryFallbacks": self.primary_fallbacks,
+                "replicas": [
+                    {"host": f"{r['host']}:{r['port']}", "healthy": r["healthy"], "lagSeconds": r["lag"],
+                     "reads": r["reads"], "skipped": r["skipped"], "error": r["error"]}
+                    for r in self.replicas]}
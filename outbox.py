@@ -0,0 +1,257 @@
+import json
+import time
+import threading
+from datetime import datetime
+from pymongo import DeleteMany, InsertOne, UpdateOne
+
+OUTBOX_LOCK_NAME = "youth_group_outbox_relay"
+
+
+def record_outbox(cursor, event_id, operation, payload=None):
+    """
+    Queues a MongoDB change for the relay. Call it on the same cursor (and
+    transaction) as the MySQL write it belongs to. Operations:
+    set_custom_fields ({"customFields": {...}}, empty deletes the document),
+    delete_event, and replace_walk_ins ({"walkIns": [{studentID, checkInTime}]})
+    """
+    cursor.execute(
+        "INSERT INTO Outbox (eventID, operation, payload) VALUES (%s, %s, %s)",
+        (event_id, operation, json.dumps(payload or {}, default=str)))
+
+
+def mongo_operations(row):
+    """
+    Translates an outbox row into (collection, write) pairs. Every
+    operation sets its final state outright, so replaying a row is harmless
+    """
+    event_id = row["eventID"]
+    payload = row["payload"]
+    if row["operation"] == "set_custom_fields":
+        custom_fields = payload.get("customFields") or {}
+        if custom_fields:
+            return [("event_data", UpdateOne(
+                {"eventID": event_id}, {"$set": {"customFields": custom_fields}}, upsert=True))]
+        return [("event_data", DeleteMany({"eventID": event_id}))]
+    if row["operation"] == "delete_event":
+        return [
+            ("event_data", DeleteMany({"eventID": event_id})),
+            ("walk_ins", DeleteMany({"eventID": event_id}))]
+    if row["operation"] == "replace_walk_ins":
+        return [("walk_ins", DeleteMany({"eventID": event_id}))] + [
+            ("walk_ins", InsertOne({
+                "eventID": event_id,
+                "studentID": w["studentID"],
+                "checkInTime": datetime.fromisoformat(w["checkInTime"])}))
+            for w in payload.get("walkIns", [])]
+    raise ValueError(f"Unknown outbox operation {row['operation']!r}")
+
+
+class OutboxRelay:
+    """
+    Background thread applying Outbox rows to MongoDB in outboxID order, a
+    batch at a time. A batch's rows are deleted (and `on_applied` called)
+    only after MongoDB accepted it. While MongoDB is unreachable
+    (`transient_errors`) the batch stays queued and is retried with
+    exponential backoff. Any other failure is retried row by row, so a bad
+    row only holds back later rows of its own event, and after
+    `max_attempts` it is moved to OutboxDeadLetter. A MySQL named lock
+    keeps a single relay active across worker processes
+    """
+
+    def __init__(self, connect, get_mongo, on_applied=None, batch_size=200,
+                 poll_interval=1.0, max_backoff=60.0, max_attempts=5, transient_errors=()):
+        self.connect = connect
+        self.get_mongo = get_mongo
+        self.on_applied = on_applied
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.transient_errors = transient_errors
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.pending = None
+        self.lag_seconds = None
+        self.dead_lettered = None
+        self.applied_total = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_applied_at = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="outbox-relay", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def notify(self):
+        """Wakes the relay right away instead of at the next poll"""
+        self.wake.set()
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.wake.clear()
+            try:
+                applied = self.relay_once()
+            except Exception as e:
+                with self.lock:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    failures = self.failures
+                print(f"Warning: outbox relay failed (attempt {failures}): {e}")
+                wait = min(self.max_backoff, self.poll_interval * 2 ** failures)
+            else:
+                with self.lock:
+                    self.failures = 0
+                wait = 0 if applied >= self.batch_size else self.poll_interval
+            self.wake.wait(wait)
+
+    def relay_once(self):
+        """Applies one batch; returns how many rows were relayed"""
+        db = self.connect()
+        cursor = db.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, 0) AS locked", (OUTBOX_LOCK_NAME,))
+            if not cursor.fetchone()["locked"]:
+                return 0
+            try:
+                applied = self.apply_batch(db, cursor)
+                cursor.execute("""
+                    SELECT COUNT(*) AS pending,
+                           TIMESTAMPDIFF(SECOND, MIN(createdAt), NOW()) AS lag,
+                           (SELECT COUNT(*) FROM OutboxDeadLetter) AS deadLettered
+                    FROM Outbox
+                """)
+                status = cursor.fetchone()
+                with self.lock:
+                    self.pending = int(status["pending"])
+                    self.lag_seconds = status["lag"]
+                    self.dead_lettered = int(status["deadLettered"])
+                return applied
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (OUTBOX_LOCK_NAME,))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+            db.close()
+
+    def apply_batch(self, db, cursor):
+        cursor.execute("""
+            SELECT outboxID, eventID, operation, payload, attempts FROM Outbox
+            ORDER BY outboxID LIMIT %s
+        """, (self.batch_size,))
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        for row in rows:
+            if isinstance(row["payload"], (str, bytes)):
+                row["payload"] = json.loads(row["payload"])
+        try:
+            self.write(rows)
+        except self.transient_errors as e:
+            # MongoDB is unreachable: nothing is wrong with the rows, so
+            # record the error without counting it as an attempt
+            ids = [row["outboxID"] for row in rows]
+            cursor.execute(f"""
+                UPDATE Outbox SET lastError = %s
+                WHERE outboxID IN ({','.join(['%s'] * len(ids))})
+            """, (str(e)[:255], *ids))
+            db.commit()
+            raise
+        except Exception:
+            return self.apply_rows(db, cursor, rows)
+        self.finish(db, cursor, rows)
+        return len(rows)
+
+    def write(self, rows):
+        writes = {}
+        for row in rows:
+            for collection, write in mongo_operations(row):
+                writes.setdefault(collection, []).append(write)
+        mongo = self.get_mongo()
+        for collection, ops in writes.items():
+            mongo[collection].bulk_write(ops, ordered=True)
+
+    def apply_rows(self, db, cursor, rows):
+        """
+        Retries a rejected batch one row at a time. A failing row holds back
+        the later rows of its event (they must apply after it) but not the
+        others; once it has failed max_attempts times it is dead-lettered
+        and stops holding anything back
+        """
+        applied, failed, blocked = [], [], set()
+        try:
+            for row in rows:
+                if row["eventID"] in blocked:
+                    continue
+                try:
+                    self.write([row])
+                except self.transient_errors:
+                    raise
+                except Exception as e:
+                    failed.append((row, str(e)[:255]))
+                    if row["attempts"] + 1 < self.max_attempts:
+                        blocked.add(row["eventID"])
+                else:
+                    applied.append(row)
+        finally:
+            dead = []
+            for row, error in failed:
+                if row["attempts"] + 1 >= self.max_attempts:
+                    dead.append(row)
+                    cursor.execute("""
+                        INSERT INTO OutboxDeadLetter
+                            (outboxID, eventID, operation, payload, createdAt, attempts, lastError)
+                        SELECT outboxID, eventID, operation, payload, createdAt, attempts + 1, %s
+                        FROM Outbox WHERE outboxID = %s
+                    """, (error, row["outboxID"]))
+                    cursor.execute("DELETE FROM Outbox WHERE outboxID = %s", (row["outboxID"],))
+                    print(f"Warning: outbox row {row['outboxID']} dead-lettered after "
+                          f"{self.max_attempts} attempts: {error}")
+                else:
+                    cursor.execute(
+                        "UPDATE Outbox SET attempts = attempts + 1, lastError = %s WHERE outboxID = %s",
+                        (error, row["outboxID"]))
+            if applied:
+                self.finish(db, cursor, applied)
+            else:
+                db.commit()
+        with self.lock:
+            if failed:
+                self.last_error = failed[0][1]
+        retrying = len(failed) - len(dead)
+        if retrying:
+            raise RuntimeError(f"{retrying} outbox row(s) rejected by MongoDB: {failed[0][1]}")
+        return len(applied)
+
+    def finish(self, db, cursor, rows):
+        """Runs on_applied, deletes the rows and commits"""
+        if self.on_applied:
+            self.on_applied(cursor, rows)
+        ids = [row["outboxID"] for row in rows]
+        cursor.execute(f"DELETE FROM Outbox WHERE outboxID IN ({','.join(['%s'] * len(ids))})", tuple(ids))
+        db.commit()
+        with self.lock:
+            self.applied_total += len(rows)
+            self.last_applied_at = time.time()
+            self.last_error = None
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "running": bool(self.thread and self.thread.is_alive()),
+                "pending": self.pending,
+                "lagSeconds": self.lag_seconds,
+                "deadLettered": self.dead_lettered,
+                "maxAttempts": self.max_attempts,
+                "appliedTotal": self.applied_total,
+                "consecutiveFailures": self.failures,
+                "lastError": self.last_error,
+                "lastAppliedSecondsAgo": round(time.time() - self.last_applied_at, 1) if self.last_applied_at else None}
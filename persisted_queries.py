@@ -0,0 +1,135 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+
+
+def query_hash(query: str) -> str:
+    """sha256 hex digest used as a persisted query's ID"""
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryStore:
+    """
+    Hash -> document store. Allowlisted documents (loaded from a JSON file
+    of {hash: query}) are pinned; documents registered by clients at
+    runtime live in a bounded LRU
+    """
+
+    def __init__(self, maxsize=500, allowlist_path=None):
+        self.maxsize = maxsize
+        self.pinned = {}
+        self.registered = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if allowlist_path and os.path.exists(allowlist_path):
+            with open(allowlist_path, "r") as f:
+                for sha, query in json.load(f).items():
+                    if query_hash(query) != sha:
+                        raise ValueError(f"Allowlist entry {sha} does not match its query")
+                    self.pinned[sha] = query
+
+    def get(self, sha):
+        with self.lock:
+            query = self.pinned.get(sha)
+            if query is None and sha in self.registered:
+                self.registered.move_to_end(sha)
+                query = self.registered[sha]
+            if query is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return query
+
+    def __contains__(self, sha):
+        with self.lock:
+            return sha in self.pinned or sha in self.registered
+
+    def register(self, sha, query):
+        with self.lock:
+            if sha in self.pinned:
+                return
+            self.registered[sha] = query
+            self.registered.move_to_end(sha)
+            while len(self.registered) > self.maxsize:
+                self.registered.popitem(last=False)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "allowlisted": len(self.pinned),
+                "registered": len(self.registered),
+                "maxSize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses}
+
+
+PERSISTED_QUERIES_ALLOWLIST_ONLY = os.getenv("PERSISTED_QUERIES_ALLOWLIST_ONLY", "").lower() in ("1", "true", "yes")
+persisted_query_store = PersistedQueryStore(
+    maxsize=int(os.getenv("PERSISTED_QUERIES_CACHE_SIZE", "500")),
+    allowlist_path=os.getenv("PERSISTED_QUERIES_ALLOWLIST", "persisted_queries.json"))
+
+
+class PersistedQueries(SchemaExtension):
+    """
+    Automatic persisted queries (Apollo APQ protocol): a request carrying
+    extensions.persistedQuery.sha256Hash may omit the query text. Unknown
+    hashes answer PersistedQueryNotFound so the client resends the full
+    document once, which is then registered. In allowlist-only mode only
+    pinned documents run and nothing new is registered
+    """
+
+    def on_operation(self):
+        execution_context = self.execution_context
+        extensions = getattr(execution_context, "operation_extensions", None) or {}
+        persisted = extensions.get("persistedQuery") or {}
+        sha = persisted.get("sha256Hash")
+        query = execution_context.query
+
+        if sha is None:
+            if PERSISTED_QUERIES_ALLOWLIST_ONLY and query is not None:
+                if query_hash(query) not in persisted_query_store:
+                    raise GraphQLError(
+                        "Operation is not in the persisted query allowlist",
+                        extensions={"code": "PERSISTED_QUERY_NOT_ALLOWED"})
+        elif query is None:
+            query = persisted_query_store.get(sha)
+            if query is None:
+                raise GraphQLError(
+                    "PersistedQueryNotFound",
+                    extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})
+            execution_context.query = query
+        else:
+            if query_hash(query) != sha:
+                raise GraphQLError(
+                    "provided sha does not match query",
+                    extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"})
+            if sha not in persisted_query_store:
+                if PERSISTED_QUERIES_ALLOWLIST_ONLY:
+                    raise GraphQLError(
+                        "Operation is not in the persisted query allowlist",
+                        extensions={"code": "PERSISTED_QUERY_NOT_ALLOWED"})
+                persisted_query_store.register(sha, query)
+        yield
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the persisted query allowlist from .graphql files")
+    parser.add_argument("files", nargs="+", help="files with one GraphQL document each")
+    parser.add_argument("--output", default="persisted_queries.json")
+    args = parser.parse_args()
+
+    allowlist = {}
+    for path in args.files:
+        with open(path, "r") as f:
+            query = f.read().strip()
+        allowlist[query_hash(query)] = query
+    with open(args.output, "w") as f:
+        json.dump(allowlist, f, indent=2)
+    print(f"Wrote {len(allowlist)} persisted queries to {args.output}")
@@ -0,0 +1,214 @@
+import os
+import sys
+import hmac
+import time
+import uuid
+import random
+import asyncio
+import functools
+import threading
+import contextvars
+from collections import Counter, deque
+from contextlib import contextmanager
+from fastapi.routing import APIRoute
+from strawberry.extensions import SchemaExtension
+
+PROFILE_MODES = ("sample", "trace")
+
+# The profile being recorded for the current request, if any
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """
+    Profile of one request as folded stacks ("outer;inner" -> weight).
+    "sample" mode reads the working thread's stack every `interval`
+    seconds from a helper thread (weight = samples); "trace" mode is
+    deterministic via sys.setprofile (weight = microseconds of self time)
+    """
+
+    def __init__(self, mode, method, path, interval=0.005):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.operation = None
+        self.interval = interval
+        self.stacks = Counter()
+        self.started_at = time.time()
+        self.duration = None
+        self.status = None
+        self.attached_count = 0
+
+    @contextmanager
+    def attached(self):
+        """Profiles the calling thread for the duration of the block"""
+        self.attached_count += 1
+        if self.mode == "trace":
+            tracer = Tracer(self.stacks)
+            sys.setprofile(tracer)
+            try:
+                yield
+            finally:
+                sys.setprofile(None)
+                tracer.flush()
+        else:
+            done = threading.Event()
+            sampler = threading.Thread(
+                target=self.sample, args=(threading.get_ident(), done), name="profile-sampler", daemon=True)
+            sampler.start()
+            try:
+                yield
+            finally:
+                done.set()
+                sampler.join()
+
+    def sample(self, thread_id, done):
+        while not done.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        """Brendan Gregg's folded format, one "stack weight" per line"""
+        return "".join(f"{stack} {weight}\n" for stack, weight in self.stacks.most_common())
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "operation": self.operation,
+            "status": self.status,
+            "startedAt": self.started_at,
+            "durationMs": round(self.duration * 1000, 2) if self.duration is not None else None,
+            "stacks": len(self.stacks),
+            "weight": sum(self.stacks.values()),
+            "unit": "samples" if self.mode == "sample" else "microseconds"}
+
+
+class Tracer:
+    """sys.setprofile hook charging elapsed time to the current call stack"""
+
+    def __init__(self, stacks):
+        self.stacks = stacks
+        self.stack = []
+        self.self_time = Counter()
+        self.last = time.perf_counter_ns()
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if self.stack:
+            self.self_time[tuple(self.stack)] += now - self.last
+        if event == "call":
+            self.stack.append(frame_label(frame.f_code))
+        elif event == "c_call":
+            self.stack.append(f"{getattr(arg, '__qualname__', arg)} (builtin)")
+        elif event in ("return", "c_return", "c_exception") and self.stack:
+            self.stack.pop()
+        self.last = time.perf_counter_ns()
+
+    def flush(self):
+        for stack, nanoseconds in self.self_time.items():
+            self.stacks[";".join(stack)] += nanoseconds // 1000
+
+
+class ProfileStore:
+    """Bounded buffer of the most recent finished profiles"""
+
+    def __init__(self, maxsize=50):
+        self.profiles = deque(maxlen=maxsize)
+        self.lock = threading.Lock()
+
+    def add(self, session):
+        with self.lock:
+            self.profiles.append(session)
+
+    def get(self, profile_id):
+        with self.lock:
+            return next((p for p in self.profiles if p.id == profile_id), None)
+
+    def summaries(self):
+        with self.lock:
+            return [p.summary() for p in reversed(self.profiles)]
+
+
+def token_matches(given, expected):
+    """Constant-time comparison of a request's token with the configured one"""
+    if not given or not expected:
+        return False
+    return hmac.compare_digest(given.encode(), expected.encode())
+
+
+def start_profile(mode_header, token_header, token, sample_rate, method, path, interval):
+    """
+    Returns a ProfileSession when the request asked for one with a valid
+    token (X-Profile: sample|trace), or was picked by the sample rate
+    """
+    if mode_header:
+        if token_matches(token_header, token) and mode_header in PROFILE_MODES:
+            return ProfileSession(mode_header, method, path, interval)
+        return None
+    if sample_rate and random.random() < sample_rate:
+        return ProfileSession("sample", method, path, interval)
+    return None
+
+
+def profiled(endpoint):
+    """Wraps an endpoint so an active profile attaches to the thread running it"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            session = current_profile.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            with session.attached():
+                return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            session = current_profile.get()
+            if session is None:
+                return endpoint(*args, **kwargs)
+            with session.attached():
+                return endpoint(*args, **kwargs)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class for profiling REST endpoints. Sync endpoints run in the
+    threadpool, so the profile has to attach inside the endpoint call
+    rather than in the middleware
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
+
+
+class Profiling(SchemaExtension):
+    """
+    Attaches an active profile to GraphQL execution. Resolvers run on the
+    shared event loop thread, so the profile covers that thread for the
+    whole operation: frames of other requests the loop runs meanwhile (at
+    every await) are recorded too. Profile a GraphQL operation while the
+    API is otherwise idle, or read its stacks with that in mind
+    """
+
+    def on_execute(self):
+        session = current_profile.get()
+        if session is None:
+            yield
+            return
+        session.operation = self.execution_context.operation_name
+        with session.attached():
+            yield
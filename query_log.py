@@ -0,0 +1,198 @@
+import re
+import time
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROW_LIST = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """
+    Normalizes a statement so every execution of the same query shape
+    groups together: literals and placeholders become ?, value lists of
+    any length become (?+), and whitespace is collapsed
+    """
+    normalized = sql.replace("%s", "?")
+    normalized = _STRING.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip().rstrip(";").strip()
+    normalized = _VALUE_LIST.sub("(?+)", normalized)
+    return _ROW_LIST.sub("(?+), ...", normalized)
+
+
+class QueryLog:
+    """
+    Per-fingerprint statement stats (count, total and max duration, rows)
+    in a bounded LRU. The first time a fingerprint runs longer than
+    `slow_ms` (and again every `explain_interval` seconds) its EXPLAIN
+    plan is captured on a separate connection in the background
+    """
+
+    def __init__(self, explain_connect, slow_ms=100.0, maxsize=500, explain_interval=300.0):
+        self.explain_connect = explain_connect
+        self.slow_ms = slow_ms
+        self.maxsize = maxsize
+        self.explain_interval = explain_interval
+        self.stats = OrderedDict()
+        self.slow_total = 0
+        self.lock = threading.Lock()
+        self.explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    def record(self, sql, params, elapsed_ms, rows):
+        key = fingerprint(sql)
+        explain = False
+        with self.lock:
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = self.stats[key] = {
+                    "fingerprint": key, "count": 0, "totalMs": 0.0, "maxMs": 0.0,
+                    "rows": 0, "slowCount": 0, "example": None, "explain": None,
+                    "explainedAt": None, "explainError": None}
+                while len(self.stats) > self.maxsize:
+                    self.stats.popitem(last=False)
+            self.stats.move_to_end(key)
+            entry["count"] += 1
+            entry["totalMs"] += elapsed_ms
+            entry["rows"] += max(rows or 0, 0)
+            if elapsed_ms > entry["maxMs"]:
+                entry["maxMs"] = elapsed_ms
+            if elapsed_ms >= self.slow_ms:
+                entry["slowCount"] += 1
+                self.slow_total += 1
+                entry["example"] = sql.strip()
+                last = entry["explainedAt"]
+                if (last is None or time.time() - last >= self.explain_interval) and \
+                        sql.lstrip().upper().startswith(EXPLAINABLE):
+                    entry["explainedAt"] = time.time()
+                    explain = True
+        if explain:
+            self.explainer.submit(self.capture_explain, key, sql, params)
+
+    def capture_explain(self, key, sql, params):
+        plan, error = None, None
+        try:
+            db = self.explain_connect()
+            cursor = db.cursor(dictionary=True)
+            try:
+                cursor.execute("EXPLAIN " + sql, params)
+                plan = cursor.fetchall()
+            finally:
+                cursor.close()
+                db.close()
+        except Exception as e:
+            error = str(e)
+        with self.lock:
+            entry = self.stats.get(key)
+            if entry is not None:
+                entry["explain"] = plan
+                entry["explainError"] = error
+
+    def top(self, n=20, sort="totalMs"):
+        with self.lock:
+            entries = [dict(entry) for entry in self.stats.values()]
+        for entry in entries:
+            entry["avgMs"] = round(entry["totalMs"] / entry["count"], 3) if entry["count"] else 0.0
+            entry["totalMs"] = round(entry["totalMs"], 3)
+            entry["maxMs"] = round(entry["maxMs"], 3)
+        entries.sort(key=lambda e: e[sort], reverse=True)
+        return entries[:n]
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.slow_total = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "fingerprints": len(self.stats),
+                "maxFingerprints": self.maxsize,
+                "slowThresholdMs": self.slow_ms,
+                "slowStatements": self.slow_total}
+
+
+class InstrumentedCursor:
+    """
+    Cursor proxy timing each statement from execute() through its fetches,
+    so unbuffered result reads count toward the statement that produced them
+    """
+
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+        self._pending = None
+
+    def _finish(self):
+        if self._pending is not None:
+            sql, params, elapsed = self._pending
+            self._pending = None
+            rows = getattr(self._cursor, "rowcount", None)
+            self._log.record(sql, params, elapsed * 1000, rows)
+
+    def _timed(self, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - started
+
+    def execute(self, sql, params=(), *args, **kwargs):
+        self._finish()
+        self._pending = [sql, params, 0.0]
+        return self._timed(self._cursor.execute, sql, params, *args, **kwargs)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        self._finish()
+        self._pending = [sql, None, 0.0]
+        return self._timed(self._cursor.executemany, sql, seq_params, *args, **kwargs)
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors report to a QueryLog"""
+
+    def __init__(self, conn, log):
+        self._conn = conn
+        self._log = log
+        self._cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._log)
+        self._cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors.clear()
+        return self._conn.close()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
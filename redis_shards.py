@@ -0,0 +1,153 @@
+import bisect
+import hashlib
+from urllib.parse import urlsplit
+import redis
+from resilience import Guarded
+from housekeeping import event_key_id
+
+
+def parse_nodes(spec):
+    """Parses "redis://[:password@]host[:port][/db],..." into [(name, url)]; names leave out the password"""
+    nodes = []
+    for url in (spec or "").split(","):
+        url = url.strip()
+        if not url:
+            continue
+        parts = urlsplit(url)
+        db = parts.path.strip("/")
+        name = f"{parts.hostname}:{parts.port or 6379}" + (f"/{db}" if db not in ("", "0") else "")
+        nodes.append((name, url))
+    return nodes
+
+
+def ring_hash(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with `vnodes` points per node name. Adding a node
+    moves only the events that land on its points (about 1/n of them);
+    every other event keeps its node
+    """
+
+    def __init__(self, names, vnodes=128):
+        points = sorted((ring_hash(f"{name}#{i}"), name) for name in names for i in range(vnodes))
+        self.hashes = [h for h, _ in points]
+        self.names = [name for _, name in points]
+
+    def node_for(self, event_id):
+        i = bisect.bisect(self.hashes, ring_hash(f"event:{event_id}")) % len(self.hashes)
+        return self.names[i]
+
+
+class ShardedRedis:
+    """
+    Live attendance spread over Redis nodes by event: every event:{id}:*
+    key of one event lives on the node the ring picks for its eventID, so
+    an event's pipelines and multi-key commands stay on one node. Each node
+    keeps its own index of the live events it owns. Calls go through one
+    circuit breaker per node, so a down node only fails its own events
+    """
+
+    def __init__(self, clients, make_breaker, vnodes=128):
+        self.clients = dict(clients)
+        self.breakers = {name: make_breaker(name) for name in self.clients}
+        self.ring = HashRing(self.clients, vnodes)
+
+    def node_for(self, event_id):
+        return self.ring.node_for(event_id)
+
+    def owns(self, name, event_id):
+        return self.node_for(event_id) == name
+
+    def guarded(self, name):
+        return Guarded(self.clients[name], self.breakers[name])
+
+    def for_event(self, event_id):
+        return self.guarded(self.node_for(event_id))
+
+    def nodes(self):
+        return [(name, self.guarded(name)) for name in self.clients]
+
+    def snapshot(self):
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
+
+
+def rebalance(shards, index_key, batch_size=500):
+    """
+    Moves every event's keys to the node the ring now assigns it, e.g.
+    after a node is added to REDIS_NODES. SCANs each node for event keys
+    it doesn't own and moves them one event at a time. Safe to rerun
+    """
+    events = keys_moved = 0
+    if len(shards.clients) < 2:
+        return {"eventsMoved": 0, "keysMoved": 0}
+    for name, source in shards.clients.items():
+        misplaced = {}
+        cursor = 0
+        while True:
+            cursor, keys = source.scan(cursor, match="event:*", count=batch_size)
+            for key in keys:
+                event_id = event_key_id(key)
+                if event_id is not None and not shards.owns(name, event_id):
+                    misplaced.setdefault(event_id, []).append(key)
+            if int(cursor) == 0:
+                break
+        for event_id, keys in sorted(misplaced.items()):
+            keys_moved += move_event(source, shards.clients[shards.node_for(event_id)], event_id, keys, index_key)
+            events += 1
+    return {"eventsMoved": events, "keysMoved": keys_moved}
+
+
+def move_event(source, target, event_id, keys, index_key):
+    """
+    Merges one event's keys into `target` (set members and hash fields are
+    added, the source's expiry is copied exactly, and the live index entry
+    follows), then deletes them from `source` in a transaction WATCHing
+    them. A write landing on the source mid-move aborts the delete and the
+    move is retried, so it is never lost. String keys are the event's read
+    model, a cache of MySQL: they are dropped on both nodes rather than
+    merged, so a stale copy on either can't win, and the next read rebuilds
+    it. Returns the number of keys moved
+    """
+    with source.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(*keys)
+                copy = target.pipeline()
+                moved = []
+                for key in keys:
+                    kind = pipe.type(key)
+                    if kind == "set":
+                        copy.sadd(key, *pipe.smembers(key))
+                    elif kind == "hash":
+                        copy.hset(key, mapping=pipe.hgetall(key))
+                    elif kind == "string":
+                        copy.delete(key)
+                        moved.append(key)
+                        continue
+                    elif kind == "none":
+                        continue
+                    else:
+                        raise ValueError(f"Can't move {kind} key {key}")
+                    ttl = pipe.pttl(key)
+                    if ttl > 0:
+                        copy.pexpire(key, ttl)
+                    else:
+                        copy.persist(key)
+                    moved.append(key)
+                if pipe.sismember(index_key, str(event_id)):
+                    copy.sadd(index_key, str(event_id))
+                copy.execute()
+                pipe.multi()
+                pipe.delete(*keys)
+                pipe.srem(index_key, str(event_id))
+                pipe.execute()
+                return len(moved)
+            except redis.WatchError:
+                continue
@@ -0,0 +1,169 @@
+import time
+import threading
+from collections import OrderedDict
+from fastapi import HTTPException
+
+
+class CircuitOpenError(HTTPException):
+    """Raised (as a 503) instead of calling a backend whose circuit breaker is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(
+            status_code=503,
+            detail=f"{name} is unavailable (circuit open, retry in {retry_after:.0f}s)",
+            headers={"Retry-After": str(max(1, int(retry_after)))})
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive backend failures,
+    open -> half-open after `reset_timeout` seconds, where one trial call
+    decides whether to close again or re-open
+    """
+
+    def __init__(self, name, failure_types, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_types = failure_types
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            self.total_calls += 1
+            if self.state == "open":
+                waited = time.monotonic() - self.opened_at
+                if waited < self.reset_timeout:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout - waited)
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self.trial_in_flight:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.total_failures += 1
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except self.failure_types:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Application errors (duplicate keys, bad commands...) say nothing
+            # about backend health; just release a half-open trial slot
+            with self.lock:
+                self.trial_in_flight = False
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutiveFailures": self.failures,
+                "totalCalls": self.total_calls,
+                "totalFailures": self.total_failures,
+                "totalRejected": self.total_rejected}
+
+
+class Guarded:
+    """
+    Proxy that routes a client's method calls through a circuit breaker.
+    Item access (db["collection"]) and pipeline() return guarded proxies
+    too; methods named in `materialize` return lazy cursors, so they are
+    drained inside the breaker where a timeout can still be observed
+    """
+
+    def __init__(self, target, breaker, materialize=(), only=None):
+        self._target = target
+        self._breaker = breaker
+        self._materialize = materialize
+        self._only = only
+
+    def __getitem__(self, key):
+        return Guarded(self._target[key], self._breaker, self._materialize)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        if name == "pipeline":
+            return lambda *a, **k: Guarded(attr(*a, **k), self._breaker, only={"execute"})
+        if self._only is not None and name not in self._only:
+            return self._rewrap(attr)
+        if name in self._materialize:
+            return lambda *a, **k: self._breaker.call(lambda: list(attr(*a, **k)))
+        return lambda *a, **k: self._breaker.call(attr, *a, **k)
+
+    def _rewrap(self, attr):
+        def call(*a, **k):
+            result = attr(*a, **k)
+            return self if result is self._target else result
+        return call
+
+    @property
+    def unguarded(self):
+        return self._target
+
+
+class StaleCache:
+    """Bounded LRU of last-known values served while a backend is degraded"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.stale_served = 0
+        self.lock = threading.Lock()
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def get_many(self, keys):
+        with self.lock:
+            found = {k: self.entries[k][0] for k in keys if k in self.entries}
+            self.stale_served += len(found)
+            return found
+
+    def snapshot(self):
+        with self.lock:
+            oldest = min((t for _, t in self.entries.values()), default=None)
+            return {
+                "size": len(self.entries),
+                "maxSize": self.maxsize,
+                "staleServed": self.stale_served,
+                "oldestEntryAgeSeconds": round(time.time() - oldest, 1) if oldest else None}
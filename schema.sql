@@ -25,8 +25,10 @@ CREATE TABLE Event
     location VARCHAR(60) NOT NULL,
     date     DATE        NOT NULL,
     time     TIME        NOT NULL,
+    version  INT         NOT NULL DEFAULT 0,
     PRIMARY KEY (eventID)
 );
+CREATE INDEX idx_event_date_time ON Event (date, time);
 CREATE TABLE Relationship
 (
     studentID  INT NOT NULL,
@@ -94,3 +96,52 @@ CREATE TABLE Attendance
     FOREIGN KEY (studentID) REFERENCES Student(studentID) ON DELETE CASCADE,
     FOREIGN KEY (eventID)   REFERENCES Event(eventID) ON DELETE CASCADE
 );
+CREATE TABLE ChangeLog
+(
+    changeID  BIGINT AUTO_INCREMENT,
+    entity    VARCHAR(30) NOT NULL,
+    entityKey VARCHAR(40) NOT NULL,
+    operation VARCHAR(10) NOT NULL,
+    changedAt DATETIME    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (changeID)
+);
+-- MongoDB changes queued in the same transaction as their MySQL write,
+-- applied and deleted by the outbox relay
+CREATE TABLE Outbox
+(
+    outboxID  BIGINT AUTO_INCREMENT,
+    eventID   INT          NOT NULL,
+    operation VARCHAR(30)  NOT NULL,
+    payload   JSON         NOT NULL,
+    createdAt DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    attempts  INT          NOT NULL DEFAULT 0,
+    lastError VARCHAR(255),
+    PRIMARY KEY (outboxID)
+);
+-- Outbox rows MongoDB kept rejecting, set aside so the rows behind them
+-- can be applied; move a row back to Outbox to retry it
+CREATE TABLE OutboxDeadLetter
+(
+    outboxID       BIGINT       NOT NULL,
+    eventID        INT          NOT NULL,
+    operation      VARCHAR(30)  NOT NULL,
+    payload        JSON         NOT NULL,
+    createdAt      DATETIME     NOT NULL,
+    attempts       INT          NOT NULL,
+    lastError      VARCHAR(255),
+    deadLetteredAt DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (outboxID)
+);
+-- Students have no write endpoints, so their changes are captured by triggers
+CREATE TRIGGER student_changelog_insert AFTER INSERT ON Student FOR EACH ROW
+    INSERT INTO ChangeLog (entity, entityKey, operation) VALUES ('Student', NEW.studentID, 'upsert');
+CREATE TRIGGER student_changelog_update AFTER UPDATE ON Student FOR EACH ROW
+    INSERT INTO ChangeLog (entity, entityKey, operation) VALUES ('Student', NEW.studentID, 'upsert');
+CREATE TRIGGER student_changelog_delete AFTER DELETE ON Student FOR EACH ROW
+    INSERT INTO ChangeLog (entity, entityKey, operation) VALUES ('Student', OLD.studentID, 'delete');
+-- ON DELETE CASCADE doesn't fire triggers, so log the student's
+-- registrations before the cascade removes them
+CREATE TRIGGER student_registrations_changelog_delete BEFORE DELETE ON Student FOR EACH ROW
+    INSERT INTO ChangeLog (entity, entityKey, operation)
+    SELECT 'Registration', CONCAT(studentID, ':', eventID), 'delete'
+    FROM Registration WHERE studentID = OLD.studentID;
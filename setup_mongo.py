@@ -1,6 +1,63 @@
 from pymongo import MongoClient
 import os
 
+# Sample custom event data
+# Note: eventIDs must match the eventIDs in MySQL (data.sql)
+# MySQL events have IDs: 1, 2, 3, 4, 5, 6
+SAMPLE_EVENT_DATA = [
+    {
+        "eventID": 1,
+        "customFields": {
+            "packingList": ["sleeping bag", "water bottle", "Bible"],
+            "bringFriend": True,
+            "sessions": ["Morning Devotional", "Group Hike", "Campfire Worship"]
+        }
+    },
+    {
+        "eventID": 2,
+        "customFields": {
+            "requiredItems": ["gloves", "closed-toe shoes"],
+            "serviceHours": 4,
+            "teamAssigned": "Blue Team"
+        }
+    },
+    {
+        "eventID": 3,
+        "customFields": {
+            "foodPreference": "vegetarian-friendly",
+            "gamesPlanned": ["Frisbee", "Water Balloon Toss"]
+        }
+    },
+    {
+        "eventID": 4,
+        "customFields": {
+            "dressCode": "semi-formal",
+            "mealChoice": ["chicken", "vegetarian"],
+            "silentAuction": True
+        }
+    },
+    {
+        "eventID": 5,
+        "customFields": {
+            "beachActivities": ["volleyball", "sandcastle contest"],
+            "bringSunscreen": True
+        }
+    },
+    {
+        "eventID": 6,
+        "customFields": {
+            "donationItems": ["canned food", "blankets"]
+        }
+    }
+]
+
+def ensure_indexes(mongo_db):
+    """Creates the event_data indexes (safe to call repeatedly)"""
+    collection = mongo_db["event_data"]
+    collection.create_index("eventID")
+    # Wildcard index so filters on any schemaless customFields key stay indexed
+    collection.create_index([("customFields.$**", 1)])
+
 def setup_event_data():
     mongo_client = MongoClient(
         os.getenv("MONGO_URL"),
@@ -14,58 +71,11 @@ def setup_event_data():
     print("Clearing existing event data")
     collection.delete_many({})
 
-    # Sample custom event data
-    # Note: eventIDs must match the eventIDs in MySQL (data.sql)
-    # MySQL events have IDs: 1, 2, 3, 4, 5, 6
-    documents = [
-        {
-            "eventID": 1,
-            "customFields": {
-                "packingList": ["sleeping bag", "water bottle", "Bible"],
-                "bringFriend": True,
-                "sessions": ["Morning Devotional", "Group Hike", "Campfire Worship"]
-            }
-        },
-        {
-            "eventID": 2,
-            "customFields": {
-                "requiredItems": ["gloves", "closed-toe shoes"],
-                "serviceHours": 4,
-                "teamAssigned": "Blue Team"
-            }
-        },
-        {
-            "eventID": 3,
-            "customFields": {
-                "foodPreference": "vegetarian-friendly",
-                "gamesPlanned": ["Frisbee", "Water Balloon Toss"]
-            }
-        },
-        {
-            "eventID": 4,
-            "customFields": {
-                "dressCode": "semi-formal",
-                "mealChoice": ["chicken", "vegetarian"],
-                "silentAuction": True
-            }
-        },
-        {
-            "eventID": 5,
-            "customFields": {
-                "beachActivities": ["volleyball", "sandcastle contest"],
-                "bringSunscreen": True
-            }
-        },
-        {
-            "eventID": 6,
-            "customFields": {
-                "donationItems": ["canned food", "blankets"]
-            }
-        }
-    ]
-
     print("Inserting event data...")
-    collection.insert_many(documents)
+    collection.insert_many([dict(doc) for doc in SAMPLE_EVENT_DATA])
+
+    print("Creating indexes...")
+    ensure_indexes(mongo_db)
 
     print("MongoDB setup complete.")
 
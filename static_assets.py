@@ -0,0 +1,163 @@
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = "youth_group_frontend"
+BUILD_DIR = os.path.join(SOURCE_DIR, "dist")
+# Files index.html references that get content-hashed names
+ASSETS = ["script.js", "style.css"]
+HASH_LENGTH = 12
+# Preferred first; the variants the build writes next to each file
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+HASHED_NAME = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}\.[A-Za-z0-9]+$")
+
+
+def hashed_name(name, content):
+    """script.js -> script.<first 12 hex of its SHA-256>.js"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def write_variants(path, content):
+    """
+    Writes `content` to `path` plus its .gz and, when the optional brotli
+    package is installed, .br siblings at maximum compression
+    """
+    with open(path, "wb") as f:
+        f.write(content)
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(content, quality=11))
+
+
+def build(source_dir=SOURCE_DIR, build_dir=BUILD_DIR):
+    """
+    Replaces `build_dir` with a build of the dashboard: ASSETS under
+    content-hashed names, an index.html that references them under
+    /frontend/, precompressed variants of every file and a manifest.json
+    mapping source to built names. Returns the manifest
+    """
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+    manifest = {}
+    for name in ASSETS:
+        with open(os.path.join(source_dir, name), "rb") as f:
+            content = f.read()
+        manifest[name] = hashed_name(name, content)
+        write_variants(os.path.join(build_dir, manifest[name]), content)
+    with open(os.path.join(source_dir, "index.html"), encoding="utf-8") as f:
+        html = f.read()
+    html = re.sub(
+        r'(href|src)="(?:/frontend/)?(' + "|".join(re.escape(n) for n in ASSETS) + r')"',
+        lambda m: f'{m[1]}="/frontend/{manifest[m[2]]}"',
+        html)
+    write_variants(os.path.join(build_dir, "index.html"), html.encode("utf-8"))
+    with open(os.path.join(build_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def accepted_encodings(header):
+    """Content codings an Accept-Encoding header allows, skipping q=0 ones"""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    if "*" in accepted:
+        accepted.update(coding for coding, _ in PRECOMPRESSED)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a build's .br/.gz variant when the client
+    accepts it, and sets Cache-Control: content-hashed files are immutable
+    for a year, anything else (index.html, unbuilt sources) is revalidated
+    on every use through its ETag
+    """
+
+    async def get_response(self, path, scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        response = None
+        for coding, suffix in PRECOMPRESSED:
+            if coding not in accepted:
+                continue
+            try:
+                response = await super().get_response(path + suffix, scope)
+            except HTTPException:
+                continue
+            response.headers["Content-Encoding"] = coding
+            break
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE if HASHED_NAME.search(path) else REVALIDATE
+        return response
+
+
+def stale_sources(source_dir=SOURCE_DIR, build_dir=BUILD_DIR):
+    """
+    Source files changed since the build in `build_dir` was made (its
+    manifest.json is written last), or None when there is no build
+    """
+    try:
+        built_at = os.path.getmtime(os.path.join(build_dir, "manifest.json"))
+    except OSError:
+        return None
+    return [
+        name for name in ASSETS + ["index.html"]
+        if os.path.getmtime(os.path.join(source_dir, name)) > built_at]
+
+
+def frontend_dir(source_dir=SOURCE_DIR, build_dir=BUILD_DIR):
+    """
+    The dashboard build when one exists and is up to date, else the
+    unbuilt sources, so edits made without a rebuild are never hidden
+    behind stale assets
+    """
+    stale = stale_sources(source_dir, build_dir)
+    if stale is None:
+        return source_dir
+    if stale:
+        print(f"Warning: {', '.join(stale)} changed since the dashboard was built; "
+              f"serving {source_dir} until `python3 static_assets.py` is rerun")
+        return source_dir
+    return build_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the dashboard with hashed, precompressed assets")
+    parser.add_argument("--source-dir", default=SOURCE_DIR)
+    parser.add_argument("--build-dir", default=BUILD_DIR)
+    args = parser.parse_args()
+    if brotli is None:
+        print("Warning: brotli is not installed, so only gzip variants are written")
+    manifest = build(args.source_dir, args.build_dir)
+    for source, built in manifest.items():
+        print(f"{source} -> {built}")
+    print(f"Dashboard built in {args.build_dir}")
@@ -0,0 +1,47 @@
+"""
+Shared setup: main reads its configuration at import, so the environment
+for every test module that imports it is set here, before any of them
+load. The app runs on the embedded stores in a temporary directory, with
+a circuit breaker that trips and resets quickly.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["STORAGE_BACKEND"] = "embedded"
+os.environ["EMBEDDED_DATA_DIR"] = tempfile.mkdtemp(prefix="youth_group_tests_")
+os.environ["HOUSEKEEPING_ENABLED"] = "false"
+os.environ["BREAKER_FAILURE_THRESHOLD"] = "2"
+os.environ["BREAKER_RESET_SECONDS"] = "0.2"
+# The outbox relay only runs when notified, so its statements stay out of round-trip counts
+os.environ["OUTBOX_POLL_SECONDS"] = "3600"
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def schema_path():
+    return os.path.join(ROOT, "schema.sql")
+
+
+@pytest.fixture(scope="session")
+def client(schema_path):
+    """The app on embedded stores seeded with data.sql and the sample customFields"""
+    from fastapi.testclient import TestClient
+    import main
+    from embedded import open_stores
+    from setup_mongo import SAMPLE_EVENT_DATA
+
+    database, documents, _ = open_stores(main.EMBEDDED_DATA_DIR, schema_path)
+    database.run_script(os.path.join(ROOT, "data.sql"))
+    documents["event_data"].insert_many([dict(doc) for doc in SAMPLE_EVENT_DATA])
+    documents.close()
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        with TestClient(main.app, raise_server_exceptions=False) as client:
+            yield client
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,32 @@
+"""
+Event listing arguments are validated on both the REST endpoint and the
+GraphQL events query: a malformed from/to date or a limit below 1 is an
+error, not an empty or unbounded list.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+import pytest
+
+EVENTS_QUERY = "query($from: Date, $to: Date, $limit: Int) { events(from: $from, to: $to, limit: $limit) { eventID } }"
+
+
+@pytest.mark.parametrize("params", [{"from": "notadate"}, {"to": "2026-13-01"}, {"limit": 0}])
+def test_rest_listing_rejects_bad_arguments(client, params):
+    assert client.get("/events", params=params).status_code == 422
+
+
+@pytest.mark.parametrize("variables", [{"from": "bogus"}, {"limit": 0}, {"limit": -1}])
+def test_graphql_listing_rejects_bad_arguments(client, variables):
+    body = client.post("/graphql", json={"query": EVENTS_QUERY, "variables": variables}).json()
+    assert body.get("data") is None
+    assert body["errors"]
+
+
+def test_date_window_bounds_the_listing(client):
+    events = client.get("/events", params={"from": "2026-02-01", "to": "2026-03-31"}).json()
+    assert events
+    assert all("2026-02-01" <= e["date"] <= "2026-03-31" for e in events)
+    body = client.post("/graphql", json={
+        "query": EVENTS_QUERY, "variables": {"from": "2026-02-01", "to": "2026-03-31", "limit": 1}}).json()
+    assert [e["eventID"] for e in body["data"]["events"]] == [events[0]["eventID"]]
@@ -0,0 +1,60 @@
+"""
+Event read model ordering: views are stored after the commit with the
+event's version; an older version never replaces a newer one, and nothing
+replaces a delete's tombstone. Runs against the embedded LocalRedis, with
+main configured in conftest.py.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+import json
+
+import pytest
+
+import main
+from embedded import LocalRedis
+from redis_shards import ShardedRedis
+
+EVENT = {"eventID": 1, "name": "Game Night", "location": "Hall", "date": "2026-11-01",
+         "time": "19:00:00", "customFields": {}}
+
+
+@pytest.fixture
+def use_redis(monkeypatch):
+    def use(redis):
+        monkeypatch.setattr(main, "redis_shards", ShardedRedis({"local": redis}, main.make_redis_breaker))
+        return redis
+    return use
+
+
+def stored(redis):
+    return json.loads(redis.get(main.EVENT_VIEW_KEY(1)))
+
+
+def test_older_version_never_replaces_a_newer_view(use_redis):
+    redis = use_redis(LocalRedis())
+    main.store_event_view({**EVENT, "name": "v2"}, 2)
+    main.store_event_view({**EVENT, "name": "v1"}, 1)
+    main.store_event_view({**EVENT, "name": "v2 repair"}, 2, main.EVENT_VIEW_REPAIR_TTL_SECONDS)
+    assert stored(redis)["name"] == "v2"
+    assert redis.ttl(main.EVENT_VIEW_KEY(1)) > main.EVENT_VIEW_REPAIR_TTL_SECONDS
+    main.store_event_view({**EVENT, "name": "v3"}, 3)
+    assert main.load_event_view(1)["name"] == "v3"
+    assert "version" not in main.load_event_view(1)
+
+
+def test_tombstone_keeps_a_deleted_event_from_coming_back(use_redis):
+    redis = use_redis(LocalRedis())
+    main.store_event_view({**EVENT, "name": "v1"}, 1)
+    redis.set(main.EVENT_VIEW_KEY(1), main.EVENT_VIEW_TOMBSTONE)
+    # A repair that read the row before the delete committed
+    main.store_event_view({**EVENT, "name": "v1 repair"}, 1, main.EVENT_VIEW_REPAIR_TTL_SECONDS)
+    assert stored(redis) == {"deleted": True}
+    assert main.load_event_view(1) is None
+
+
+def test_views_without_a_version_are_replaced(use_redis):
+    redis = use_redis(LocalRedis())
+    redis.set(main.EVENT_VIEW_KEY(1), json.dumps({**EVENT, "name": "old"}))
+    main.store_event_view({**EVENT, "name": "v0"}, 0)
+    assert stored(redis)["name"] == "v0"
@@ -0,0 +1,56 @@
+"""
+The events:live index is only pruned atomically: an event whose live
+sets are gone is removed, but one checked into between the check and the
+SREM stays indexed. Runs against the embedded LocalRedis.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+from embedded import LocalRedis
+from housekeeping import sweep_live_keys, unindex_ended
+
+INDEX_KEY = "events:live"
+ATTENDEES_KEY = lambda eid: f"event:{eid}:attendees"
+
+
+class CheckInDuringCheck(LocalRedis):
+    """LocalRedis where a check-in to `event_id` lands right after the first EXISTS"""
+
+    def __init__(self, event_id):
+        super().__init__()
+        self.event_id = event_id
+        self.raced = False
+
+    def exists(self, *keys):
+        found = super().exists(*keys)
+        if not self.raced:
+            self.raced = True
+            self.sadd(ATTENDEES_KEY(self.event_id), "7")
+            self.sadd(INDEX_KEY, str(self.event_id))
+        return found
+
+
+def test_unindexes_events_whose_live_sets_are_gone():
+    r = LocalRedis()
+    r.sadd(INDEX_KEY, "1", "2")
+    r.sadd(ATTENDEES_KEY(2), "5")
+    assert unindex_ended(r, INDEX_KEY, ATTENDEES_KEY, [1, 2]) == [1]
+    assert r.smembers(INDEX_KEY) == {"2"}
+
+
+def test_check_in_between_check_and_srem_keeps_the_event_indexed():
+    r = CheckInDuringCheck(1)
+    r.sadd(INDEX_KEY, "1")
+    assert unindex_ended(r, INDEX_KEY, ATTENDEES_KEY, [1]) == []
+    assert r.raced
+    assert r.smembers(INDEX_KEY) == {"1"}
+
+
+def test_sweep_reconciles_the_index_atomically():
+    r = CheckInDuringCheck(3)
+    r.sadd(INDEX_KEY, "3", "4")
+    r.sadd(ATTENDEES_KEY(1), "9")
+    result = sweep_live_keys(r, {1, 3, 4}, 60, INDEX_KEY, ATTENDEES_KEY)
+    assert result["indexAdded"] == 1
+    assert result["indexRemoved"] == 1
+    assert r.smembers(INDEX_KEY) == {"1", "3"}
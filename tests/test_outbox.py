@@ -0,0 +1,102 @@
+"""
+Outbox relay failure handling against the embedded stores: a row MongoDB
+keeps rejecting holds back only its own event and is dead-lettered after
+max_attempts, while an unreachable MongoDB leaves the batch queued.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+import pymongo.errors
+import pytest
+
+from embedded import open_stores
+from outbox import OutboxRelay, record_outbox
+
+TRANSIENT = (pymongo.errors.ConnectionFailure,)
+
+
+@pytest.fixture
+def stores(tmp_path, schema_path):
+    database, documents, _ = open_stores(str(tmp_path), schema_path)
+    yield database, documents
+    documents.close()
+
+
+def queue(database, *rows):
+    db = database.connect()
+    cursor = db.cursor()
+    for event_id, operation, payload in rows:
+        record_outbox(cursor, event_id, operation, payload)
+    db.commit()
+    db.close()
+
+
+def query(database, sql):
+    db = database.connect()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(sql)
+    rows = cursor.fetchall()
+    db.close()
+    return rows
+
+
+def relay_for(database, get_mongo, applied=None):
+    def on_applied(cursor, rows):
+        if applied is not None:
+            applied.extend(row["outboxID"] for row in rows)
+    return OutboxRelay(database.connect, get_mongo, on_applied, max_attempts=3, transient_errors=TRANSIENT)
+
+
+def custom_fields(documents, event_id):
+    docs = list(documents["event_data"].find({"eventID": event_id}, {"_id": 0, "customFields": 1}))
+    return docs[0]["customFields"] if docs else None
+
+
+def test_rejected_row_only_blocks_its_event_then_is_dead_lettered(stores):
+    database, documents = stores
+    queue(database,
+          (1, "no_such_operation", {}),
+          (2, "set_custom_fields", {"customFields": {"a": 1}}),
+          (1, "set_custom_fields", {"customFields": {"b": 2}}))
+    applied = []
+    relay = relay_for(database, lambda: documents, applied)
+
+    with pytest.raises(RuntimeError):
+        relay.relay_once()
+    # Event 2 went through; event 1's later row waits behind the bad one
+    assert custom_fields(documents, 2) == {"a": 1}
+    assert custom_fields(documents, 1) is None
+    assert applied == [2]
+    pending = query(database, "SELECT outboxID, attempts, lastError FROM Outbox ORDER BY outboxID")
+    assert [(r["outboxID"], r["attempts"]) for r in pending] == [(1, 1), (3, 0)]
+    assert "no_such_operation" in pending[0]["lastError"]
+
+    with pytest.raises(RuntimeError):
+        relay.relay_once()
+    # Third failure: dead-lettered, and event 1's next row is applied
+    assert relay.relay_once() == 1
+    assert custom_fields(documents, 1) == {"b": 2}
+    assert query(database, "SELECT COUNT(*) AS n FROM Outbox")[0]["n"] == 0
+    dead = query(database, "SELECT outboxID, operation, attempts FROM OutboxDeadLetter")
+    assert dead == [{"outboxID": 1, "operation": "no_such_operation", "attempts": 3}]
+    snapshot = relay.snapshot()
+    assert snapshot["deadLettered"] == 1
+    assert snapshot["pending"] == 0
+
+
+def test_unreachable_mongo_keeps_the_batch_without_counting_attempts(stores):
+    database, documents = stores
+    queue(database, (1, "set_custom_fields", {"customFields": {"a": 1}}))
+
+    def unreachable():
+        raise pymongo.errors.ServerSelectionTimeoutError("timed out")
+    for _ in range(5):
+        with pytest.raises(pymongo.errors.ServerSelectionTimeoutError):
+            relay_for(database, unreachable).relay_once()
+    pending = query(database, "SELECT attempts, lastError FROM Outbox")
+    assert pending[0]["attempts"] == 0
+    assert "timed out" in pending[0]["lastError"]
+    assert query(database, "SELECT COUNT(*) AS n FROM OutboxDeadLetter")[0]["n"] == 0
+
+    assert relay_for(database, lambda: documents).relay_once() == 1
+    assert custom_fields(documents, 1) == {"a": 1}
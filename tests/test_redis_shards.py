@@ -0,0 +1,93 @@
+"""
+Rebalancing live keys between Redis nodes after a node is added, with
+embedded LocalRedis instances as the nodes: keys move to the node the
+ring now picks, expiries are copied exactly, read model views are
+dropped, and a check-in landing mid-move is kept.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+import json
+
+from embedded import LocalRedis
+from redis_shards import ShardedRedis, rebalance
+from resilience import CircuitBreaker
+
+INDEX_KEY = "events:live"
+
+
+def shards_of(clients):
+    return ShardedRedis(clients, lambda name: CircuitBreaker(name, (), 5, 30))
+
+
+def owned_by(shards, name):
+    return next(event_id for event_id in range(1, 1000) if shards.node_for(event_id) == name)
+
+
+class CheckInDuringMove(LocalRedis):
+    """LocalRedis where a check-in to `key` lands right after the move first reads it"""
+
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+        self.raced = False
+
+    def smembers(self, key):
+        members = super().smembers(key)
+        if key == self.key and not self.raced:
+            self.raced = True
+            self.sadd(key, "99")
+        return members
+
+
+def test_moves_keys_to_the_new_owner_with_their_exact_expiry():
+    old, new = LocalRedis(), LocalRedis()
+    shards = shards_of({"old": old, "new": new})
+    moving, staying = owned_by(shards, "new"), owned_by(shards, "old")
+    old.sadd(f"event:{moving}:checkedIn", "1", "2")
+    old.expire(f"event:{moving}:checkedIn", 600)
+    old.hset(f"event:{moving}:names", "1", "Ann")
+    old.sadd(f"event:{staying}:checkedIn", "3")
+    old.sadd(INDEX_KEY, str(moving), str(staying))
+    # The target's copy expires, but the source's doesn't: no expiry wins
+    new.hset(f"event:{moving}:names", "2", "Ben")
+    new.expire(f"event:{moving}:names", 30)
+
+    assert rebalance(shards, INDEX_KEY) == {"eventsMoved": 1, "keysMoved": 2}
+    assert new.smembers(f"event:{moving}:checkedIn") == {"1", "2"}
+    assert 599 <= new.ttl(f"event:{moving}:checkedIn") <= 600
+    assert new.hgetall(f"event:{moving}:names") == {"1": "Ann", "2": "Ben"}
+    assert new.ttl(f"event:{moving}:names") == -1
+    assert new.smembers(INDEX_KEY) == {str(moving)}
+    assert old.exists(f"event:{moving}:checkedIn", f"event:{moving}:names") == 0
+    assert old.smembers(INDEX_KEY) == {str(staying)}
+    assert old.smembers(f"event:{staying}:checkedIn") == {"3"}
+    # A second run finds nothing left to move
+    assert rebalance(shards, INDEX_KEY) == {"eventsMoved": 0, "keysMoved": 0}
+
+
+def test_read_model_views_are_dropped_on_both_nodes():
+    old, new = LocalRedis(), LocalRedis()
+    shards = shards_of({"old": old, "new": new})
+    moving = owned_by(shards, "new")
+    view_key = f"event:{moving}:view"
+    old.set(view_key, json.dumps({"eventID": moving, "version": 3}))
+    new.set(view_key, json.dumps({"eventID": moving, "version": 1}))
+
+    rebalance(shards, INDEX_KEY)
+    assert old.get(view_key) is None
+    assert new.get(view_key) is None
+
+
+def test_check_in_landing_mid_move_is_kept():
+    probe = shards_of({"old": LocalRedis(), "new": LocalRedis()})
+    moving = owned_by(probe, "new")
+    key = f"event:{moving}:checkedIn"
+    old, new = CheckInDuringMove(key), LocalRedis()
+    shards = shards_of({"old": old, "new": new})
+    old.sadd(key, "1")
+
+    rebalance(shards, INDEX_KEY)
+    assert old.raced
+    assert new.smembers(key) == {"1", "99"}
+    assert old.exists(key) == 0
@@ -0,0 +1,242 @@
+"""
+Fault-injection tests for the latency guards: resilience.py's circuit
+breaker driven through Guarded proxies, and the last-known customFields
+fallback, against local stand-ins for MongoDB and Redis that time out on
+demand. The app runs on the embedded stores configured in conftest.py.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+import time
+import pymongo.errors
+import pytest
+import redis
+
+import main
+from redis_shards import ShardedRedis
+from resilience import CircuitBreaker, CircuitOpenError, Guarded, StaleCache
+from setup_mongo import SAMPLE_EVENT_DATA
+
+
+class FakeMongo:
+    """MongoDB database stand-in whose event_data.find times out while `down`"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.down = False
+        self.calls = 0
+
+    def __getitem__(self, name):
+        return self
+
+    def find(self, query=None, projection=None):
+        self.calls += 1
+        if self.down:
+            raise pymongo.errors.NetworkTimeout("timed out")
+        wanted = (query or {}).get("eventID", {}).get("$in")
+        return iter([dict(d) for d in self.docs if wanted is None or d["eventID"] in wanted])
+
+    def close(self):
+        pass
+
+
+class FakeRedis:
+    """Redis stand-in where every command times out while `down`"""
+
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        if self.down:
+            raise redis.exceptions.TimeoutError("Timeout reading from socket")
+        return None
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.redis.calls += 1
+        if self.redis.down:
+            raise redis.exceptions.TimeoutError("Timeout reading from socket")
+        return [set(), {}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("resilience.time.monotonic", clock)
+    return clock
+
+
+def redis_breaker(threshold=2, reset=30.0):
+    return CircuitBreaker("redis", main.REDIS_FAILURES, threshold, reset)
+
+
+def test_breaker_opens_after_consecutive_timeouts(clock):
+    backend = FakeRedis()
+    backend.down = True
+    breaker = redis_breaker()
+    guarded = Guarded(backend, breaker)
+    for _ in range(2):
+        with pytest.raises(redis.exceptions.TimeoutError):
+            guarded.get("key")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as rejected:
+        guarded.get("key")
+    # Rejected without touching the backend, as a 503 with Retry-After
+    assert backend.calls == 2
+    assert rejected.value.status_code == 503
+    assert rejected.value.headers["Retry-After"] == "30"
+    assert breaker.snapshot()["totalRejected"] == 1
+
+
+def test_half_open_trial_success_closes(clock):
+    backend = FakeRedis()
+    backend.down = True
+    breaker = redis_breaker()
+    guarded = Guarded(backend, breaker)
+    for _ in range(2):
+        with pytest.raises(redis.exceptions.TimeoutError):
+            guarded.get("key")
+    clock.now += 31
+    backend.down = False
+    assert guarded.get("key") is None
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_half_open_allows_one_trial_and_failure_reopens(clock):
+    breaker = redis_breaker()
+    for _ in range(2):
+        breaker.record_failure()
+    clock.now += 31
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    # A second caller while the trial is in flight is rejected
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_application_errors_dont_trip_the_breaker(clock):
+    breaker = redis_breaker()
+
+    def bad_command():
+        raise redis.exceptions.ResponseError("WRONGTYPE")
+    for _ in range(3):
+        with pytest.raises(redis.exceptions.ResponseError):
+            breaker.call(bad_command)
+    assert breaker.state == "closed"
+
+
+def test_pipeline_execute_goes_through_the_breaker(clock):
+    backend = FakeRedis()
+    backend.down = True
+    breaker = redis_breaker()
+    pipe = Guarded(backend, breaker).pipeline()
+    pipe.smembers("a").hgetall("b")
+    for _ in range(2):
+        with pytest.raises(redis.exceptions.TimeoutError):
+            pipe.execute()
+    assert breaker.state == "open"
+
+
+@pytest.fixture
+def mongo(monkeypatch, client):
+    """Swaps MongoDB for a FakeMongo with a fresh breaker and customFields cache"""
+    fake = FakeMongo([dict(doc) for doc in SAMPLE_EVENT_DATA])
+    monkeypatch.setattr(main, "mongo_db", fake)
+    monkeypatch.setattr(main, "mongo_breaker", CircuitBreaker(
+        "mongo", main.MONGO_FAILURES, main.BREAKER_FAILURE_THRESHOLD, main.BREAKER_RESET_SECONDS))
+    monkeypatch.setattr(main, "custom_fields_cache", StaleCache())
+    return fake
+
+
+def test_fetch_custom_fields_serves_last_known_values(mongo):
+    expected = {1: SAMPLE_EVENT_DATA[0]["customFields"]}
+    assert main.fetch_custom_fields([1]) == expected
+    mongo.down = True
+    # Timeouts, then an open circuit, both fall back to the cache
+    for _ in range(3):
+        assert main.fetch_custom_fields([1]) == expected
+    assert main.mongo_breaker.state == "open"
+    assert mongo.calls == 3
+    assert main.custom_fields_cache.snapshot()["staleServed"] == 3
+    # Events never cached have nothing to fall back to
+    assert main.fetch_custom_fields([2]) == {}
+    with pytest.raises(CircuitOpenError):
+        main.fetch_custom_fields([1], fallback=False)
+
+
+def test_fetch_custom_fields_recovers_through_half_open_trial(mongo):
+    main.fetch_custom_fields([1])
+    mongo.down = True
+    for _ in range(2):
+        main.fetch_custom_fields([1])
+    assert main.mongo_breaker.state == "open"
+    mongo.down = False
+    mongo.docs[0] = {"eventID": 1, "customFields": {"bringFriend": False}}
+    time.sleep(main.BREAKER_RESET_SECONDS + 0.05)
+    assert main.fetch_custom_fields([1]) == {1: {"bringFriend": False}}
+    assert main.mongo_breaker.state == "closed"
+
+
+def test_event_detail_is_degraded_not_failed(mongo, client):
+    expected = SAMPLE_EVENT_DATA[0]["customFields"]
+    main.drop_event_view(1)
+    assert client.get("/events/1").json()["customFields"] == expected
+    main.drop_event_view(1)
+    mongo.down = True
+    for _ in range(3):
+        response = client.get("/events/1")
+        assert response.status_code == 200
+        assert response.json()["customFields"] == expected
+    # Last-known values are served but never stored in the read model
+    assert main.load_event_view(1) is None
+    assert mongo.calls == 3
+    listing = client.get("/events", params={"include": "customFields"})
+    assert listing.status_code == 200
+    assert next(e for e in listing.json() if e["eventID"] == 1)["customFields"] == expected
+
+
+def test_metrics_report_breaker_state(mongo, client):
+    mongo.down = True
+    for _ in range(2):
+        main.fetch_custom_fields([1])
+    breakers = client.get("/metrics").json()["breakers"]
+    assert breakers["mongo"]["state"] == "open"
+
+
+def test_live_attendance_fails_fast_once_redis_circuit_opens(monkeypatch, client):
+    backend = FakeRedis()
+    backend.down = True
+    monkeypatch.setattr(main, "redis_shards", ShardedRedis({"local": backend}, main.make_redis_breaker))
+    assert [client.get("/events/1/live").status_code for _ in range(2)] == [500, 500]
+    response = client.get("/events/1/live")
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert backend.calls == 2
@@ -0,0 +1,102 @@
+"""
+Round trips per write endpoint, plus an event detail read: MySQL
+statements (as counted by the slow-query log) and Redis calls, with a
+pipeline or script counting once. A change that brings back a
+validate-then-write SELECT, an extra Redis call on a write, or an event
+read that misses its read model fails here. Connection setup and COMMIT
+are not counted, and the outbox relay is held off.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+import pytest
+
+import main
+
+# (MySQL statements, Redis round trips) allowed per request
+BUDGET = {
+    "register": (2, 0),
+    "register again": (2, 0),
+    "unregister": (2, 0),
+    "update event": (4, 1),
+    "get event": (0, 1),
+    "check in": (1, 1),
+    "check out": (0, 1),
+    "delete event": (5, 1),
+}
+
+
+class CountingPipeline:
+    def __init__(self, pipe, counts):
+        self._pipe = pipe
+        self._counts = counts
+
+    def execute(self, *args, **kwargs):
+        self._counts["redis"] += 1
+        return self._pipe.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+
+class CountingRedis:
+    def __init__(self, redis, counts):
+        self._redis = redis
+        self._counts = counts
+
+    def pipeline(self, *args, **kwargs):
+        return CountingPipeline(self._redis.pipeline(*args, **kwargs), self._counts)
+
+    def __getattr__(self, name):
+        attr = getattr(self._redis, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._counts["redis"] += 1
+            return attr(*args, **kwargs)
+        return call
+
+
+def measure(client, counts, method, url, **kwargs):
+    main.query_log.reset()
+    counts["redis"] = 0
+    response = client.request(method, url, **kwargs)
+    assert response.status_code < 400, (url, response.status_code, response.text)
+    statements = sum(entry["count"] for entry in main.query_log.top(n=len(main.query_log.stats)))
+    return statements, counts["redis"]
+
+
+@pytest.fixture(scope="module")
+def measured(client):
+    counts = {"redis": 0}
+    get_redis_conn, notify = main.get_redis_conn, main.outbox_relay.notify
+    main.get_redis_conn = lambda event_id: CountingRedis(get_redis_conn(event_id), counts)
+    main.outbox_relay.notify = lambda: None
+    try:
+        event_id = client.post("/events", json={
+            "name": "Round Trips", "location": "Nowhere", "date": "2099-01-01",
+            "time": "12:00:00", "customFields": {}}).json()["eventID"]
+        student_id = 1
+        return {
+            "register": measure(client, counts, "POST", f"/students/{student_id}/registrations/{event_id}"),
+            "register again": measure(client, counts, "POST", f"/students/{student_id}/registrations/{event_id}"),
+            "unregister": measure(client, counts, "DELETE", f"/students/{student_id}/registrations/{event_id}"),
+            "update event": measure(client, counts, "PUT", f"/events/{event_id}", json={
+                "name": "Round Trips", "location": "Somewhere", "date": "2099-01-01",
+                "time": "12:00:00", "customFields": {}}),
+            "get event": measure(client, counts, "GET", f"/events/{event_id}"),
+            "check in": measure(client, counts, "POST", f"/events/{event_id}/checkin/{student_id}"),
+            "check out": measure(client, counts, "POST", f"/events/{event_id}/checkout/{student_id}"),
+            "delete event": measure(client, counts, "DELETE", f"/events/{event_id}"),
+        }
+    finally:
+        main.get_redis_conn, main.outbox_relay.notify = get_redis_conn, notify
+
+
+@pytest.mark.parametrize("endpoint", BUDGET)
+def test_endpoint_stays_within_its_round_trip_budget(measured, endpoint):
+    statements, redis_calls = measured[endpoint]
+    max_statements, max_redis = BUDGET[endpoint]
+    assert statements <= max_statements, f"{endpoint}: {statements} MySQL statements (budget {max_statements})"
+    assert redis_calls <= max_redis, f"{endpoint}: {redis_calls} Redis round trips (budget {max_redis})"
@@ -0,0 +1,43 @@
+"""
+Choosing between the dashboard build and its sources: the build is served
+only while no source file is newer than its manifest.
+
+Run from the project root:
+    python3 -m pytest tests
+"""
+import os
+import time
+
+import pytest
+
+from static_assets import ASSETS, build, frontend_dir
+
+
+@pytest.fixture
+def sources(tmp_path):
+    source_dir = tmp_path / "frontend"
+    source_dir.mkdir()
+    (source_dir / "index.html").write_text('<link href="style.css"><script src="script.js"></script>')
+    for name in ASSETS:
+        (source_dir / name).write_text(f"/* {name} */")
+    return str(source_dir), str(source_dir / "dist")
+
+
+def test_sources_are_served_without_a_build(sources):
+    source_dir, build_dir = sources
+    assert frontend_dir(source_dir, build_dir) == source_dir
+
+
+def test_up_to_date_build_is_served(sources):
+    source_dir, build_dir = sources
+    build(source_dir, build_dir)
+    assert frontend_dir(source_dir, build_dir) == build_dir
+
+
+def test_sources_edited_after_the_build_are_served_instead(sources, capsys):
+    source_dir, build_dir = sources
+    build(source_dir, build_dir)
+    later = time.time() + 10
+    os.utime(os.path.join(source_dir, "script.js"), (later, later))
+    assert frontend_dir(source_dir, build_dir) == source_dir
+    assert "script.js changed since the dashboard was built" in capsys.readouterr().out
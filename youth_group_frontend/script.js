@@ -95,6 +95,88 @@ async function fetchData(endpoint, loadingElementId = null) {
     }
 }
 
+// -----------------------------
+// Local Sync Cache (Shared)
+// -----------------------------
+// Students, events, registrations and customFields are kept in
+// localStorage and refreshed from /sync with only the changes since the
+// last version token; the server falls back to a full snapshot when needed.
+const SYNC_STORAGE_KEY = "youthGroupSyncCache";
+
+function emptySyncCache() {
+    return { version: null, students: {}, events: {}, registrations: {}, customFields: {} };
+}
+
+function loadSyncCache() {
+    try {
+        const stored = JSON.parse(localStorage.getItem(SYNC_STORAGE_KEY));
+        return stored && stored.students ? stored : emptySyncCache();
+    } catch (err) {
+        return emptySyncCache();
+    }
+}
+
+let syncCache = loadSyncCache();
+
+function applySyncPage(page) {
+    if (page.mode === "snapshot") {
+        syncCache = emptySyncCache();
+        page.students.forEach(s => { syncCache.students[s.studentID] = s; });
+        page.events.forEach(e => { syncCache.events[e.eventID] = e; });
+        page.registrations.forEach(([sid, eid]) => { syncCache.registrations[`${sid}:${eid}`] = true; });
+        syncCache.customFields = page.customFields || {};
+    } else {
+        page.students.upserts.forEach(s => { syncCache.students[s.studentID] = s; });
+        page.students.deletes.forEach(id => { delete syncCache.students[id]; });
+        page.events.upserts.forEach(e => { syncCache.events[e.eventID] = e; });
+        page.events.deletes.forEach(id => { delete syncCache.events[id]; });
+        page.registrations.upserts.forEach(([sid, eid]) => { syncCache.registrations[`${sid}:${eid}`] = true; });
+        page.registrations.deletes.forEach(([sid, eid]) => { delete syncCache.registrations[`${sid}:${eid}`]; });
+        Object.assign(syncCache.customFields, page.customFields.upserts);
+        page.customFields.deletes.forEach(id => { delete syncCache.customFields[id]; });
+    }
+    syncCache.version = page.version;
+}
+
+async function syncLocalCache() {
+    try {
+        let page;
+        do {
+            const query = syncCache.version !== null ? `?since=${encodeURIComponent(syncCache.version)}` : "";
+            const res = await fetch(`${API_BASE_URL}/sync${query}`);
+            if (!res.ok) throw new Error(`HTTP error! Status: ${res.status}`);
+            page = await res.json();
+            applySyncPage(page);
+        } while (page.hasMore);
+        localStorage.setItem(SYNC_STORAGE_KEY, JSON.stringify(syncCache));
+    } catch (err) {
+        // Keep serving the last local copy when offline or storage is full
+        console.error("Sync error:", err);
+    }
+    return syncCache;
+}
+
+function cachedStudents() {
+    return Object.values(syncCache.students).sort((a, b) => a.studentID - b.studentID);
+}
+
+function cachedEvents() {
+    return Object.values(syncCache.events)
+        .map(e => ({ ...e, customFields: syncCache.customFields[e.eventID] || {} }))
+        .sort((a, b) => `${a.date} ${a.time}`.localeCompare(`${b.date} ${b.time}`));
+}
+
+function cachedRegisteredEvents(studentID) {
+    return Object.keys(syncCache.registrations)
+        .filter(key => key.startsWith(`${studentID}:`))
+        .map(key => Number(key.split(":")[1]));
+}
+
+async function loadEvents() {
+    await syncLocalCache();
+    return cachedEvents();
+}
+
 // -----------------------------
 // VIEW SWITCHING LOGIC
 // -----------------------------
@@ -743,6 +825,8 @@ async function updateLiveAttendance(eventID) {
 }
 
 // Finalize event
+const FINALIZE_POLL_MS = 1000;
+
 async function finalizeEvent(eventID) {
     try {
         const res = await fetch(
@@ -754,28 +838,38 @@ async function finalizeEvent(eventID) {
                 }
             }
         );
-        
+
         if (!res.ok) {
             const errorData = await res.json().catch(() => ({}));
             const errorMessage = errorData.detail || "Finalization failed.";
             return showToast(errorMessage, "error");
         }
 
-        const data = await res.json();
-
-    if (data && data.totalAttendees !== undefined) {
-        showToast(
-            `Event finalized. Total attendees: ${data.totalAttendees}`,
-            "success"
-        );
+        // Finalization runs as a background job; poll it until it's done
+        let job = await res.json();
         closeEventDetailsPopup();
+        showToast("Finalizing event...", "info");
+        while (job.status !== "succeeded" && job.status !== "failed") {
+            await new Promise((resolve) => setTimeout(resolve, FINALIZE_POLL_MS));
+            const jobRes = await fetch(`${API_BASE_URL}/jobs/${job.jobID}`);
+            if (!jobRes.ok) {
+                return showToast("Lost track of the finalization job.", "error");
+            }
+            job = await jobRes.json();
+        }
+
+        if (job.status === "succeeded" && job.result) {
+            showToast(
+                `Event finalized. Total attendees: ${job.result.totalAttendees}`,
+                "success"
+            );
 
             // Refresh events list
-    const updatedEvents = await fetchData("/events", "events-loading");
-    allEvents = updatedEvents;
-    renderAllEventViews(allEvents, currentCalendarDate);
+            const updatedEvents = await loadEvents();
+            allEvents = updatedEvents;
+            renderAllEventViews(allEvents, currentCalendarDate);
         } else {
-            showToast("Finalization failed.", "error");
+            showToast(job.error || "Finalization failed.", "error");
         }
     } catch (err) {
         console.error("Finalize error:", err);
@@ -848,6 +942,37 @@ function toggleGraphQLExplorer() {
     }
 }
 
+// Automatic persisted queries: send only the document's sha256 and fall
+// back to the full text the first time the server hasn't seen it
+async function sha256Hex(text) {
+    const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, "0")).join("");
+}
+
+async function postGraphQL(body) {
+    const response = await fetch(`${API_BASE_URL}/graphql`, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+        },
+        body: JSON.stringify(body)
+    });
+    if (!response.ok) {
+        throw new Error(`HTTP error! Status: ${response.status}`);
+    }
+    return response.json();
+}
+
+async function graphqlRequest(query, variables = undefined) {
+    if (!window.crypto?.subtle) {
+        return postGraphQL({ query, variables });
+    }
+    const extensions = { persistedQuery: { version: 1, sha256Hash: await sha256Hex(query) } };
+    const result = await postGraphQL({ variables, extensions });
+    const notFound = result.errors?.some(e => e.extensions?.code === "PERSISTED_QUERY_NOT_FOUND");
+    return notFound ? postGraphQL({ query, variables, extensions }) : result;
+}
+
 function initGraphQLExplorer() {
     const toggleBtn = document.getElementById("graphql-explorer-toggle-btn");
     if (toggleBtn) {
@@ -874,21 +999,7 @@ function initGraphQLExplorer() {
             if (resultDiv) resultDiv.style.display = "none";
             
             try {
-                const response = await fetch(`${API_BASE_URL}/graphql`, {
-                    method: "POST",
-                    headers: {
-                        "Content-Type": "application/json",
-                    },
-                    body: JSON.stringify({
-                        query: query
-                    })
-                });
-                
-                if (!response.ok) {
-                    throw new Error(`HTTP error! Status: ${response.status}`);
-                }
-                
-                const result = await response.json();
+                const result = await graphqlRequest(query);
                 
                 // Display result
                 if (resultContent) {
@@ -1191,7 +1302,7 @@ async function handleStudentLookup(e) {
     }
 
     // Refresh events before rendering to get newly created events
-    const refreshedEvents = await fetchData("/events", null);
+    const refreshedEvents = await loadEvents();
     allEvents = refreshedEvents || allEvents;
     
     await renderStudentUpcomingEvents(studentID, allEvents);
@@ -1266,7 +1377,7 @@ async function refreshStudentView(studentID) {
     }
     
     // Refresh events
-    const refreshedEvents = await fetchData("/events", null);
+    const refreshedEvents = await loadEvents();
     allEvents = refreshedEvents || allEvents;
     
     // Re-render the student dashboard
@@ -1288,8 +1399,8 @@ async function renderStudentUpcomingEvents(studentID, events) {
     // Get registration status
     let registeredEventIDs = [];
     try {
-        const registrationData = await fetchData(`/students/${studentID}/registrations`, null);
-        registeredEventIDs = registrationData?.registeredEvents || [];
+        await syncLocalCache();
+        registeredEventIDs = cachedRegisteredEvents(studentID);
     } catch (error) {
         console.error("Error fetching registrations:", error);
         // Continue without registration data
@@ -1633,7 +1744,7 @@ function initEventForm() {
             showToast(`Event '${newEvent.name}' created successfully!`, "success");
             
             // Re-fetch all events and re-render
-            const updatedEvents = await fetchData("/events", "events-loading");
+            const updatedEvents = await loadEvents();
             if (updatedEvents) {
                 allEvents = updatedEvents;
             }
@@ -1690,7 +1801,8 @@ async function init() {
     renderStudentSkeleton();
 
         // Fetch and render data
-    const students = await fetchData("/students", "students-loading");
+    await syncLocalCache();
+    const students = cachedStudents();
         if (students && students.length > 0) {
     renderStudents(students, { updateGlobal: true });
     initStudentSearch();
@@ -1739,7 +1851,7 @@ async function init() {
             renderGroups([], { updateGlobal: true });
         }
 
-    const events = await fetchData("/events", "events-loading");
+    const events = await loadEvents();
         allEvents = events || [];
         
         // Debug: Check if customFields are being loaded
@@ -2129,7 +2241,7 @@ async function editEvent(eventID) {
             closeEventDetailsPopup();
             
             // Re-fetch and re-render events
-            const updatedEvents = await fetchData("/events", "events-loading");
+            const updatedEvents = await loadEvents();
             allEvents = updatedEvents;
             renderAllEventViews(allEvents, currentCalendarDate);
             
@@ -2185,7 +2297,7 @@ async function deleteEvent(eventID) {
         }
         
         // Re-fetch and re-render events
-        const updatedEvents = await fetchData("/events", "events-loading");
+        const updatedEvents = await loadEvents();
         allEvents = updatedEvents;
         renderAllEventViews(allEvents, currentCalendarDate);
         